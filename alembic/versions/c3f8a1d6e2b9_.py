@@ -0,0 +1,39 @@
+"""token revocations
+
+Revision ID: c3f8a1d6e2b9
+Revises: 9b1e5c2d4a7f
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a1d6e2b9'
+down_revision: Union[str, None] = '9b1e5c2d4a7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('token_revocations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(), nullable=True),
+    sa.Column('revoked_before', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_token_revocations_created_at'), 'token_revocations', ['created_at'], unique=False)
+    op.create_index(op.f('ix_token_revocations_expires_at'), 'token_revocations', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_token_revocations_expires_at'), table_name='token_revocations')
+    op.drop_index(op.f('ix_token_revocations_created_at'), table_name='token_revocations')
+    op.drop_table('token_revocations')
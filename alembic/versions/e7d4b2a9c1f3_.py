@@ -0,0 +1,42 @@
+"""users indexes
+
+Revision ID: e7d4b2a9c1f3
+Revises: c3f8a1d6e2b9
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7d4b2a9c1f3'
+down_revision: Union[str, None] = 'c3f8a1d6e2b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ix_users_id дублирует первичный ключ и только замедляет вставку
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+
+    # Строки без имени или хеша не могут войти; миграция остановится, если такие строки есть
+    op.alter_column('users', 'username', existing_type=sa.String(), nullable=False)
+    op.alter_column('users', 'hashed_password', existing_type=sa.String(), nullable=False)
+
+    # Покрывающий индекс: поиск по имени выполняется как Index Only Scan
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.create_index(
+        'ix_users_username', 'users', ['username'], unique=True,
+        postgresql_include=['id', 'hashed_password'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_username', table_name='users')
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.alter_column('users', 'hashed_password', existing_type=sa.String(), nullable=True)
+    op.alter_column('users', 'username', existing_type=sa.String(), nullable=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
@@ -0,0 +1,32 @@
+"""users username lower index
+
+Revision ID: f2a6c8d0b4e1
+Revises: e7d4b2a9c1f3
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6c8d0b4e1'
+down_revision: Union[str, None] = 'e7d4b2a9c1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Имена, различающиеся только регистром, запрещены; поиск без учета регистра
+    # (SECURITY_USERNAME_CASE_INSENSITIVE) читает данные из этого индекса.
+    # Миграция остановится, если в таблице уже есть такие имена
+    op.create_index(
+        'ix_users_username_lower', 'users', [sa.text('lower(username)')], unique=True,
+        postgresql_include=['id', 'username', 'hashed_password'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_username_lower', table_name='users')
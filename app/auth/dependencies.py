@@ -1,34 +1,44 @@
+import math
+import secrets
 from typing import Annotated
 
-from fastapi import Depends, Request, Response, HTTPException, status
+from fastapi import Depends, Header, Request, Response, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core import get_db_session
+from app.core import settings, database, metrics, get_db_session
 from app.auth import service as auth_service
+from app.auth import ratelimit
 from app.auth import schemas as auth_schemas
+from app.auth.revocation import revocations
 from app.users import service as users_service
 from app.users import schemas as users_schemas
 
 
 # Обновление токена доступа
 async def refresh_access_token(
-    request: Request, 
-    response: Response, 
-    session: Annotated[AsyncSession, Depends(get_db_session)]
+    request: Request,
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_db_session)],
 ) -> auth_schemas.Token:
     """
-    Обновляет токен доступа на основе предоставленного токена обновления.
+    Обновляет токен доступа и выполняет ротацию токена обновления.
+    Предъявленный токен обновления становится недействительным, его повторное
+    использование отзывает всю цепочку токенов.
+
+    Пока текущий токен доступа из cookies свежий (см. auth_service.access_token_is_fresh),
+    новые токены не выдаются: возвращаются текущие, без записи в базу данных и без Set-Cookie.
+    Одновременные запросы с одним токеном обновления получают одну и ту же пару новых токенов.
 
     Args:
-        request (Request): HTTP запрос, содержащий токен обновления в cookies.
-        response (Response): HTTP ответ, в который будет установлен новый токен доступа в cookies.
+        request (Request): HTTP запрос, содержащий токены в cookies.
+        response (Response): HTTP ответ, в который будут установлены новые токены в cookies.
         session (AsyncSession): Асинхронная сессия базы данных.
 
     Returns:
-        auth_schemas.Token: Новый токен доступа и токен обновления (старый).
+        auth_schemas.Token: Действующие или новые токены доступа и обновления.
 
     Raises:
-        HTTPException: Если токен обновления отсутствует или недействителен.
+        HTTPException: Если токен обновления отсутствует, недействителен, отозван или уже использован.
     """
     # Получаем токен обновления из cookies
     refresh_token = request.cookies.get("refresh_token", None)
@@ -39,34 +49,40 @@ async def refresh_access_token(
     
     # Декодируем токен обновления
     payload = auth_service.decode_jwt_token(refresh_token)
-    user_id = int(payload.get("sub"))
+    if auth_service.token_type(payload) != auth_service.REFRESH_TOKEN:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized!")
+
+    # Текущий токен доступа еще свежий - ничего не подписываем и cookies не меняем
+    access_token = request.cookies.get("access_token", None)
+    if auth_service.access_token_is_fresh(access_token, payload):
+        metrics.AUTH_REFRESH.inc("fresh")
+        return auth_schemas.Token.model_construct(access_token=access_token, refresh_token=refresh_token)
 
-    # Создаем новый токен доступа
-    access_token = auth_service.create_access_token(user_id)
+    tokens = await auth_service.refresh_tokens(payload, session)
+    if tokens is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized!")
 
-    # Устанавливаем новый токен доступа в cookies
-    response.set_cookie("access_token", access_token)
+    # Устанавливаем новые токены в cookies
+    response.set_cookie("access_token", tokens.access_token)
+    response.set_cookie("refresh_token", tokens.refresh_token)
 
-    return auth_schemas.Token(access_token=access_token, refresh_token=refresh_token)
+    return tokens
 
 
-# Получение текущего авторизованного пользователя
-async def get_current_user(
-    request: Request, 
-    session: Annotated[AsyncSession, Depends(get_db_session)]
-) -> users_schemas.User:
+# Получение данных текущего токена доступа
+async def get_access_token_payload(request: Request) -> dict:
     """
-    Получает текущего авторизованного пользователя на основе токена доступа.
+    Проверяет токен доступа из cookies и возвращает его данные.
+    Отзыв проверяется по списку в памяти процесса без запроса к базе данных.
 
     Args:
         request (Request): HTTP запрос, содержащий токен доступа в cookies.
-        session (AsyncSession): Асинхронная сессия базы данных.
 
     Returns:
-        users_schemas.User: Данные авторизованного пользователя.
+        dict: Данные токена доступа.
 
     Raises:
-        HTTPException: Если токен доступа отсутствует, недействителен или пользователь не найден.
+        HTTPException: Если токен доступа отсутствует, недействителен, отозван или является токеном обновления.
     """
     # Получаем токен доступа из cookies
     token = request.cookies.get("access_token", None)
@@ -75,15 +91,131 @@ async def get_current_user(
     if token is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized!")
     
-    # Декодируем токен доступа
+    # Декодируем токен доступа; токен обновления вместо него не принимается
     payload = auth_service.decode_jwt_token(token)
+    if auth_service.token_type(payload) != auth_service.ACCESS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized!")
+
+    # Отозванный токен (выход из сессии или из всех сессий) не принимается
+    if revocations.is_revoked(payload):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked!")
+
+    return payload
+
+
+# Получение текущего авторизованного пользователя
+async def get_current_user(
+    payload: Annotated[dict, Depends(get_access_token_payload)],
+) -> users_schemas.User:
+    """
+    Получает текущего авторизованного пользователя на основе токена доступа.
+
+    В режиме SECURITY_STATELESS_AUTH пользователь собирается из данных токена
+    без запросов к базе данных. Токены без имени пользователя (выданные до
+    включения режима) проверяются через базу данных. Сессия базы данных
+    создается только для такой проверки, а не зависимостью маршрута.
+
+    Args:
+        payload (dict): Проверенные данные токена доступа.
+
+    Returns:
+        users_schemas.User: Данные авторизованного пользователя.
+
+    Raises:
+        HTTPException: Если пользователь не найден.
+    """
     user_id = int(payload.get("sub"))
+    username = payload.get("username")
+
+    # В режиме без состояния собираем пользователя прямо из токена (данные подписаны - без повторной проверки)
+    if settings.security.STATELESS_AUTH and username is not None:
+        return users_schemas.User.model_construct(id=user_id, username=username)
 
-    # Получаем пользователя по ID
-    user = await users_service.get_user_by_id(user_id, session)
+    # Получаем пользователя по ID (из кэша пользователей или из базы данных)
+    async with database.create_session() as session:
+        user = await users_service.get_user_by_id(user_id, session)
 
     # Если пользователь не найден, выбрасываем ошибку
     if user is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not found!")
 
-    return users_schemas.User(**user.__dict__)
+    # Данные из базы данных уже проверены - копируем только нужные поля без повторной проверки
+    return users_schemas.User.model_construct(id=user.id, username=user.username)
+
+
+# Ограничение частоты попыток входа
+async def limit_login_attempts(
+    request: Request,
+    form_data: Annotated[users_schemas.UserCreate, Depends()],
+) -> None:
+    """
+    Отклоняет попытку входа, если превышен лимит попыток для IP адреса или имени пользователя.
+    Выполняется до поиска пользователя и проверки пароля.
+
+    Args:
+        request (Request): HTTP запрос (IP адрес клиента).
+        form_data (users_schemas.UserCreate): Данные входа (имя пользователя).
+
+    Raises:
+        HTTPException: 429 с заголовком Retry-After, если лимит превышен.
+    """
+    limiter = ratelimit.login_limiter
+    if limiter is None:
+        return
+
+    ip = request.client.host if request.client is not None else None
+    retry_after = await limiter.check(ip, form_data.username)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts!",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+# Проверка токена доступа к массовому импорту пользователей
+async def require_import_token(x_import_token: Annotated[str, Header()] = "") -> None:
+    """
+    Проверяет заголовок X-Import-Token для служебных операций импорта.
+
+    Args:
+        x_import_token (str): Значение заголовка X-Import-Token.
+
+    Raises:
+        HTTPException: Если импорт через API отключен или токен неверный.
+    """
+    check_service_token(x_import_token, settings.security.IMPORT_TOKEN)
+
+
+# Проверка токена доступа к метрикам
+async def require_metrics_token(authorization: Annotated[str, Header()] = "") -> None:
+    """
+    Проверяет заголовок Authorization: Bearer для /metrics и /system/pool.
+
+    Args:
+        authorization (str): Значение заголовка Authorization.
+
+    Raises:
+        HTTPException: Если метрики отключены или токен неверный.
+    """
+    scheme, _, token = authorization.partition(" ")
+    check_service_token(token if scheme.lower() == "bearer" else "", settings.security.METRICS_TOKEN)
+
+
+def check_service_token(token: str, expected: str) -> None:
+    """
+    Сравнивает токен служебного маршрута с настройкой за постоянное время.
+
+    Args:
+        token (str): Предъявленный токен.
+        expected (str): Токен из настроек; пустой - маршрут отключен.
+
+    Raises:
+        HTTPException: 404, если маршрут отключен, 403, если токен неверный.
+    """
+    # Маршрут отключен, если токен не задан в настройках
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not secrets.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden!")
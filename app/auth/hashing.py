@@ -0,0 +1,280 @@
+import asyncio
+import functools
+import secrets
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable
+
+from app.core import settings
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+# Контекст хеширования: первая схема из настроек используется для новых хешей,
+# хеши остальных схем и хеши с другой стоимостью считаются устаревшими
+@functools.cache
+def get_context() -> "CryptContext":
+    """
+    Возвращает контекст хеширования passlib, создавая его при первом обращении.
+
+    passlib и бэкенды схем загружаются не при импорте, а при первом хешировании или
+    проверке пароля (в lifespan воркера, см. PasswordHasher.dummy_hash).
+
+    Returns:
+        CryptContext: Контекст хеширования.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=settings.hashing.SCHEMES,
+        deprecated="auto",
+        bcrypt__rounds=settings.hashing.BCRYPT_ROUNDS,
+        argon2__type="ID",
+        argon2__time_cost=settings.hashing.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.hashing.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.hashing.ARGON2_PARALLELISM,
+    )
+
+
+# Синхронное хеширование пароля (выполняется внутри пула воркеров)
+def hash_password_sync(password: str) -> str:
+    """
+    Захеширует пароль в текущем потоке.
+
+    Args:
+        password (str): Пароль пользователя.
+
+    Returns:
+        str: Захешированный пароль.
+    """
+    return get_context().hash(password)
+
+
+# Синхронное хеширование списка паролей (для массового импорта в пуле процессов)
+def hash_passwords_sync(passwords: list[str]) -> list[str]:
+    """
+    Захеширует список паролей в текущем процессе.
+
+    Args:
+        passwords (list[str]): Пароли пользователей.
+
+    Returns:
+        list[str]: Захешированные пароли в том же порядке.
+    """
+    context = get_context()
+    return [context.hash(password) for password in passwords]
+
+
+# Синхронная проверка пароля (выполняется внутри пула воркеров)
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    """
+    Сравнивает пароль с хешем в текущем потоке.
+
+    Args:
+        plain_password (str): Пароль, введенный пользователем.
+        hashed_password (str): Захешированный пароль, сохраненный в базе данных.
+
+    Returns:
+        bool: True, если пароли совпадают, иначе False.
+    """
+    return get_context().verify(plain_password, hashed_password)
+
+
+# Проверка, нужно ли перехешировать пароль
+def needs_update(hashed_password: str) -> bool:
+    """
+    Проверяет, устарел ли хеш (другая схема или стоимость). Хеширование не выполняется.
+
+    Args:
+        hashed_password (str): Захешированный пароль.
+
+    Returns:
+        bool: True, если хеш нужно пересчитать с текущими настройками.
+    """
+    return get_context().needs_update(hashed_password)
+
+
+class PasswordHasher:
+    """
+    Асинхронный движок хеширования паролей.
+
+    Выполняет bcrypt в пуле потоков или процессов, чтобы не блокировать цикл событий,
+    и ограничивает число одновременных операций семафором. Запросы сверх лимита
+    ждут в очереди, время ожидания учитывается в метриках.
+
+    Attributes:
+        pool_kind (str): Тип пула: "thread" или "process".
+        pool_size (int): Количество воркеров в пуле.
+        max_concurrency (int): Максимальное число одновременных операций.
+    """
+    def __init__(self, pool_kind: str, pool_size: int, max_concurrency: int = 0) -> None:
+        if pool_kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {pool_kind!r}")
+
+        self.pool_kind = pool_kind
+        self.pool_size = max(pool_size, 1)
+        self.max_concurrency = max_concurrency if max_concurrency > 0 else self.pool_size
+
+        self._executor: Executor | None = None  # Пул создается при первом обращении
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Хеш случайного пароля для проверки попыток входа несуществующих пользователей
+        self._dummy_hash: str | None = None
+
+        # Метрики очереди
+        self._dummy_verified = 0
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        """
+        Возвращает пул воркеров, создавая его при необходимости.
+
+        Returns:
+            Executor: Пул потоков или процессов.
+        """
+        if self._executor is None:
+            if self.pool_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.pool_size)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="hashing")
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполняет функцию в пуле с учетом лимита одновременных операций.
+
+        Args:
+            func (Callable): Синхронная функция для выполнения.
+            *args: Аргументы функции.
+
+        Returns:
+            Any: Результат функции.
+        """
+        queued_at = time.perf_counter()
+
+        # Ждем свободный слот, пока считаем себя в очереди
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        waited = time.perf_counter() - queued_at
+        self._wait_seconds_total += waited
+        self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._running -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """
+        Захеширует пароль в пуле воркеров.
+
+        Args:
+            password (str): Пароль пользователя.
+
+        Returns:
+            str: Захешированный пароль.
+        """
+        return await self._run(hash_password_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Проверяет пароль в пуле воркеров.
+
+        Args:
+            plain_password (str): Пароль, введенный пользователем.
+            hashed_password (str): Захешированный пароль.
+
+        Returns:
+            bool: True, если пароли совпадают, иначе False.
+        """
+        return await self._run(verify_password_sync, plain_password, hashed_password)
+
+    async def dummy_hash(self) -> str:
+        """
+        Возвращает хеш случайного пароля с текущей схемой и стоимостью, вычисляя его при первом обращении.
+
+        Returns:
+            str: Хеш, который не совпадает ни с одним паролем.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(32))
+        return self._dummy_hash
+
+    async def verify_dummy(self, plain_password: str) -> None:
+        """
+        Проверяет пароль по хешу случайного пароля.
+
+        Используется, когда пользователь не найден: ответ занимает столько же времени,
+        сколько неверный пароль существующего пользователя. Проверка проходит через
+        тот же лимит одновременных операций, что и обычные проверки.
+
+        Args:
+            plain_password (str): Пароль, введенный пользователем.
+        """
+        await self._run(verify_password_sync, plain_password, await self.dummy_hash())
+        self._dummy_verified += 1
+
+    async def warmup(self) -> None:
+        """
+        Создает пул воркеров и выполняет по одной проверке пароля в каждом воркере.
+
+        Потоки и процессы пула запускаются, а библиотека хеширования загружается до
+        первого запроса, поэтому первые входы в воркере не ждут их запуска. Прогрев
+        не проходит через лимит одновременных операций и не попадает в метрики очереди.
+        """
+        dummy_hash = await self.dummy_hash()
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        # Задачи отправляются одновременно: занятый воркер заставляет пул запустить следующий
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, verify_password_sync, "warmup", dummy_hash)
+            for _ in range(self.pool_size)
+        ))
+
+    def stats(self) -> dict:
+        """
+        Возвращает метрики пула хеширования.
+
+        Returns:
+            dict: Размер пула, лимит, число ожидающих и выполняемых операций, время ожидания.
+        """
+        return {
+            "pool_kind": self.pool_kind,
+            "pool_size": self.pool_size,
+            "max_concurrency": self.max_concurrency,
+            "waiting": self._waiting,
+            "running": self._running,
+            "completed": self._completed,
+            "dummy_verified": self._dummy_verified,
+            "wait_seconds_total": self._wait_seconds_total,
+            "wait_seconds_max": self._wait_seconds_max,
+        }
+
+    def shutdown(self) -> None:
+        """
+        Останавливает пул воркеров. При следующем обращении пул будет создан заново.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Создание движка хеширования на основе настроек
+hasher = PasswordHasher(
+    pool_kind=settings.hashing.POOL_KIND,
+    pool_size=settings.hashing.POOL_SIZE,
+    max_concurrency=settings.hashing.MAX_CONCURRENCY,
+)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.core import Base
+
+
+class RefreshTokens(Base):
+    __tablename__ = "refresh_tokens"
+    jti = Column(String, primary_key=True)  # Идентификатор токена из claim "jti"
+    family_id = Column(String, nullable=False, index=True)  # Цепочка ротаций от одного входа
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    used_at = Column(DateTime(timezone=True), nullable=True)  # Токен обменян на новый
+    revoked_at = Column(DateTime(timezone=True), nullable=True)  # Цепочка отозвана
+
+
+class TokenRevocations(Base):
+    __tablename__ = "token_revocations"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    jti = Column(String, nullable=True)  # Отозванный токен доступа (None - отзыв всех токенов пользователя)
+    revoked_before = Column(DateTime(timezone=True), nullable=True)  # Токены, выданные раньше, недействительны
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Окно подгрузки в память
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # После этого запись не нужна
@@ -0,0 +1,215 @@
+import time
+
+from loguru import logger
+
+from app.core import settings, metrics
+from app.core.cache import LRUCache
+
+
+class RateLimitBackend:
+    """
+    Интерфейс хранилища корзин токенов.
+    """
+    async def hit(self, key: str, capacity: int, rate: float) -> float:
+        """
+        Забирает из корзины одну попытку.
+
+        Args:
+            key (str): Ключ корзины.
+            capacity (int): Емкость корзины (попыток подряд).
+            rate (float): Скорость пополнения в попытках в секунду.
+
+        Returns:
+            float: 0, если попытка разрешена, иначе через сколько секунд можно повторить.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Корзины токенов в памяти процесса.
+
+    Корзина хранится, пока не наполнится заново (время жизни записи), поэтому
+    отсутствующая запись означает полную корзину. Число корзин ограничено, давно
+    не использованные вытесняются.
+
+    Args:
+        maxsize (int): Максимальное количество корзин.
+    """
+    def __init__(self, maxsize: int) -> None:
+        self._buckets = LRUCache(maxsize=maxsize, ttl=float("inf"))
+
+    async def hit(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        if state is None:
+            tokens = float(capacity)
+        else:
+            tokens, updated = state
+            tokens = min(capacity, tokens + (now - updated) * rate)
+
+        if tokens < 1:
+            return (1 - tokens) / rate
+
+        tokens -= 1
+        self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / rate)
+        return 0.0
+
+    def stats(self) -> dict:
+        return self._buckets.stats()
+
+
+# Корзина токенов в Redis: атомарно и по часам Redis, чтобы воркеры не расходились во времени
+_REDIS_HIT_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + (now - tonumber(state[2])) * rate)
+end
+
+if tokens < 1 then
+    return tostring((1 - tokens) / rate)
+end
+
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000))
+return '0'
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Общие для всех воркеров корзины токенов в Redis.
+
+    Требует установленного пакета redis. Ключи истекают после наполнения корзины.
+    Ошибки Redis не блокируют вход: попытка разрешается, ошибка логируется.
+
+    Args:
+        url (str): URL подключения к Redis.
+        prefix (str): Префикс ключей.
+    """
+    def __init__(self, url: str, prefix: str = "ratelimit:") -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("Redis rate limit backend requires the 'redis' package") from exc
+
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_HIT_SCRIPT)
+        self._prefix = prefix
+        self.errors = 0
+
+    async def hit(self, key: str, capacity: int, rate: float) -> float:
+        try:
+            return float(await self._script(keys=[self._prefix + key], args=[capacity, rate]))
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("Redis rate limit check failed: {}", exc)
+            return 0.0
+
+    def stats(self) -> dict:
+        return {"errors": self.errors}
+
+
+class LoginRateLimiter:
+    """
+    Ограничение частоты попыток входа по IP адресу и по имени пользователя.
+
+    Проверяется до поиска пользователя и проверки пароля, поэтому отклоненная попытка
+    не занимает пул хеширования. Попытка, отклоненная по IP адресу, не расходует
+    корзину имени пользователя, чтобы перебор с одного адреса не блокировал вход
+    владельцу учетной записи.
+
+    Args:
+        backend (RateLimitBackend): Хранилище корзин.
+        ip_burst (int): Попыток подряд с одного IP адреса.
+        ip_per_minute (float): Попыток в минуту с одного IP адреса.
+        username_burst (int): Попыток подряд для одного имени пользователя.
+        username_per_minute (float): Попыток в минуту для одного имени пользователя.
+
+    Raises:
+        ValueError: Если скорость пополнения не положительна (корзина никогда не наполнится).
+    """
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_burst: int,
+        ip_per_minute: float,
+        username_burst: int,
+        username_per_minute: float,
+    ) -> None:
+        if ip_per_minute <= 0 or username_per_minute <= 0:
+            raise ValueError("Rate limit refill rate must be greater than 0")
+
+        self.backend = backend
+        self.ip_burst = ip_burst
+        self.ip_rate = ip_per_minute / 60
+        self.username_burst = username_burst
+        self.username_rate = username_per_minute / 60
+
+    async def check(self, ip: str | None, username: str) -> float:
+        """
+        Учитывает попытку входа.
+
+        Args:
+            ip (str | None): IP адрес клиента.
+            username (str): Имя пользователя из запроса.
+
+        Returns:
+            float: 0, если попытка разрешена, иначе через сколько секунд можно повторить.
+        """
+        if ip is not None:
+            retry_after = await self.backend.hit(f"ip:{ip}", self.ip_burst, self.ip_rate)
+            if retry_after > 0:
+                metrics.AUTH_RATE_LIMITED.inc("ip")
+                return retry_after
+
+        retry_after = await self.backend.hit(f"username:{username.lower()}", self.username_burst, self.username_rate)
+        if retry_after > 0:
+            metrics.AUTH_RATE_LIMITED.inc("username")
+        return retry_after
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+# Создание ограничителя на основе настроек
+def create_limiter() -> LoginRateLimiter | None:
+    """
+    Создает ограничитель попыток входа по настройкам RATE_LIMIT_*.
+
+    Returns:
+        LoginRateLimiter | None: Ограничитель или None, если ограничение отключено.
+    """
+    config = settings.rate_limit
+    if not config.ENABLED:
+        return None
+
+    if config.BACKEND == "memory":
+        backend = MemoryRateLimitBackend(maxsize=config.SIZE)
+    elif config.BACKEND == "redis":
+        backend = RedisRateLimitBackend(settings.cache.REDIS_URL)
+    else:
+        raise ValueError(f"Unknown rate limit backend: {config.BACKEND!r}")
+
+    return LoginRateLimiter(
+        backend,
+        ip_burst=config.IP_BURST,
+        ip_per_minute=config.IP_PER_MINUTE,
+        username_burst=config.USERNAME_BURST,
+        username_per_minute=config.USERNAME_PER_MINUTE,
+    )
+
+
+login_limiter = create_limiter()
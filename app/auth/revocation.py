@@ -0,0 +1,215 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import settings, database, metrics
+from app.auth import models as auth_models
+
+
+def _epoch(value: datetime) -> float:
+    # SQLite возвращает время без часового пояса - оно записывалось в UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationList:
+    """
+    Копия списка отозванных токенов доступа в памяти процесса.
+
+    Источник истины - таблица token_revocations. Проверка токена выполняется по двум
+    словарям (отозванные jti и время отзыва всех токенов пользователя) без запросов
+    к базе данных. Фоновая задача подгружает только новые записи (созданные после
+    предыдущей подгрузки с перекрытием lag), поэтому отзыв в другом воркере
+    применяется не позже чем через interval секунд. Отзыв в текущем воркере
+    применяется сразу.
+
+    Args:
+        interval (float): Период подгрузки новых записей в секундах.
+        lag (float): Перекрытие окон подгрузки в секундах.
+        access_ttl (float): Время жизни токена доступа в секундах.
+    """
+    def __init__(self, interval: float, lag: float, access_ttl: float) -> None:
+        self.interval = interval
+        self.lag = lag
+        self.access_ttl = access_ttl
+
+        self._jtis: dict[str, float] = {}  # jti -> время истечения токена
+        self._cutoffs: dict[int, float] = {}  # ID пользователя -> токены, выданные раньше, отозваны
+        self._watermark = 0.0  # Начало последней успешной подгрузки
+        self._task: asyncio.Task | None = None
+
+        # Счетчики для метрик
+        self.syncs = 0
+        self.errors = 0
+
+    def is_revoked(self, payload: dict) -> bool:
+        """
+        Проверяет, отозван ли токен доступа.
+
+        Args:
+            payload (dict): Проверенные данные токена (sub, jti, iat).
+
+        Returns:
+            bool: True, если токен отозван.
+        """
+        jti = payload.get("jti")
+        if jti is not None and jti in self._jtis:
+            return True
+
+        cutoff = self._cutoffs.get(int(payload["sub"]))
+        # Токены без iat выданы до появления отзыва и отзываются вместе со всеми
+        return cutoff is not None and payload.get("iat", 0) < cutoff
+
+    def _apply(self, user_id: int, jti: str | None, revoked_before: float | None, expires_at: float) -> None:
+        if jti is not None:
+            self._jtis[jti] = expires_at
+        elif revoked_before is not None and revoked_before > self._cutoffs.get(user_id, 0):
+            self._cutoffs[user_id] = revoked_before
+
+    def _prune(self, now: float) -> None:
+        # Записи об истекших токенах больше ничего не отклоняют
+        self._jtis = {jti: expires_at for jti, expires_at in self._jtis.items() if expires_at > now}
+        self._cutoffs = {
+            user_id: cutoff for user_id, cutoff in self._cutoffs.items() if cutoff + self.access_ttl > now
+        }
+
+    async def revoke_token(self, payload: dict, session: AsyncSession) -> None:
+        """
+        Отзывает один токен доступа.
+
+        Args:
+            payload (dict): Данные отзываемого токена.
+            session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+        """
+        jti = payload.get("jti")
+        if jti is None:
+            return  # Токен без идентификатора отзывается только вместе со всеми токенами пользователя
+
+        user_id = int(payload["sub"])
+        expires_at = float(payload.get("exp", time.time() + self.access_ttl))
+        session.add(auth_models.TokenRevocations(
+            user_id=user_id,
+            jti=jti,
+            created_at=datetime.now(timezone.utc),
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+        ))
+        with metrics.DB_QUERY_SECONDS.time("revoke_token"):
+            await session.flush()
+        self._apply(user_id, jti, None, expires_at)
+
+    async def revoke_user(self, user_id: int, session: AsyncSession) -> None:
+        """
+        Отзывает все токены доступа пользователя, выданные до текущего момента.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+        """
+        now = datetime.now(timezone.utc)
+        session.add(auth_models.TokenRevocations(
+            user_id=user_id,
+            revoked_before=now,
+            created_at=now,
+            expires_at=now + timedelta(seconds=self.access_ttl),
+        ))
+        with metrics.DB_QUERY_SECONDS.time("revoke_user"):
+            await session.flush()
+        self._apply(user_id, None, now.timestamp(), now.timestamp() + self.access_ttl)
+
+    async def sync(self, session: AsyncSession) -> int:
+        """
+        Подгружает записи, созданные после предыдущей подгрузки, и удаляет из памяти истекшие.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+
+        Returns:
+            int: Количество подгруженных записей.
+        """
+        started = time.time()
+        model = auth_models.TokenRevocations
+        statement = (
+            select(model.user_id, model.jti, model.revoked_before, model.expires_at)
+            .where(model.created_at >= datetime.fromtimestamp(max(self._watermark - self.lag, 0), timezone.utc))
+            .where(model.expires_at > datetime.fromtimestamp(started, timezone.utc))
+        )
+        with metrics.DB_QUERY_SECONDS.time("sync_revocations"):
+            rows = (await session.execute(statement)).all()
+
+        for user_id, jti, revoked_before, expires_at in rows:
+            self._apply(user_id, jti, _epoch(revoked_before) if revoked_before else None, _epoch(expires_at))
+
+        self._prune(started)
+        self._watermark = started
+        self.syncs += 1
+        return len(rows)
+
+    async def _sync_once(self) -> None:
+        try:
+            async with database.create_session() as session:
+                await self.sync(session)
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("Token revocation sync failed: {}", exc)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._sync_once()
+
+    async def start(self) -> None:
+        """
+        Загружает действующие отзывы и запускает фоновую подгрузку.
+        """
+        await self._sync_once()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую подгрузку.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "jtis": len(self._jtis),
+            "cutoffs": len(self._cutoffs),
+            "syncs": self.syncs,
+            "errors": self.errors,
+            "staleness_seconds": time.time() - self._watermark if self._watermark else 0.0,
+        }
+
+
+# Удаление истекших записей об отзыве
+async def purge_revocations(session: AsyncSession) -> int:
+    """
+    Удаляет записи об отзыве, которые относятся только к истекшим токенам.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+
+    Returns:
+        int: Количество удаленных записей.
+    """
+    model = auth_models.TokenRevocations
+    result = await session.execute(delete(model).where(model.expires_at < datetime.now(timezone.utc)))
+    return result.rowcount
+
+
+revocations = RevocationList(
+    interval=settings.security.REVOCATION_SYNC_INTERVAL,
+    lag=settings.security.REVOCATION_SYNC_LAG,
+    access_ttl=settings.security.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
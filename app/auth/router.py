@@ -1,10 +1,11 @@
 from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, status, Form, Depends, Response, Request
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Form, Depends, Response, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core import get_db_session
+from app.core import settings, get_db_session
+from app.core.responses import ModelResponse
 from app.auth import schemas as auth_schemas
 from app.auth import service as auth_service
 from app.auth import dependencies as auth_depends
@@ -15,16 +16,20 @@ from app.users import schemas as users_schemas
 # Создаем роутер с префиксом "/auth" для всех маршрутов, связанных с авторизацией и регистрацией
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Роутер для общеизвестных адресов (открытые ключи для проверки токенов другими сервисами)
+well_known_router = APIRouter(prefix="/.well-known", tags=["auth"])
+
 # OAuth2 схема для обработки токенов доступа
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/authorization")
 
 
-# Маршрут для авторизации пользователя
-@router.post('/authorization')
+# Маршрут для авторизации пользователя (попытки ограничиваются до проверки пароля)
+@router.post('/authorization', response_model=auth_schemas.Token, dependencies=[Depends(auth_depends.limit_login_attempts)])
 async def authorization(
     form_data: Annotated[users_schemas.UserCreate, Depends()],
     response: Response,
-    session: Annotated[AsyncSession, Depends(get_db_session)]
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    background_tasks: BackgroundTasks,
     ):
     """
     Авторизует пользователя на основе предоставленных данных и возвращает токены.
@@ -33,11 +38,13 @@ async def authorization(
         form_data (users_schemas.UserCreate): Данные пользователя (имя и пароль).
         response (Response): Ответ для установки токенов в cookies.
         session (AsyncSession): Сессия базы данных.
+        background_tasks (BackgroundTasks): Фоновые задачи (перехеширование устаревшего пароля).
 
     Returns:
-        auth_schemas.Token: Токены доступа и обновления.
+        ModelResponse: Токены доступа и обновления (auth_schemas.Token) с cookies.
     """
-    return await auth_service.authorization(form_data, response, session)
+    tokens = await auth_service.authorization(form_data, response, session, background_tasks)
+    return ModelResponse(tokens, cookies_from=response)
 
 
 # Маршрут для регистрации нового пользователя
@@ -56,21 +63,100 @@ async def registration(
         session (AsyncSession): Сессия базы данных.
 
     Returns:
-        auth_schemas.Token: Токены доступа и обновления.
+        ModelResponse: Токены доступа и обновления (auth_schemas.Token) с cookies.
     """
-    return await auth_service.registration(form_data, response, session)
+    tokens = await auth_service.registration(form_data, response, session)
+    return ModelResponse(tokens, cookies_from=response)
 
 
 # Маршрут для обновления токена доступа
 @router.post('/refresh', status_code=status.HTTP_200_OK, response_model=auth_schemas.Token)
-async def refresh(tokens: Annotated[auth_schemas.Token, Depends(auth_depends.refresh_access_token)]):
+async def refresh(
+    tokens: Annotated[auth_schemas.Token, Depends(auth_depends.refresh_access_token)],
+    response: Response,
+    ):
+    """
+    Обновляет токен доступа и выдает новый токен обновления взамен предъявленного.
+    Пока текущий токен доступа свежий, возвращает действующие токены без Set-Cookie.
+
+    Args:
+        tokens (auth_schemas.Token): Действующие или новые токены доступа и обновления.
+        response (Response): Ответ, в который зависимость записала токены как cookie.
+
+    Returns:
+        ModelResponse: Токены доступа и обновления (auth_schemas.Token) с cookies, если они новые.
+    """
+    return ModelResponse(tokens, cookies_from=response)
+
+
+# Маршрут для выхода из текущей сессии
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: Request,
+    payload: Annotated[dict, Depends(auth_depends.get_access_token_payload)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    ):
+    """
+    Отзывает текущий токен доступа и цепочку токена обновления, удаляет cookies.
+
+    Args:
+        request (Request): Запрос с токеном обновления в cookies.
+        payload (dict): Данные текущего токена доступа.
+        session (AsyncSession): Сессия базы данных.
+
+    Returns:
+        Response: Пустой ответ.
+    """
+    async with session.begin():
+        await auth_service.logout(payload, request.cookies.get("refresh_token"), session)
+
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    response.delete_cookie("access_token")
+    response.delete_cookie("refresh_token")
+    return response
+
+
+# Маршрут для выхода из всех сессий пользователя
+@router.post('/logout-all', status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all(
+    payload: Annotated[dict, Depends(auth_depends.get_access_token_payload)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    ):
+    """
+    Отзывает все токены доступа и обновления пользователя на всех устройствах, удаляет cookies.
+
+    Args:
+        payload (dict): Данные текущего токена доступа.
+        session (AsyncSession): Сессия базы данных.
+
+    Returns:
+        Response: Пустой ответ.
+    """
+    async with session.begin():
+        await auth_service.logout_all(int(payload["sub"]), session)
+
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    response.delete_cookie("access_token")
+    response.delete_cookie("refresh_token")
+    return response
+
+
+# Маршрут для получения открытых ключей проверки токенов
+@well_known_router.get('/jwks.json')
+async def jwks(request: Request):
     """
-    Обновляет токен доступа на основе предоставленного токена обновления.
+    Возвращает открытые ключи в формате JWKS для локальной проверки токенов другими сервисами.
+    Документ сериализуется один раз; клиенты кэшируют его по Cache-Control и ETag.
+    При алгоритмах HS* (по умолчанию HS256) набор ключей пуст.
 
     Args:
-        tokens (auth_schemas.Token): Токен обновления и новый токен доступа.
+        request (Request): Запрос (заголовок If-None-Match).
 
     Returns:
-        auth_schemas.Token: Новый токен доступа и старый токен обновления.
+        Response: JWKS документ или 304, если он не изменился.
     """
-    return tokens
+    body, etag = auth_service.jwks_document()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.security.JWKS_MAX_AGE}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
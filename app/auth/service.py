@@ -1,28 +1,65 @@
+import functools
+import hashlib
+import json
+import secrets
+import time
 from datetime import timezone, timedelta, datetime
 
-from passlib.context import CryptContext
+from loguru import logger
+from sqlalchemy import update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import JWTError, jwt
-from fastapi import Response, HTTPException, status
+from fastapi import BackgroundTasks, Response, HTTPException, status
 
 from app.core import settings
+from app.core import metrics
+from app.core.cache import LRUCache, SingleFlight
+from app.auth import hashing
+from app.auth import tokens
+from app.auth import models as auth_models
+from app.auth.revocation import revocations
 from app.auth import schemas as auth_schemas
 from app.users import schemas as users_schemas
 from app.users import service as users_service
+from app.users.cache import user_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Кэш проверенных токенов: хеш токена -> декодированные данные
+token_cache = LRUCache(maxsize=settings.cache.TOKEN_CACHE_SIZE, ttl=settings.cache.TOKEN_CACHE_TTL)
+
+# Отозванные цепочки токенов обновления: повторные попытки отклоняются без запроса к базе данных
+revoked_families = LRUCache(
+    maxsize=settings.cache.REVOKED_FAMILY_CACHE_SIZE,
+    ttl=settings.security.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+)
+
+# Недавние обмены токенов обновления: jti обмененного токена -> выданные вместо него токены
+recent_refreshes = LRUCache(
+    maxsize=settings.cache.RECENT_REFRESH_CACHE_SIZE,
+    ttl=settings.security.REFRESH_REUSE_GRACE,
+)
+
+# Одновременные обмены одного токена обновления выполняются один раз
+refresh_flights = SingleFlight()
 
 
 # Авторизация пользователя
 # Эта функция принимает данные аутентификации пользователя, проверяет их корректность и выдает токены доступа и обновления.
-async def authorization(form_data: auth_schemas.UserAuth, response: Response, session: AsyncSession) -> auth_schemas.Token:
+async def authorization(
+    form_data: auth_schemas.UserAuth,
+    response: Response,
+    session: AsyncSession,
+    background_tasks: BackgroundTasks | None = None,
+) -> auth_schemas.Token:
     """
     Авторизует пользователя на основе предоставленных учетных данных.
+    Для несуществующего пользователя пароль проверяется по хешу случайного пароля, чтобы
+    по времени ответа нельзя было определить, существует ли имя пользователя.
+    Если хеш пароля устарел (другая схема или стоимость), он пересчитывается в фоне после ответа.
 
     Args:
         form_data (auth_schemas.UserAuth): Данные аутентификации (имя пользователя и пароль).
         response (Response): Ответ, в который записываются токены как cookie.
         session (AsyncSession): Асинхронная сессия базы данных.
+        background_tasks (BackgroundTasks | None): Фоновые задачи запроса для перехеширования пароля.
 
     Returns:
         auth_schemas.Token: Токены доступа и обновления для авторизованного пользователя.
@@ -34,19 +71,32 @@ async def authorization(form_data: auth_schemas.UserAuth, response: Response, se
         # Ищем пользователя по имени пользователя
         user = await users_service.get_user_by_username(form_data.username, session)
 
-        # Если пользователь не найден или пароль неверный, выбрасываем исключение
-        if user is None or not verify_password(form_data.password, user.hashed_password):
+        # Если пользователь не найден, тратим на ответ столько же, сколько на неверный пароль
+        if user is None:
+            await verify_dummy_password(form_data.password)
+            metrics.AUTH_LOGIN_ATTEMPTS.inc("unknown_user")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid username or password!")
+
+        # Если пароль неверный, выбрасываем исключение
+        if not await verify_password(form_data.password, user.hashed_password):
+            metrics.AUTH_LOGIN_ATTEMPTS.inc("wrong_password")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid username or password!")
 
+        metrics.AUTH_LOGIN_ATTEMPTS.inc("success")
+
+        # Перехешируем устаревший хеш в фоне, не задерживая ответ
+        if background_tasks is not None and settings.hashing.REHASH_ON_LOGIN and hashing.needs_update(user.hashed_password):
+            background_tasks.add_task(users_service.rehash_password, user, form_data.password)
+
         # Создаем токены доступа и обновления
-        access_token = create_access_token(user.id)
-        refresh_token = create_refresh_token(user.id)
+        access_token = create_access_token(user.id, user.username)
+        refresh_token = await issue_refresh_token(user.id, user.username, session)
         
         # Устанавливаем токены в cookies
         response.set_cookie("access_token", access_token)
         response.set_cookie("refresh_token", refresh_token)
 
-        return auth_schemas.Token(access_token=access_token, refresh_token=refresh_token)
+        return auth_schemas.Token.model_construct(access_token=access_token, refresh_token=refresh_token)
 
 
 # Регистрация пользователя
@@ -68,23 +118,52 @@ async def registration(form_data: users_schemas.UserCreate, response: Response,
         new_user = await users_service.create_user(form_data, session)
 
         # Создаем токены доступа и обновления
-        access_token = create_access_token(new_user.id)
-        refresh_token = create_refresh_token(new_user.id)
-        
-        # Устанавливаем токены в cookies
-        response.set_cookie("access_token", access_token)
-        response.set_cookie("refresh_token", refresh_token)
+        access_token = create_access_token(new_user.id, new_user.username)
+        refresh_token = await issue_refresh_token(new_user.id, new_user.username, session)
+
+    # Сбрасываем отрицательную запись кэша для нового имени после фиксации транзакции,
+    # чтобы параллельный поиск не закэшировал отсутствие уже созданного пользователя
+    await user_cache.invalidate(user_id=new_user.id, username=new_user.username)
+
+    # Устанавливаем токены в cookies
+    response.set_cookie("access_token", access_token)
+    response.set_cookie("refresh_token", refresh_token)
+
+    return auth_schemas.Token.model_construct(access_token=access_token, refresh_token=refresh_token)
+
 
-        return auth_schemas.Token(access_token=access_token, refresh_token=refresh_token)
+# Типы токенов (claim "typ"): токен обновления не принимается вместо токена доступа и наоборот
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+
+def token_type(payload: dict) -> str:
+    """
+    Определяет тип токена по его данным.
+    У токенов, выданных до появления claim "typ", тип определяется по составу данных:
+    токен доступа содержит "iat", токен обновления - нет.
+
+    Args:
+        payload (dict): Проверенные данные токена.
+
+    Returns:
+        str: ACCESS_TOKEN или REFRESH_TOKEN.
+    """
+    typ = payload.get("typ")
+    if typ is not None:
+        return typ
+    return ACCESS_TOKEN if "iat" in payload and "fam" not in payload else REFRESH_TOKEN
 
 
 # Создание токена доступа
-def create_access_token(user_id: int) -> str:
+def create_access_token(user_id: int, username: str | None = None) -> str:
     """
     Создает токен доступа с определенным временем истечения.
 
     Args:
         user_id (int): Идентификатор пользователя, для которого создается токен.
+        username (str | None): Имя пользователя. Если передано, сохраняется в токене,
+            чтобы текущего пользователя можно было собрать без запроса к базе данных.
 
     Returns:
         str: Токен доступа, закодированный с помощью JWT.
@@ -93,44 +172,322 @@ def create_access_token(user_id: int) -> str:
     now = datetime.now(timezone.utc)
     expire = now + timedelta(minutes=settings.security.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    # Данные токена, включающие идентификатор пользователя и время истечения
+    # Данные токена, включающие идентификатор пользователя, время истечения и данные для отзыва
     token_payload = {
         "sub": str(user_id),
-        "exp": expire,
+        "typ": ACCESS_TOKEN,
+        "exp": int(expire.timestamp()),
+        "iat": round(now.timestamp(), 3),  # Миллисекунды: отзыв всех токенов не задевает выданные сразу после него
+        "jti": secrets.token_hex(16),
     }
+    if username is not None:
+        token_payload["username"] = username
 
-    return jwt.encode(
-        token_payload, 
-        settings.security.SECRET_KEY, 
-        algorithm=settings.security.ALGORITHM
-    )
+    with metrics.AUTH_OPERATION_SECONDS.time("jwt_encode"):
+        return tokens.codec.encode(token_payload)
 
 
 # Создание токена обновления
-def create_refresh_token(user_id: int) -> str:
+def create_refresh_token(
+    user_id: int,
+    username: str | None = None,
+    jti: str | None = None,
+    family_id: str | None = None,
+    expire: datetime | None = None,
+) -> str:
     """
     Создает токен обновления с длительным временем истечения.
+    Токен принимается маршрутом /auth/refresh, только если он сохранен через issue_refresh_token.
 
     Args:
         user_id (int): Идентификатор пользователя, для которого создается токен.
+        username (str | None): Имя пользователя, которое перейдет в обновленные токены доступа.
+        jti (str | None): Идентификатор токена в хранилище токенов обновления.
+        family_id (str | None): Идентификатор цепочки ротаций.
+        expire (datetime | None): Время истечения (по умолчанию через SECURITY_REFRESH_TOKEN_EXPIRE_DAYS).
 
     Returns:
         str: Токен обновления, закодированный с помощью JWT.
     """
     # Получаем текушее время и дату окончания токена
-    now = datetime.now(timezone.utc)
-    expire = now + timedelta(days=settings.security.REFRESH_TOKEN_EXPIRE_DAYS)
+    if expire is None:
+        expire = datetime.now(timezone.utc) + timedelta(days=settings.security.REFRESH_TOKEN_EXPIRE_DAYS)
 
     token_payload = {
         "sub": str(user_id),
-        "exp": expire,
+        "typ": REFRESH_TOKEN,
+        "exp": int(expire.timestamp()),
     }
+    if username is not None:
+        token_payload["username"] = username
+    if jti is not None:
+        token_payload["jti"] = jti
+    if family_id is not None:
+        token_payload["fam"] = family_id
+
+    with metrics.AUTH_OPERATION_SECONDS.time("jwt_encode"):
+        return tokens.codec.encode(token_payload)
+
+
+# Выдача токена обновления с сохранением в хранилище
+async def issue_refresh_token(
+    user_id: int,
+    username: str | None,
+    session: AsyncSession,
+    family_id: str | None = None,
+) -> str:
+    """
+    Создает токен обновления и сохраняет его идентификатор в текущей транзакции.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        username (str | None): Имя пользователя.
+        session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+        family_id (str | None): Цепочка ротаций (None - новая цепочка, например при входе).
+
+    Returns:
+        str: Токен обновления.
+    """
+    jti = secrets.token_hex(16)
+    family_id = family_id or jti
+    expire = datetime.now(timezone.utc) + timedelta(days=settings.security.REFRESH_TOKEN_EXPIRE_DAYS)
+
+    session.add(auth_models.RefreshTokens(jti=jti, family_id=family_id, user_id=user_id, expires_at=expire))
+    with metrics.DB_QUERY_SECONDS.time("issue_refresh_token"):
+        await session.flush()
+
+    return create_refresh_token(user_id, username, jti=jti, family_id=family_id, expire=expire)
+
+
+# Ротация токена обновления
+async def rotate_refresh_token(payload: dict, session: AsyncSession) -> str | None:
+    """
+    Обменивает токен обновления на новый из той же цепочки.
+
+    Токен помечается использованным одним условным UPDATE, поэтому из двух одновременных
+    обменов успешен только один. Повторное предъявление использованного (или неизвестного)
+    токена считается кражей: вся цепочка отзывается, и ее токены далее отклоняются
+    без запроса к базе данных через кэш отозванных цепочек.
+
+    Args:
+        payload (dict): Проверенные данные токена обновления.
+        session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+
+    Returns:
+        str | None: Новый токен обновления или None, если токен отклонен.
+    """
+    jti, family_id = payload.get("jti"), payload.get("fam")
+
+    # Токены без идентификатора выданы до появления хранилища и не принимаются
+    if jti is None or family_id is None:
+        return None
+
+    # Цепочка уже отозвана в этом процессе
+    if revoked_families.get(family_id) is not None:
+        return None
+
+    now = datetime.now(timezone.utc)
+    statement = (
+        update(auth_models.RefreshTokens)
+        .where(auth_models.RefreshTokens.jti == jti)
+        .where(auth_models.RefreshTokens.used_at.is_(None))
+        .where(auth_models.RefreshTokens.revoked_at.is_(None))
+        .values(used_at=now)
+        .returning(auth_models.RefreshTokens.user_id)
+    )
+    with metrics.DB_QUERY_SECONDS.time("rotate_refresh_token"):
+        user_id = (await session.execute(statement)).scalar_one_or_none()
+
+    if user_id is None:
+        await revoke_refresh_family(family_id, session)
+        logger.warning("Used or revoked refresh token presented, family {} revoked", family_id)
+        return None
+
+    return await issue_refresh_token(user_id, payload.get("username"), session, family_id)
+
+
+# Проверка, нужно ли выдавать новый токен доступа
+def access_token_is_fresh(access_token: str | None, refresh_payload: dict) -> bool:
+    """
+    Проверяет, может ли клиент продолжать пользоваться текущим токеном доступа.
+
+    Токен считается свежим, если он действителен, не отозван, выдан тому же пользователю,
+    что и токен обновления, прожил меньше доли SECURITY_REFRESH_REISSUE_AFTER своего
+    времени жизни и до истечения осталось не меньше SECURITY_REFRESH_MIN_REMAINING секунд.
+    Проверка не обращается к базе данных.
+
+    Args:
+        access_token (str | None): Токен доступа из cookies.
+        refresh_payload (dict): Проверенные данные токена обновления.
+
+    Returns:
+        bool: True, если новый токен доступа выдавать не нужно.
+    """
+    if access_token is None or refresh_payload.get("fam") is None:
+        return False
+    if revoked_families.get(refresh_payload["fam"]) is not None:
+        return False
+
+    try:
+        payload = decode_jwt_token(access_token)
+    except HTTPException:
+        return False
+
+    # Токен обновления в cookie токена доступа не продлевает сам себя
+    if (
+        token_type(payload) != ACCESS_TOKEN
+        or payload.get("sub") != refresh_payload.get("sub")
+        or revocations.is_revoked(payload)
+    ):
+        return False
+
+    issued_at, expires_at = payload.get("iat"), payload.get("exp")
+    if issued_at is None or expires_at is None:
+        return False
+
+    now = time.time()
+    lifetime = expires_at - issued_at
+    return (
+        expires_at - now >= settings.security.REFRESH_MIN_REMAINING
+        and now - issued_at < lifetime * settings.security.REFRESH_REISSUE_AFTER
+    )
+
+
+# Обмен токена обновления на новые токены
+async def refresh_tokens(payload: dict, session: AsyncSession) -> auth_schemas.Token | None:
+    """
+    Выдает новые токены доступа и обновления вместо предъявленного токена обновления.
+
+    Одновременные запросы с одним токеном (несколько вкладок, повтор запроса клиентом)
+    объединяются: ротацию выполняет первый запрос, остальные получают его результат.
+    Запрос, пришедший в течение SECURITY_REFRESH_REUSE_GRACE секунд после ротации, тоже
+    получает уже выданные токены вместо отзыва цепочки. Это работает в пределах воркера;
+    повтор после окна или в другом воркере по-прежнему отзывает цепочку.
+
+    Args:
+        payload (dict): Проверенные данные токена обновления.
+        session (AsyncSession): Асинхронная сессия базы данных без открытой транзакции.
+
+    Returns:
+        auth_schemas.Token | None: Новые токены или None, если токен отклонен.
+    """
+    jti = payload.get("jti")
+    if jti is None:
+        metrics.AUTH_REFRESH.inc("rejected")
+        return None
+
+    # Токен только что обменян в этом воркере - отдаем тот же результат, если цепочка не отозвана
+    recent = recent_refreshes.get(jti)
+    if recent is not None and revoked_families.get(payload.get("fam")) is None:
+        metrics.AUTH_REFRESH.inc("coalesced")
+        return recent
+
+    leader = False
+
+    async def rotate() -> auth_schemas.Token | None:
+        nonlocal leader
+        leader = True
+
+        # Обмениваем токен обновления на новый (отзыв цепочки фиксируется и при отказе)
+        async with session.begin():
+            refresh_token = await rotate_refresh_token(payload, session)
+        if refresh_token is None:
+            return None
+
+        tokens = auth_schemas.Token.model_construct(
+            access_token=create_access_token(int(payload["sub"]), payload.get("username")),
+            refresh_token=refresh_token,
+        )
+        recent_refreshes.set(jti, tokens)
+        return tokens
+
+    tokens = await refresh_flights.do(jti, rotate)
+    if tokens is None:
+        metrics.AUTH_REFRESH.inc("rejected")
+    else:
+        metrics.AUTH_REFRESH.inc("rotated" if leader else "coalesced")
+    return tokens
+
+
+# Отзыв цепочки токенов обновления
+async def revoke_refresh_family(family_id: str, session: AsyncSession) -> None:
+    """
+    Отзывает все токены цепочки ротаций.
+
+    Args:
+        family_id (str): Идентификатор цепочки.
+        session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+    """
+    statement = (
+        update(auth_models.RefreshTokens)
+        .where(auth_models.RefreshTokens.family_id == family_id)
+        .where(auth_models.RefreshTokens.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    with metrics.DB_QUERY_SECONDS.time("revoke_refresh_family"):
+        await session.execute(statement)
+    revoked_families.set(family_id, True)
+
+
+# Выход из текущей сессии
+async def logout(access_payload: dict, refresh_token: str | None, session: AsyncSession) -> None:
+    """
+    Отзывает текущий токен доступа и цепочку токена обновления из cookies.
+
+    Args:
+        access_payload (dict): Проверенные данные токена доступа.
+        refresh_token (str | None): Токен обновления из cookies.
+        session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+    """
+    await revocations.revoke_token(access_payload, session)
+
+    if refresh_token is None:
+        return
+    try:
+        refresh_payload = decode_jwt_token(refresh_token)
+    except HTTPException:
+        return  # Недействительный токен обновления и так не будет принят
+
+    family_id = refresh_payload.get("fam")
+    if family_id is not None and refresh_payload.get("sub") == access_payload.get("sub"):
+        await revoke_refresh_family(family_id, session)
+
+
+# Выход из всех сессий пользователя
+async def logout_all(user_id: int, session: AsyncSession) -> None:
+    """
+    Отзывает все выданные пользователю токены доступа и обновления.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+    """
+    await revocations.revoke_user(user_id, session)
 
-    return jwt.encode(
-        token_payload, 
-        settings.security.SECRET_KEY, 
-        algorithm=settings.security.ALGORITHM
+    statement = (
+        update(auth_models.RefreshTokens)
+        .where(auth_models.RefreshTokens.user_id == user_id)
+        .where(auth_models.RefreshTokens.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
     )
+    with metrics.DB_QUERY_SECONDS.time("revoke_user_refresh_tokens"):
+        await session.execute(statement)
+
+
+# Удаление истекших токенов обновления
+async def purge_refresh_tokens(session: AsyncSession) -> int:
+    """
+    Удаляет из хранилища истекшие токены обновления.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных с открытой транзакцией.
+
+    Returns:
+        int: Количество удаленных записей.
+    """
+    statement = delete(auth_models.RefreshTokens).where(auth_models.RefreshTokens.expires_at < datetime.now(timezone.utc))
+    result = await session.execute(statement)
+    return result.rowcount
 
 
 # Декодирование JWT токена
@@ -142,17 +499,22 @@ def decode_jwt_token(token: str) -> dict:
         token (str): JWT токен для декодирования.
 
     Returns:
-        dict: Декодированные данные токена.
+        dict: Копия декодированных данных токена (изменения не попадают в кэш токенов).
 
     Raises:
         HTTPException: Если токен недействителен или истек.
     """
+    # Уже проверенный токен берем из кэша, не повторяя проверку подписи
+    cache_key = hashlib.sha256(token.encode()).digest()
+    data = token_cache.get(cache_key)
+    if data is not None:
+        return dict(data)
+
     try:
         # Получем содержимое токена
-        data = jwt.decode(token, settings.security.SECRET_KEY, algorithms=settings.security.ALGORITHM)
+        with metrics.AUTH_OPERATION_SECONDS.time("jwt_decode"):
+            data = tokens.codec.decode(token)
         user_id = int(data.get("sub", None))  # Получаем ID пользователя из токена
-        
-        return data
 
     except Exception:
         raise HTTPException(
@@ -160,11 +522,38 @@ def decode_jwt_token(token: str) -> dict:
             detail="Could not validate credentials"
         )
 
+    # Храним токен в кэше не дольше, чем до его собственного истечения
+    expires_at = data.get("exp")
+    ttl = token_cache.ttl if expires_at is None else min(expires_at - time.time(), token_cache.ttl)
+    token_cache.set(cache_key, data, ttl=ttl)
+
+    return dict(data)
+
+
+# Открытые ключи проверки токенов
+@functools.cache
+def jwks_document() -> tuple[bytes, str]:
+    """
+    Возвращает JWKS документ с открытыми ключами и его ETag.
+
+    Набор ключей (tokens.codec) загружается при импорте и меняется только при перезапуске,
+    поэтому документ сериализуется один раз: ключи, созданные или выведенные из оборота
+    командами generate-key и retire-key, появляются в документе после перезапуска воркеров.
+    У алгоритмов HS* (по умолчанию HS256) открытых ключей нет, и документ содержит
+    пустой набор {"keys": []}: такие токены проверяются только общим секретом.
+
+    Returns:
+        tuple[bytes, str]: Тело ответа в JSON и ETag.
+    """
+    body = json.dumps({"keys": tokens.codec.jwks()}, separators=(",", ":")).encode()
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
 
 # Проверка пароля
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Сравнивает введенный пользователем пароль с захешированным.
+    Проверка выполняется в пуле хеширования и не блокирует цикл событий.
 
     Args:
         plain_password (str): Пароль, введенный пользователем.
@@ -173,13 +562,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True, если пароли совпадают, иначе False.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    with metrics.AUTH_OPERATION_SECONDS.time("password_verify"):
+        return await hashing.hasher.verify(plain_password, hashed_password)
+
+
+# Проверка пароля несуществующего пользователя
+async def verify_dummy_password(plain_password: str) -> None:
+    """
+    Проверяет пароль по заранее вычисленному хешу случайного пароля.
+    Время выполнения равно проверке неверного пароля существующего пользователя.
+
+    Args:
+        plain_password (str): Пароль, введенный пользователем.
+    """
+    with metrics.AUTH_OPERATION_SECONDS.time("password_verify_dummy"):
+        await hashing.hasher.verify_dummy(plain_password)
 
 
 # Хеширование пароля
-def get_password_hash(password: str) -> str:
+async def get_password_hash(password: str) -> str:
     """
     Захеширует пароль для безопасного хранения.
+    Хеширование выполняется в пуле хеширования и не блокирует цикл событий.
 
     Args:
         password (str): Пароль пользователя.
@@ -187,4 +591,5 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Захешированный пароль.
     """
-    return pwd_context.hash(password)
+    with metrics.AUTH_OPERATION_SECONDS.time("password_hash"):
+        return await hashing.hasher.hash(password)
@@ -0,0 +1,418 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Callable
+
+from app.core import settings
+
+# Хеш-функции алгоритмов подписи
+_HASHES = {"256": hashlib.sha256, "384": hashlib.sha384, "512": hashlib.sha512}
+
+
+class TokenError(Exception):
+    """
+    Токен поврежден, подписан другим ключом или истек.
+    """
+
+
+class TokenCodec:
+    """
+    Интерфейс кодирования и проверки JWT токенов.
+    """
+    algorithm: str
+
+    def encode(self, payload: dict) -> str:
+        """
+        Подписывает данные и возвращает токен.
+
+        Args:
+            payload (dict): Данные токена (exp - целое число секунд).
+
+        Returns:
+            str: JWT токен.
+        """
+        raise NotImplementedError
+
+    def decode(self, token: str) -> dict:
+        """
+        Проверяет подпись и срок действия токена и возвращает его данные.
+
+        Args:
+            token (str): JWT токен.
+
+        Returns:
+            dict: Данные токена.
+
+        Raises:
+            TokenError: Если токен недействителен или истек.
+        """
+        raise NotImplementedError
+
+    def jwks(self) -> list[dict]:
+        """
+        Возвращает открытые ключи проверки в формате JWK (пустой список для HS*).
+
+        Returns:
+            list[dict]: Открытые ключи.
+        """
+        return []
+
+
+class JoseCodec(TokenCodec):
+    """
+    Кодирование через python-jose (ключ и алгоритм разбираются при каждом вызове).
+
+    Args:
+        algorithm (str): Алгоритм подписи.
+        signing_key (str): Секрет (HS*) или закрытый ключ в PEM.
+        verifying_key (str): Секрет (HS*) или открытый ключ в PEM.
+    """
+    def __init__(self, algorithm: str, signing_key: str, verifying_key: str) -> None:
+        self.algorithm = algorithm
+        self._signing_key = signing_key
+        self._verifying_key = verifying_key
+
+    def encode(self, payload: dict) -> str:
+        from jose import jwt
+
+        return jwt.encode(payload, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        from jose import JWTError, jwt
+
+        try:
+            return jwt.decode(token, self._verifying_key, algorithms=self.algorithm)
+        except JWTError as exc:
+            raise TokenError(str(exc)) from exc
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _dumps(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class FastCodec(TokenCodec):
+    """
+    Быстрое кодирование JWT с ключами, подготовленными один раз при создании.
+
+    HS256/384/512 реализованы на стандартной библиотеке (hmac с заранее заданным ключом),
+    RS*, ES* и EdDSA (Ed25519) требуют пакета cryptography. Заголовок токена
+    сериализуется один раз; алгоритм из заголовка входящего токена должен совпадать
+    с настроенным, что исключает подмену алгоритма.
+
+    Args:
+        algorithm (str): Алгоритм подписи.
+        signing_key (str): Секрет (HS*) или закрытый ключ в PEM.
+        verifying_key (str): Секрет (HS*) или открытый ключ в PEM (для асимметричных
+            алгоритмов может быть пустым - тогда берется из закрытого ключа).
+        kid (str | None): Идентификатор ключа для заголовка токена и JWK.
+    """
+    def __init__(self, algorithm: str, signing_key: str, verifying_key: str = "", kid: str | None = None) -> None:
+        self.algorithm = algorithm
+        self.kid = kid
+
+        header = {"alg": algorithm, "typ": "JWT"}
+        if kid is not None:
+            header["kid"] = kid
+        self.header_segment = _b64encode(_dumps(header))
+
+        self._public_key = None  # Открытый ключ для JWK (только для асимметричных алгоритмов)
+        self._sign, self._verify = self._prepare(algorithm, signing_key, verifying_key)
+
+    def _prepare(self, algorithm: str, signing_key: str, verifying_key: str) -> tuple[Callable, Callable]:
+        family, bits = algorithm[:2], algorithm[2:]
+
+        if family == "HS" and bits in _HASHES:
+            mac = hmac.new(signing_key.encode(), digestmod=_HASHES[bits])
+
+            def sign(message: bytes) -> bytes:
+                signer = mac.copy()  # Копия уже содержит подготовленный ключ
+                signer.update(message)
+                return signer.digest()
+
+            def verify(message: bytes, signature: bytes) -> bool:
+                return hmac.compare_digest(sign(message), signature)
+
+            return sign, verify
+
+        try:
+            from cryptography.exceptions import InvalidSignature
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import ec, padding
+            from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+        except ImportError as exc:
+            raise RuntimeError(f"Token algorithm {algorithm} requires the 'cryptography' package") from exc
+
+        private_key = serialization.load_pem_private_key(signing_key.encode(), password=None) if signing_key else None
+        if verifying_key:
+            public_key = serialization.load_pem_public_key(verifying_key.encode())
+        elif private_key is not None:
+            public_key = private_key.public_key()
+        else:
+            raise ValueError(f"Token algorithm {algorithm} requires a private or public key")
+        self._public_key = public_key
+
+        def checked(check: Callable[[bytes, bytes], None]) -> Callable[[bytes, bytes], bool]:
+            def verify(message: bytes, signature: bytes) -> bool:
+                try:
+                    check(message, signature)
+                except (InvalidSignature, ValueError):
+                    return False
+                return True
+            return verify
+
+        def require_private_key():
+            if private_key is None:
+                raise TokenError("Signing requires a private key")
+            return private_key
+
+        if family == "RS" and bits in _HASHES:
+            digest = {"256": hashes.SHA256, "384": hashes.SHA384, "512": hashes.SHA512}[bits]()
+
+            def sign(message: bytes) -> bytes:
+                return require_private_key().sign(message, padding.PKCS1v15(), digest)
+
+            return sign, checked(lambda message, signature: public_key.verify(signature, message, padding.PKCS1v15(), digest))
+
+        if family == "ES" and bits in _HASHES:
+            digest = {"256": hashes.SHA256, "384": hashes.SHA384, "512": hashes.SHA512}[bits]()
+            size = (public_key.curve.key_size + 7) // 8  # Длина r и s в подписи JWS
+
+            def sign(message: bytes) -> bytes:
+                r, s = decode_dss_signature(require_private_key().sign(message, ec.ECDSA(digest)))
+                return r.to_bytes(size, "big") + s.to_bytes(size, "big")
+
+            def check(message: bytes, signature: bytes) -> None:
+                if len(signature) != 2 * size:
+                    raise InvalidSignature()
+                r, s = int.from_bytes(signature[:size], "big"), int.from_bytes(signature[size:], "big")
+                public_key.verify(encode_dss_signature(r, s), message, ec.ECDSA(digest))
+
+            return sign, checked(check)
+
+        if algorithm == "EdDSA":
+            def sign(message: bytes) -> bytes:
+                return require_private_key().sign(message)
+
+            return sign, checked(lambda message, signature: public_key.verify(signature, message))
+
+        raise ValueError(f"Unsupported token algorithm: {algorithm!r}")
+
+    def encode(self, payload: dict) -> str:
+        signing_input = self.header_segment + b"." + _b64encode(_dumps(payload))
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode()
+
+    def decode(self, token: str) -> dict:
+        try:
+            raw = token.encode("ascii")
+            signing_input, _, signature_segment = raw.rpartition(b".")
+            header_segment, _, payload_segment = signing_input.partition(b".")
+
+            if header_segment != self.header_segment:
+                header = json.loads(_b64decode(header_segment))
+                if header.get("alg") != self.algorithm:
+                    raise TokenError("Unexpected token algorithm")
+
+            if not self._verify(signing_input, _b64decode(signature_segment)):
+                raise TokenError("Signature verification failed")
+
+            payload = json.loads(_b64decode(payload_segment))
+        except TokenError:
+            raise
+        except (ValueError, TypeError, UnicodeError) as exc:
+            raise TokenError("Malformed token") from exc
+
+        if not isinstance(payload, dict):
+            raise TokenError("Malformed token")
+
+        # Проверяем срок действия и время начала действия
+        now = time.time()
+        expires_at = payload.get("exp")
+        if expires_at is not None and (not isinstance(expires_at, (int, float)) or expires_at <= now):
+            raise TokenError("Signature has expired")
+        not_before = payload.get("nbf")
+        if not_before is not None and (not isinstance(not_before, (int, float)) or not_before > now):
+            raise TokenError("The token is not yet valid")
+
+        return payload
+
+    def jwk(self) -> dict | None:
+        """
+        Возвращает открытый ключ в формате JWK (RFC 7517) или None для HS*.
+
+        Returns:
+            dict | None: Открытый ключ.
+        """
+        if self._public_key is None:
+            return None
+
+        from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+        def b64int(value: int, size: int | None = None) -> str:
+            size = size or (value.bit_length() + 7) // 8
+            return _b64encode(value.to_bytes(size, "big")).decode()
+
+        key = self._public_key
+        if isinstance(key, rsa.RSAPublicKey):
+            numbers = key.public_numbers()
+            jwk = {"kty": "RSA", "n": b64int(numbers.n), "e": b64int(numbers.e)}
+        elif isinstance(key, ec.EllipticCurvePublicKey):
+            numbers = key.public_numbers()
+            size = (key.curve.key_size + 7) // 8
+            crv = {"secp256r1": "P-256", "secp384r1": "P-384", "secp521r1": "P-521"}[key.curve.name]
+            jwk = {"kty": "EC", "crv": crv, "x": b64int(numbers.x, size), "y": b64int(numbers.y, size)}
+        elif isinstance(key, ed25519.Ed25519PublicKey):
+            from cryptography.hazmat.primitives import serialization
+
+            raw = key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            jwk = {"kty": "OKP", "crv": "Ed25519", "x": _b64encode(raw).decode()}
+        else:
+            return None
+
+        jwk.update({"use": "sig", "alg": self.algorithm})
+        if self.kid is not None:
+            jwk["kid"] = self.kid
+        return jwk
+
+    def jwks(self) -> list[dict]:
+        jwk = self.jwk()
+        return [jwk] if jwk is not None else []
+
+
+class KeyRingCodec(TokenCodec):
+    """
+    Кодек с набором ключей для ротации.
+
+    Новые токены подписываются активным ключом, а проверяются ключом, указанным
+    в заголовке токена (kid). Ключ выбирается по закодированному заголовку без
+    разбора JSON; неизвестные заголовки разбираются, чтобы найти kid.
+
+    Args:
+        codecs (dict[str, FastCodec]): Кодеки по идентификаторам ключей.
+        active_kid (str): Идентификатор ключа для подписи новых токенов.
+    """
+    def __init__(self, codecs: dict[str, FastCodec], active_kid: str) -> None:
+        if active_kid not in codecs:
+            raise ValueError(f"Active key {active_kid!r} not found")
+
+        self.active_kid = active_kid
+        self.algorithm = codecs[active_kid].algorithm
+        self._active = codecs[active_kid]
+        self._by_kid = codecs
+        self._by_header = {codec.header_segment: codec for codec in codecs.values()}
+
+    def encode(self, payload: dict) -> str:
+        return self._active.encode(payload)
+
+    def decode(self, token: str) -> dict:
+        header_segment = token.partition(".")[0].encode()
+        codec = self._by_header.get(header_segment)
+
+        if codec is None:
+            try:
+                header = json.loads(_b64decode(header_segment))
+                codec = self._by_kid.get(header.get("kid"))
+            except (ValueError, TypeError, AttributeError) as exc:
+                raise TokenError("Malformed token") from exc
+            if codec is None:
+                raise TokenError("Unknown key id")
+
+        return codec.decode(token)
+
+    def jwks(self) -> list[dict]:
+        return [jwk for codec in self._by_kid.values() for jwk in codec.jwks()]
+
+
+# Загрузка набора ключей из каталога
+def load_keyring(directory: str, algorithm: str, active_kid: str = "") -> KeyRingCodec:
+    """
+    Загружает ключи из каталога: <kid>.pem - закрытый ключ (подпись и проверка),
+    <kid>.pub.pem - открытый ключ выведенного из оборота ключа (только проверка).
+
+    Набор ключей загружается один раз при импорте модуля (tokens.codec), поэтому изменения
+    каталога (generate-key, retire-key) вступают в силу после перезапуска воркеров.
+
+    Args:
+        directory (str): Каталог ключей.
+        algorithm (str): Алгоритм подписи всех ключей.
+        active_kid (str): Ключ для подписи новых токенов (по умолчанию - последний по имени закрытый ключ).
+
+    Returns:
+        KeyRingCodec: Кодек с набором ключей.
+
+    Raises:
+        ValueError: Если в каталоге нет закрытых ключей или у активного ключа нет закрытой части.
+    """
+    codecs = {}
+    private_kids = []
+
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(".pub.pem"):
+            kid = name[:-len(".pub.pem")]
+            codecs.setdefault(kid, FastCodec(algorithm, "", _read_key(path), kid=kid))
+        elif name.endswith(".pem"):
+            kid = name[:-len(".pem")]
+            codecs[kid] = FastCodec(algorithm, _read_key(path), kid=kid)
+            private_kids.append(kid)
+
+    if not private_kids:
+        raise ValueError(f"No private keys found in {directory!r}")
+    if active_kid and active_kid not in private_kids:
+        raise ValueError(f"Active key {active_kid!r} has no private key in {directory!r}")
+
+    return KeyRingCodec(codecs, active_kid or private_kids[-1])
+
+
+def _read_key(path: str) -> str:
+    if not path:
+        return ""
+    with open(path, encoding="utf-8") as key_file:
+        return key_file.read()
+
+
+# Создание кодека токенов на основе настроек
+def create_codec(name: str) -> TokenCodec:
+    """
+    Создает кодек токенов по имени.
+
+    Для HS* ключом служит SECURITY_SECRET_KEY, для остальных алгоритмов - набор
+    ключей из каталога SECURITY_KEYS_DIR или ключи из файлов SECURITY_PRIVATE_KEY_FILE
+    и SECURITY_PUBLIC_KEY_FILE.
+
+    Args:
+        name (str): "fast" или "jose".
+
+    Returns:
+        TokenCodec: Кодек токенов.
+    """
+    algorithm = settings.security.ALGORITHM
+    if not algorithm.startswith("HS") and settings.security.KEYS_DIR:
+        if name != "fast":
+            raise ValueError("SECURITY_KEYS_DIR requires the fast token codec")
+        return load_keyring(settings.security.KEYS_DIR, algorithm, settings.security.ACTIVE_KID)
+
+    if algorithm.startswith("HS"):
+        signing_key = verifying_key = settings.security.SECRET_KEY
+    else:
+        signing_key = _read_key(settings.security.PRIVATE_KEY_FILE)
+        verifying_key = _read_key(settings.security.PUBLIC_KEY_FILE)
+
+    if name == "fast":
+        return FastCodec(algorithm, signing_key, verifying_key)
+    if name == "jose":
+        return JoseCodec(algorithm, signing_key, verifying_key or signing_key)
+    raise ValueError(f"Unknown token codec: {name!r}")
+
+
+codec = create_codec(settings.security.TOKEN_CODEC)
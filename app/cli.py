@@ -0,0 +1,226 @@
+"""
+Служебные команды приложения.
+
+Запуск:
+    python -m app.cli import-users users.csv --errors errors.jsonl
+    python -m app.cli generate-key --algorithm RS256 --dir keys
+    python -m app.cli retire-key 20240101000000 --dir keys
+    python -m app.cli purge-tokens
+    python -m app.cli serve --workers 4 --port 8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from app.core import settings, database
+from app.auth import revocation as auth_revocation
+from app.auth import service as auth_service
+from app.users import importer as users_importer
+
+
+# Массовый импорт пользователей из файла
+async def import_users(args: argparse.Namespace) -> int:
+    """
+    Импортирует пользователей из CSV или JSONL и выводит отчет.
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки.
+
+    Returns:
+        int: Код завершения (1, если были ошибочные строки).
+    """
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "jsonl")
+    errors_file = open(args.errors, "w", encoding="utf-8") if args.errors else None
+
+    def on_error(row_error) -> None:
+        if errors_file is not None:
+            errors_file.write(row_error.model_dump_json() + "\n")
+
+    database.init()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as lines, \
+                ProcessPoolExecutor(max_workers=args.workers) as executor:
+            async with database.create_session() as session:
+                importer = users_importer.UserImporter(
+                    session,
+                    executor,
+                    workers=args.workers,
+                    batch_size=args.batch_size,
+                    on_error=on_error,
+                )
+                report = await importer.run(users_importer.read_records(lines, fmt))
+    finally:
+        if errors_file is not None:
+            errors_file.close()
+        await database.close()
+
+    print(report.model_dump_json(exclude={"errors"}))
+    return 1 if report.invalid or report.failed else 0
+
+
+# Удаление истекших токенов обновления и записей об отзыве
+async def purge_tokens(args: argparse.Namespace) -> int:
+    """
+    Удаляет истекшие токены обновления и записи об отзыве токенов доступа и выводит их количество.
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки.
+
+    Returns:
+        int: Код завершения.
+    """
+    database.init()
+    try:
+        async with database.create_session() as session, session.begin():
+            refresh_tokens = await auth_service.purge_refresh_tokens(session)
+            revocations = await auth_revocation.purge_revocations(session)
+    finally:
+        await database.close()
+
+    print(json.dumps({"refresh_tokens": refresh_tokens, "revocations": revocations}))
+    return 0
+
+
+# Создание ключа подписи токенов для ротации
+def generate_key(args: argparse.Namespace) -> int:
+    """
+    Создает закрытый ключ <kid>.pem в каталоге ключей.
+
+    Ротация: новый ключ сначала раскладывается на все воркеры (он публикуется в JWKS
+    и принимается при проверке), затем становится активным через SECURITY_ACTIVE_KID.
+    Старый ключ заменяется на <kid>.pub.pem и удаляется после истечения выданных им токенов.
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки.
+
+    Returns:
+        int: Код завершения.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    algorithm = args.algorithm
+    if algorithm.startswith("RS"):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=args.rsa_bits)
+    elif algorithm in ("ES256", "ES384", "ES512"):
+        curve = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}[algorithm]()
+        private_key = ec.generate_private_key(curve)
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        print(f"Algorithm {algorithm} does not use key pairs", file=sys.stderr)
+        return 2
+
+    kid = args.kid or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, f"{kid}.pem")
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+    # Закрытый ключ доступен только владельцу; существующий ключ не перезаписывается
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as key_file:
+        key_file.write(pem)
+
+    print(kid)
+    return 0
+
+
+# Вывод ключа из оборота: остается только открытая часть для проверки
+def retire_key(args: argparse.Namespace) -> int:
+    """
+    Заменяет закрытый ключ <kid>.pem на открытый <kid>.pub.pem.
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки.
+
+    Returns:
+        int: Код завершения.
+    """
+    from cryptography.hazmat.primitives import serialization
+
+    private_path = os.path.join(args.dir, f"{args.kid}.pem")
+    with open(private_path, "rb") as key_file:
+        private_key = serialization.load_pem_private_key(key_file.read(), password=None)
+
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    with open(os.path.join(args.dir, f"{args.kid}.pub.pem"), "wb") as key_file:
+        key_file.write(public_pem)
+    os.remove(private_path)
+    return 0
+
+
+# Запуск нескольких воркеров с предзагрузкой приложения
+def serve(args: argparse.Namespace) -> int:
+    """
+    Запускает воркеры uvicorn на общем сокете (см. app.server).
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки.
+
+    Returns:
+        int: Код завершения.
+    """
+    from app import server
+
+    return server.run(host=args.host, port=args.port, workers=args.workers, app=args.app)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Служебные команды приложения.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-users", help="массовый импорт пользователей из CSV или JSONL")
+    import_parser.add_argument("path", help="путь к файлу с пользователями")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"], help="формат файла (по умолчанию по расширению)")
+    import_parser.add_argument("--batch-size", type=int, default=users_importer.BATCH_SIZE, help="размер пакета вставки")
+    import_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="количество процессов хеширования")
+    import_parser.add_argument("--errors", help="файл для ошибок по строкам (JSONL)")
+
+    key_parser = commands.add_parser("generate-key", help="создание ключа подписи токенов для ротации (применяется после перезапуска воркеров)")
+    key_parser.add_argument("--algorithm", default=settings.security.ALGORITHM, help="алгоритм (RS*, ES* или EdDSA)")
+    key_parser.add_argument("--kid", help="идентификатор ключа (по умолчанию текущее время UTC)")
+    key_parser.add_argument("--dir", default=settings.security.KEYS_DIR or "keys", help="каталог ключей")
+    key_parser.add_argument("--rsa-bits", type=int, default=2048, help="размер ключа RSA")
+
+    retire_parser = commands.add_parser("retire-key", help="оставить от ключа только открытую часть для проверки (применяется после перезапуска воркеров)")
+    retire_parser.add_argument("kid", help="идентификатор ключа")
+    retire_parser.add_argument("--dir", default=settings.security.KEYS_DIR or "keys", help="каталог ключей")
+
+    commands.add_parser("purge-tokens", help="удаление истекших токенов обновления и записей об отзыве")
+
+    serve_parser = commands.add_parser("serve", help="запуск нескольких воркеров с предзагрузкой приложения")
+    serve_parser.add_argument("--host", default=settings.server.HOST, help="адрес")
+    serve_parser.add_argument("--port", type=int, default=settings.server.PORT, help="порт")
+    serve_parser.add_argument("--workers", type=int, default=settings.server.WORKERS, help="количество воркеров")
+    serve_parser.add_argument("--app", default="app.main:app", help="приложение (модуль:атрибут)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import-users" and not 1 <= args.batch_size <= users_importer.MAX_BATCH_SIZE:
+        parser.error(f"--batch-size must be between 1 and {users_importer.MAX_BATCH_SIZE}")
+    if args.command == "import-users":
+        return asyncio.run(import_users(args))
+    if args.command == "purge-tokens":
+        return asyncio.run(purge_tokens(args))
+    if args.command == "generate-key":
+        return generate_key(args)
+    if args.command == "retire-key":
+        return retire_key(args)
+    if args.command == "serve":
+        return serve(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
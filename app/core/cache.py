@@ -0,0 +1,157 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class LRUCache:
+    """
+    Ограниченный по размеру кэш в памяти процесса с вытеснением LRU и временем жизни записей.
+
+    Кэш не потокобезопасен и рассчитан на использование из цикла событий.
+
+    Attributes:
+        maxsize (int): Максимальное количество записей (0 - кэш отключен).
+        ttl (float): Время жизни записи по умолчанию в секундах.
+    """
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        # Счетчики для метрик
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу, если запись есть и не истекла.
+
+        Args:
+            key (Hashable): Ключ записи.
+            default (Any): Значение, возвращаемое при промахе.
+
+        Returns:
+            Any: Сохраненное значение или default.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            # Запись истекла, удаляем ее
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)  # Отмечаем запись как недавно использованную
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Сохраняет значение, вытесняя самые старые записи при переполнении.
+
+        Args:
+            key (Hashable): Ключ записи.
+            value (Any): Значение для сохранения.
+            ttl (float | None): Время жизни записи в секундах (по умолчанию - ttl кэша).
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)  # Вытесняем самую старую запись
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Удаляет запись по ключу, если она есть.
+
+        Args:
+            key (Hashable): Ключ записи.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Удаляет все записи из кэша.
+        """
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """
+        Возвращает метрики кэша.
+
+        Returns:
+            dict: Размер, лимит и счетчики попаданий, промахов, вытеснений и истечений.
+        """
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вызовы с одинаковым ключом в один.
+
+    Первый вызов выполняет функцию, остальные ждут его результат (или исключение).
+    Используется для защиты от лавины одинаковых запросов к базе данных.
+    """
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет функцию один раз для всех одновременных вызовов с ключом.
+
+        Args:
+            key (Hashable): Ключ, по которому объединяются вызовы.
+            func (Callable): Асинхронная функция без аргументов.
+
+        Returns:
+            T: Результат функции.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            # Вызов уже выполняется, ждем его результат
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # Помечаем исключение как полученное, если ожидающих нет
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -1,43 +1,406 @@
-from typing import AsyncIterator
+import asyncio
+import functools
+import itertools
+import os
+import time
+from typing import AsyncIterator, Callable
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from loguru import logger
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine.url import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 
 from app.core import settings
 
 
 
-# Конфигурация пула соединений с базой данных
-POOL_SIZE = 5  # Размер пула соединений
-MAX_OVERFLOW = 10  # Максимальное количество дополнительных соединений, которые могут быть созданы
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, собирающий метрики ожидания соединений.
+
+    Считает успешные выдачи соединений, время ожидания свободного соединения и
+    превышения POOL_TIMEOUT, чтобы исчерпание пула было видно до роста задержек.
+    Ошибки установки соединения считаются и передаются в on_connect_error.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connect_errors = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.on_connect_error: Callable[[], None] | None = None
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.on_connect_error = self.on_connect_error  # Сохраняем обработчик после engine.dispose()
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.connect_errors += 1
+            if self.on_connect_error is not None:
+                self.on_connect_error()
+            raise
+        finally:
+            # Ожидание учитывается и для неудачных попыток: таймаут - самое долгое ожидание
+            waited = time.perf_counter() - started
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.checkouts += 1
+        return connection
+
+    def stats(self) -> dict:
+        """
+        Возвращает текущее состояние и метрики пула.
+
+        Returns:
+            dict: Размер пула, выданные и свободные соединения, переполнение, ожидание и таймауты.
+        """
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connect_errors": self.connect_errors,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+# Создание асинхронного двигателя с настройками пула
+def create_engine(url: URL) -> AsyncEngine:
+    """
+    Создает асинхронный двигатель с пулом соединений из настроек.
+
+    Args:
+        url (URL): URL базы данных.
+
+    Returns:
+        AsyncEngine: Асинхронный двигатель.
+    """
+    # Параметры драйвера asyncpg (не передаются другим драйверам, например SQLite в бенчмарках)
+    connect_args = {}
+    if url.drivername == "postgresql+asyncpg":
+        connect_args["statement_cache_size"] = settings.database.STATEMENT_CACHE_SIZE  # Кэш выражений asyncpg
+
+    return create_async_engine(
+        url,  # URL для подключения к базе данных
+        future=True,  # Использование будущих возможностей SQLAlchemy
+        poolclass=InstrumentedPool,  # Пул соединений с метриками
+        pool_size=settings.database.POOL_SIZE,  # Размер пула соединений
+        max_overflow=settings.database.MAX_OVERFLOW,  # Максимальное количество дополнительных соединений
+        pool_timeout=settings.database.POOL_TIMEOUT,  # Время ожидания свободного соединения
+        pool_recycle=settings.database.POOL_RECYCLE,  # Время жизни соединения
+        pool_pre_ping=settings.database.POOL_PRE_PING,  # Проверка соединения перед выдачей
+        connect_args=connect_args,  # Параметры драйвера
+    )
+
+
+class ReplicaSet:
+    """
+    Набор реплик для чтения с проверкой доступности.
+
+    Реплики выбираются по кругу среди доступных. Реплика исключается при ошибке
+    установки соединения, разрыве соединения или неудачной проверке и возвращается
+    после успешной фоновой проверки. Если доступных реплик нет, чтение идет в основную базу.
+
+    Args:
+        engines (list[AsyncEngine]): Двигатели реплик.
+        check_interval (float): Период проверки доступности в секундах.
+        check_timeout (float): Время ожидания ответа при проверке в секундах.
+    """
+    def __init__(self, engines: list[AsyncEngine], check_interval: float, check_timeout: float) -> None:
+        self.engines = engines
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
 
-# Создание асинхронного двигателя для подключения к базе данных
-engine = create_async_engine(
-    settings.database_url,  # URL для подключения к базе данных
-    future=True,  # Использование будущих возможностей SQLAlchemy
-    pool_size=POOL_SIZE,  # Размер пула соединений
-    max_overflow=MAX_OVERFLOW,  # Максимальное количество дополнительных соединений
-)
+        self._healthy: list[AsyncEngine] = list(engines)
+        self._counter = itertools.count()
+        self._task: asyncio.Task | None = None
+
+        # Счетчики для метрик
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.failures = 0
+
+        for engine in engines:
+            # Реплика недоступна: не удалось установить соединение или соединение разорвано
+            engine.pool.on_connect_error = functools.partial(self.mark_down, engine)
+            event.listen(engine.sync_engine, "handle_error", self._on_error(engine))
+
+    def _on_error(self, engine: AsyncEngine) -> Callable:
+        def handle_error(context) -> None:
+            if context.is_disconnect:
+                self.mark_down(engine)
+        return handle_error
+
+    def choose(self) -> AsyncEngine | None:
+        """
+        Выбирает доступную реплику по кругу.
+
+        Returns:
+            AsyncEngine | None: Реплика или None, если доступных реплик нет.
+        """
+        healthy = self._healthy
+        if not healthy:
+            self.primary_reads += 1
+            return None
+        self.replica_reads += 1
+        return healthy[next(self._counter) % len(healthy)]
+
+    def is_healthy(self, engine: AsyncEngine) -> bool:
+        return engine in self._healthy
+
+    def mark_down(self, engine: AsyncEngine) -> None:
+        """
+        Исключает реплику до следующей успешной проверки.
+
+        Args:
+            engine (AsyncEngine): Недоступная реплика.
+        """
+        if engine in self._healthy:
+            self._healthy = [healthy for healthy in self._healthy if healthy is not engine]
+            self.failures += 1
+            logger.warning("Database replica {} is down", engine.url.host)
+
+    async def check(self) -> None:
+        """
+        Проверяет все реплики запросом SELECT 1 и обновляет список доступных.
+        """
+        healthy = []
+        for engine in self.engines:
+            try:
+                await asyncio.wait_for(ping(engine), self.check_timeout)
+            except Exception as exc:
+                if engine in self._healthy:
+                    self.failures += 1
+                    logger.warning("Database replica {} is down: {}", engine.url.host, exc)
+                continue
+
+            if engine not in self._healthy:
+                logger.info("Database replica {} is up", engine.url.host)
+            healthy.append(engine)
+        self._healthy = healthy
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def start(self) -> None:
+        """
+        Проверяет реплики и запускает фоновую проверку.
+        """
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую проверку и закрывает соединения реплик.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "configured": len(self.engines),
+            "healthy": len(self._healthy),
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "failures": self.failures,
+        }
+
+
+class RoutingSession(Session):
+    """
+    Сессия, направляющая чтение в реплики, а запись в основную базу.
+
+    В реплику уходят только SELECT без FOR UPDATE. После первой записи в сессии
+    (flush или INSERT/UPDATE/DELETE) все последующие запросы этой сессии, то есть
+    этого запроса к API, идут в основную базу, чтобы читать собственные изменения.
+    Запрос можно явно направить в основную базу через execution_options(use_primary=True).
+    """
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["wrote"] = True
+            return engine.sync_engine
+
+        if (
+            replicas is None
+            or self.info.get("wrote")
+            or clause is None
+            or not clause.is_select
+            or clause.get_execution_options().get("use_primary")
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            return engine.sync_engine
+
+        replica = replicas.choose()
+        return engine.sync_engine if replica is None else replica.sync_engine
+
+
+# Двигатель, реплики и фабрика сессий текущего процесса (создаются в init)
+engine: AsyncEngine | None = None
+replicas: ReplicaSet | None = None
+_async_session: sessionmaker | None = None
+
+
+# Создание подключений к базе данных
+def init() -> None:
+    """
+    Создает двигатель основной базы, реплики для чтения и фабрику сессий текущего процесса.
+
+    Вызывается из lifespan в каждом воркере (и служебными командами), а не при импорте:
+    пул соединений не должен переходить в дочерние процессы через fork. Соединения
+    не открываются до первого запроса или warmup. Повторный вызов ничего не делает.
+    """
+    global engine, replicas, _async_session
+    if engine is not None:
+        return
+
+    # Создание асинхронного двигателя для подключения к базе данных
+    engine = create_engine(settings.database_url)
+
+    # Реплики для чтения (None - все запросы идут в основную базу)
+    if settings.replica_urls:
+        replicas = ReplicaSet(
+            [create_engine(url) for url in settings.replica_urls],
+            check_interval=settings.database.REPLICA_CHECK_INTERVAL,
+            check_timeout=settings.database.REPLICA_CHECK_TIMEOUT,
+        )
+
+    # Создание фабрики сессий для асинхронного подключения
+    if replicas is None:
+        _async_session = sessionmaker(
+            engine, 
+            class_=AsyncSession,  # Указываем, что будем использовать асинхронные сессии
+            expire_on_commit=False  # Объекты не будут истекать при коммите
+        )
+    else:
+        _async_session = sessionmaker(
+            class_=AsyncSession,
+            sync_session_class=RoutingSession,  # Выбор основной базы или реплики для каждого запроса
+            expire_on_commit=False,
+        )
+
+
+# Закрытие подключений к базе данных
+async def close() -> None:
+    """
+    Останавливает проверку реплик и закрывает все соединения текущего процесса.
+    После закрытия подключения можно создать заново через init.
+    """
+    global engine, replicas, _async_session
+    if replicas is not None:
+        await replicas.stop()  # Остановка проверки и закрытие соединений реплик
+    if engine is not None:
+        await engine.dispose()
+    engine, replicas, _async_session = None, None, None
+
+
+# Проверка соединения запросом SELECT 1
+async def ping(target: AsyncEngine) -> None:
+    async with target.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+# Прогрев пула соединений
+async def warmup(connections: int) -> None:
+    """
+    Заранее открывает соединения основной базы, чтобы первые запросы воркера
+    не ждали установки соединения (TCP, TLS, аутентификация).
+
+    Соединения открываются одновременно и возвращаются в пул. Число ограничено
+    размером пула: соединения сверх POOL_SIZE закрылись бы сразу после возврата.
+
+    Args:
+        connections (int): Количество соединений.
+    """
+    count = min(connections, settings.database.POOL_SIZE)
+    results = await asyncio.gather(*(engine.connect() for _ in range(count)), return_exceptions=True)
+    held = [result for result in results if not isinstance(result, BaseException)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in held))
+    finally:
+        for connection in held:
+            await connection.close()
+
+
+# Создание асинхронной сессии базы данных
+def create_session() -> AsyncSession:
+    """
+    Создает асинхронную сессию базы данных из фабрики текущего процесса.
+    Используется вне маршрутов: в фоновых задачах, прогреве и служебных командах
+    (async with database.create_session() as session: ...).
+
+    Returns:
+        AsyncSession: Асинхронная сессия базы данных.
+
+    Raises:
+        RuntimeError: Если подключения к базе данных не созданы (см. init).
+    """
+    if _async_session is None:
+        raise RuntimeError("Database is not initialized, call database.init() first")
+    return _async_session()
 
-# Создание фабрики сессий для асинхронного подключения
-_async_session = sessionmaker(
-    engine, 
-    class_=AsyncSession,  # Указываем, что будем использовать асинхронные сессии
-    expire_on_commit=False  # Объекты не будут истекать при коммите
-)
 
 # Функция для получения асинхронной сессии базы данных
 async def get_db_session() -> AsyncIterator[AsyncSession]:
     """
     Создает и предоставляет асинхронную сессию базы данных.
+    Соединение из пула берется только при первом запросе сессии, поэтому маршруты,
+    не обращающиеся к базе данных, соединение не занимают.
 
     Yields:
         AsyncSession: Асинхронная сессия базы данных.
     """
-    async with _async_session() as session:  # Открываем сессию
+    async with create_session() as session:  # Открываем сессию
         yield session  # Передаем сессию вызывающему коду
 
+
+# Метрики пула соединений текущего воркера
+def pool_stats() -> dict:
+    """
+    Возвращает метрики пула соединений текущего процесса.
+
+    Returns:
+        dict: PID воркера, метрики пула соединений и пулов реплик.
+    """
+    if engine is None:
+        return {"pid": os.getpid()}
+
+    stats = {"pid": os.getpid(), **engine.pool.stats()}
+    if replicas is not None:
+        stats["replicas"] = [
+            {"host": replica.url.host, "healthy": replicas.is_healthy(replica), **replica.pool.stats()}
+            for replica in replicas.engines
+        ]
+    return stats
+
+
 # Базовый класс для декларативных моделей SQLAlchemy
 class Base(DeclarativeBase):
     """
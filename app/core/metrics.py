@@ -0,0 +1,275 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Границы корзин гистограмм задержек по умолчанию (в секундах)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Базовый класс метрики в текстовом формате Prometheus.
+
+    Attributes:
+        name (str): Имя метрики.
+        documentation (str): Описание метрики.
+        labelnames (tuple): Имена меток.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """
+    Монотонно возрастающий счетчик.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """
+    Значение, которое может расти и уменьшаться.
+    """
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Гистограмма распределения значений (например, задержек).
+
+    Attributes:
+        buckets (tuple): Верхние границы корзин.
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1  # Последняя корзина - +Inf
+        self._sums[labels] += value
+
+    def time(self, *labels: str) -> "Timer":
+        """
+        Возвращает контекстный менеджер, измеряющий время выполнения блока.
+
+        Args:
+            *labels (str): Значения меток.
+
+        Returns:
+            Timer: Контекстный менеджер измерения.
+        """
+        return Timer(self, labels)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(self._sums[labels])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Timer:
+    """
+    Контекстный менеджер, записывающий время выполнения блока в гистограмму.
+    """
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram: Histogram, labels: tuple[str, ...]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._started, *self._labels)
+
+
+class StatsCollector(Metric):
+    """
+    Набор метрик, собираемый при каждом запросе /metrics из функции stats().
+
+    Каждое числовое значение словаря становится отдельной метрикой <prefix>_<ключ>.
+
+    Attributes:
+        func (Callable): Функция, возвращающая словарь метрик.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], dict]) -> None:
+        super().__init__(name, documentation)
+        self.func = func
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, value in self.func().items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# HELP {self.name}_{key} {self.documentation}: {key}")
+                lines.append(f"# TYPE {self.name}_{key} {self.type}")
+                lines.append(f"{self.name}_{key} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """
+    Реестр метрик процесса.
+    """
+    def __init__(self) -> None:
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Формирует все метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Текст метрик.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Метрики HTTP запросов
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "Total HTTP requests", ("method", "route", "status"),
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"),
+))
+HTTP_IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests in progress", ("method",),
+))
+
+# Разбивка времени внутри сервисов
+AUTH_OPERATION_SECONDS = registry.register(Histogram(
+    "auth_operation_duration_seconds", "Password hashing and JWT operation latency", ("operation",),
+))
+DB_QUERY_SECONDS = registry.register(Histogram(
+    "db_query_duration_seconds", "Database query latency in services", ("query",),
+))
+
+# Исходы попыток входа: success, wrong_password, unknown_user
+AUTH_LOGIN_ATTEMPTS = registry.register(Counter(
+    "auth_login_attempts_total", "Login attempts by outcome", ("outcome",),
+))
+
+# Отклоненные ограничителем попытки входа
+AUTH_RATE_LIMITED = registry.register(Counter(
+    "auth_rate_limited_total", "Login attempts rejected by the rate limiter", ("scope",),
+))
+
+# Исходы /auth/refresh: fresh, rotated, coalesced, rejected
+AUTH_REFRESH = registry.register(Counter(
+    "auth_refresh_total", "Token refresh requests by outcome", ("outcome",),
+))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware, собирающий задержку, количество и коды ответов HTTP запросов по маршрутам.
+
+    Маршрут берется из шаблона пути (например, /users/me), чтобы число меток было ограничено;
+    запросы к неизвестным путям учитываются как <unmatched>.
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500  # Если ответ не был отправлен из-за исключения
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_PROGRESS.dec(method)
+
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+            HTTP_REQUEST_SECONDS.observe(elapsed, method, path)
+            HTTP_REQUESTS.inc(method, path, str(status_code))
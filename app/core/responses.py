@@ -0,0 +1,40 @@
+from typing import Mapping
+
+from fastapi import Response
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+
+class ModelResponse(Response):
+    """
+    JSON ответ из pydantic модели, сериализуемой сразу в байты.
+
+    FastAPI для возвращаемой модели повторно проверяет ее по response_model, строит
+    словарь и сериализует его через json. Модель, возвращенная в ModelResponse,
+    сериализуется одним вызовом pydantic-core (__pydantic_serializer__.to_json) без
+    промежуточных объектов. response_model в декораторе маршрута остается для схемы OpenAPI.
+
+    Args:
+        content (BaseModel): Модель ответа.
+        status_code (int): Код ответа.
+        headers (Mapping[str, str] | None): Дополнительные заголовки.
+        background (BackgroundTask | None): Фоновая задача.
+        cookies_from (Response | None): Ответ, внедренный в маршрут (параметр response: Response),
+            из которого переносятся cookies. FastAPI не объединяет его с возвращенным ответом.
+    """
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: BaseModel,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        background: BackgroundTask | None = None,
+        cookies_from: Response | None = None,
+    ) -> None:
+        super().__init__(content, status_code=status_code, headers=headers, background=background)
+        if cookies_from is not None:
+            self.raw_headers.extend(header for header in cookies_from.raw_headers if header[0] == b"set-cookie")
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
@@ -1,17 +1,210 @@
+import json
 import os
+from dataclasses import dataclass, field
+from pathlib import Path
 
-from dotenv import load_dotenv
-from sqlalchemy.engine.url import URL
+from sqlalchemy.engine.url import URL, make_url
 
 
-from dotenv import load_dotenv
-import os
-from sqlalchemy.engine.url import URL
-
 # Загрузка переменных окружения из .env файла
-load_dotenv()
+def load_env_file() -> Path | None:
+    """
+    Ищет .env в каталоге модуля и выше (как load_dotenv()) и загружает его.
+    python-dotenv импортируется, только если файл найден: в контейнерах настройки
+    обычно приходят из окружения, и импорт не тратит время на запуске.
+
+    Returns:
+        Path | None: Загруженный файл или None, если файл не найден.
+    """
+    directory = Path(__file__).resolve().parent
+    for parent in (directory, *directory.parents):
+        path = parent / ".env"
+        if path.is_file():
+            from dotenv import load_dotenv
+
+            load_dotenv(path)
+            return path
+    return None
+
+
+load_env_file()
+
+
+# Значения по умолчанию для профилей APP_PROFILE. Переменная окружения всегда важнее профиля
+PROFILES: dict[str, dict[str, str]] = {
+    # Локальная разработка: один воркер без прогрева
+    "dev": {
+        "SERVER_WORKERS": "1",
+        "SERVER_WARMUP": "false",
+    },
+    # Боевой режим: слушать все интерфейсы, секретный ключ по умолчанию запрещен (см. Settings)
+    "prod": {
+        "SERVER_HOST": "0.0.0.0",
+        "SERVER_WARMUP": "true",
+        "DATABASE_POOL_PRE_PING": "true",
+    },
+    # Бенчмарки: SQLite без настройки, ограничитель попыток входа не искажает результаты
+    "bench": {
+        "DATABASE_URL": "sqlite+aiosqlite:///bench.db",
+        "RATE_LIMIT_ENABLED": "false",
+        "SERVER_WARMUP": "true",
+    },
+}
+
+PROFILE = os.getenv("APP_PROFILE", "dev")
+if PROFILE not in PROFILES:
+    raise ValueError(f"APP_PROFILE: unknown profile {PROFILE!r}, expected one of {', '.join(PROFILES)}")
+
+
+# Чтение переменных окружения с учетом профиля и проверкой значений
+def _env(name: str) -> str | None:
+    value = os.getenv(name)
+    return PROFILES[PROFILE].get(name) if value is None else value
+
+
+def env_str(name: str, default: str, choices: tuple[str, ...] | None = None) -> str:
+    """
+    Читает строковую настройку.
+
+    Args:
+        name (str): Имя переменной окружения.
+        default (str): Значение по умолчанию.
+        choices (tuple[str, ...] | None): Допустимые значения.
+
+    Returns:
+        str: Значение настройки.
+
+    Raises:
+        ValueError: Если значение не входит в choices.
+    """
+    value = _env(name)
+    value = default if value is None else value
+    if choices is not None and value not in choices:
+        raise ValueError(f"{name}: {value!r} is not one of {', '.join(choices)}")
+    return value
+
+
+def env_int(name: str, default: int, minimum: int | None = None, maximum: int | None = None) -> int:
+    """
+    Читает целочисленную настройку.
+
+    Args:
+        name (str): Имя переменной окружения.
+        default (int): Значение по умолчанию.
+        minimum (int | None): Минимальное допустимое значение.
+        maximum (int | None): Максимальное допустимое значение.
+
+    Returns:
+        int: Значение настройки.
+
+    Raises:
+        ValueError: Если значение не целое число или вне допустимого диапазона.
+    """
+    value = _env(name)
+    try:
+        number = default if value is None else int(value)
+    except ValueError:
+        raise ValueError(f"{name}: {value!r} is not an integer") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{name}: {number} is less than {minimum}")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{name}: {number} is greater than {maximum}")
+    return number
+
+
+def env_float(
+    name: str,
+    default: float,
+    minimum: float | None = None,
+    maximum: float | None = None,
+    greater_than: float | None = None,
+) -> float:
+    """
+    Читает дробную настройку.
+
+    Args:
+        name (str): Имя переменной окружения.
+        default (float): Значение по умолчанию.
+        minimum (float | None): Минимальное допустимое значение.
+        maximum (float | None): Максимальное допустимое значение.
+        greater_than (float | None): Значение должно быть строго больше (например, делитель).
+
+    Returns:
+        float: Значение настройки.
+
+    Raises:
+        ValueError: Если значение не число или вне допустимого диапазона.
+    """
+    value = _env(name)
+    try:
+        number = float(default if value is None else value)
+    except ValueError:
+        raise ValueError(f"{name}: {value!r} is not a number") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{name}: {number} is less than {minimum}")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"{name}: {number} is greater than {maximum}")
+    if greater_than is not None and number <= greater_than:
+        raise ValueError(f"{name}: {number} must be greater than {greater_than}")
+    return number
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """
+    Читает логическую настройку (1/true/yes/on или 0/false/no/off).
+
+    Args:
+        name (str): Имя переменной окружения.
+        default (bool): Значение по умолчанию.
+
+    Returns:
+        bool: Значение настройки.
+
+    Raises:
+        ValueError: Если значение не распознано.
+    """
+    value = _env(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ("1", "true", "yes", "on"):
+        return True
+    if value.strip().lower() in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"{name}: {value!r} is not a boolean")
+
+
+def env_list(name: str, default: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Читает список строк: JSON массив (["a", "b"]) или значения через запятую (a,b).
+
+    Args:
+        name (str): Имя переменной окружения.
+        default (tuple[str, ...]): Значение по умолчанию.
+
+    Returns:
+        tuple[str, ...]: Значения без пустых элементов.
+
+    Raises:
+        ValueError: Если JSON поврежден или содержит не строки.
+    """
+    value = _env(name)
+    if value is None:
+        return default
+
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            items = json.loads(value)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"{name}: invalid JSON list ({exc})") from None
+        if not all(isinstance(item, str) for item in items):
+            raise ValueError(f"{name}: JSON list must contain only strings")
+    else:
+        items = value.split(",")
+    return tuple(item.strip() for item in items if item.strip())
 
 
+@dataclass(frozen=True, slots=True)
 class Security:
     """
     Класс для хранения настроек безопасности приложения.
@@ -19,19 +212,56 @@ class Security:
     Attributes:
         SECRET_KEY (str): Секретный ключ для создания и проверки токенов.
         ALGORITHM (str): Алгоритм для создания и проверки JWT токенов.
-        BACKEND_CORS_ORIGINS (list): Список разрешенных источников для CORS.
-        ALLOWED_HOSTS (list): Список разрешенных хостов.
+        BACKEND_CORS_ORIGINS (tuple): Разрешенные источники для CORS (JSON массив или через запятую).
+        ALLOWED_HOSTS (tuple): Разрешенные хосты (JSON массив или через запятую).
         ACCESS_TOKEN_EXPIRE_MINUTES (int): Время истечения токена доступа в минутах.
         REFRESH_TOKEN_EXPIRE_DAYS (int): Время истечения токена обновления в днях.
+        STATELESS_AUTH (bool): Собирать текущего пользователя из данных токена без запроса к базе данных.
+        IMPORT_TOKEN (str): Токен доступа к массовому импорту пользователей (пустой - импорт через API отключен).
+        METRICS_TOKEN (str): Токен доступа к /metrics и /system/pool в заголовке Authorization: Bearer
+            (пустой - маршруты отключены).
+        TOKEN_CODEC (str): Реализация JWT: "fast" (ключи готовятся один раз) или "jose" (python-jose).
+        PRIVATE_KEY_FILE (str): Путь к закрытому ключу PEM для RS*, ES* и EdDSA.
+        PUBLIC_KEY_FILE (str): Путь к открытому ключу PEM для RS*, ES* и EdDSA.
+        KEYS_DIR (str): Каталог ключей для ротации (<kid>.pem - закрытые, <kid>.pub.pem - только проверка).
+            Читается при запуске: изменения (generate-key, retire-key) применяются после перезапуска воркеров.
+        ACTIVE_KID (str): Ключ для подписи новых токенов (по умолчанию - последний по имени закрытый ключ).
+        JWKS_MAX_AGE (int): Время кэширования /.well-known/jwks.json клиентами в секундах.
+        REVOCATION_SYNC_INTERVAL (float): Период подгрузки отзывов токенов из базы данных в секундах.
+        REVOCATION_SYNC_LAG (float): Перекрытие окон подгрузки отзывов в секундах (долгие транзакции, расхождение часов).
+        REFRESH_MIN_REMAINING (int): Токен доступа с меньшим остатком времени жизни в секундах /auth/refresh выдает заново.
+        REFRESH_REISSUE_AFTER (float): Доля времени жизни токена доступа, после которой /auth/refresh выдает новый токен
+            (0 - выдавать всегда).
+        REFRESH_REUSE_GRACE (float): Сколько секунд только что обмененный токен обновления возвращает те же новые
+            токены вместо отзыва цепочки (0 - не возвращает). Окно покрывает повтор запроса клиентом;
+            украденный токен, предъявленный в течение окна, тоже получает токены, поэтому окно короткое.
+        USERNAME_CASE_INSENSITIVE (bool): Вход по имени пользователя без учета регистра (поиск по индексу
+            ix_users_username_lower; имена, различающиеся только регистром, запрещены в любом режиме).
     """
-    SECRET_KEY = os.getenv("SECURITY_SECRET_KEY", "SECRET")
-    ALGORITHM = os.getenv("SECURITY_ALGORITHM", "HS256")
-    BACKEND_CORS_ORIGINS = os.getenv("SECURITY_BACKEND_CORS_ORIGINS", ["http://localhost:8000"])
-    ALLOWED_HOSTS = os.getenv("SECURITY_ALLOWED_HOSTS", ["localhost", "127.0.0.1"])
-    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("SECURITY_ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-    REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("SECURITY_REFRESH_TOKEN_EXPIRE_DAYS", 30))
+    SECRET_KEY: str = env_str("SECURITY_SECRET_KEY", "SECRET")
+    ALGORITHM: str = env_str("SECURITY_ALGORITHM", "HS256")
+    BACKEND_CORS_ORIGINS: tuple[str, ...] = env_list("SECURITY_BACKEND_CORS_ORIGINS", ("http://localhost:8000",))
+    ALLOWED_HOSTS: tuple[str, ...] = env_list("SECURITY_ALLOWED_HOSTS", ("localhost", "127.0.0.1"))
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = env_int("SECURITY_ACCESS_TOKEN_EXPIRE_MINUTES", 30, minimum=1)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = env_int("SECURITY_REFRESH_TOKEN_EXPIRE_DAYS", 30, minimum=1)
+    STATELESS_AUTH: bool = env_bool("SECURITY_STATELESS_AUTH", False)
+    IMPORT_TOKEN: str = env_str("SECURITY_IMPORT_TOKEN", "")
+    METRICS_TOKEN: str = env_str("SECURITY_METRICS_TOKEN", "")
+    TOKEN_CODEC: str = env_str("SECURITY_TOKEN_CODEC", "fast", choices=("fast", "jose"))
+    PRIVATE_KEY_FILE: str = env_str("SECURITY_PRIVATE_KEY_FILE", "")
+    PUBLIC_KEY_FILE: str = env_str("SECURITY_PUBLIC_KEY_FILE", "")
+    KEYS_DIR: str = env_str("SECURITY_KEYS_DIR", "")
+    ACTIVE_KID: str = env_str("SECURITY_ACTIVE_KID", "")
+    JWKS_MAX_AGE: int = env_int("SECURITY_JWKS_MAX_AGE", 300, minimum=0)
+    REVOCATION_SYNC_INTERVAL: float = env_float("SECURITY_REVOCATION_SYNC_INTERVAL", 2, minimum=0.1)
+    REVOCATION_SYNC_LAG: float = env_float("SECURITY_REVOCATION_SYNC_LAG", 10, minimum=0)
+    REFRESH_MIN_REMAINING: int = env_int("SECURITY_REFRESH_MIN_REMAINING", 60, minimum=0)
+    REFRESH_REISSUE_AFTER: float = env_float("SECURITY_REFRESH_REISSUE_AFTER", 0.5, minimum=0, maximum=1)
+    REFRESH_REUSE_GRACE: float = env_float("SECURITY_REFRESH_REUSE_GRACE", 0.5, minimum=0)
+    USERNAME_CASE_INSENSITIVE: bool = env_bool("SECURITY_USERNAME_CASE_INSENSITIVE", False)
 
 
+@dataclass(frozen=True, slots=True)
 class Database:
     """
     Класс для хранения настроек подключения к базе данных.
@@ -42,25 +272,184 @@ class Database:
         PASSWORD (str): Пароль для подключения к базе данных.
         PORT (int): Порт для подключения к базе данных.
         DB (str): Имя базы данных.
+        POOL_SIZE (int): Размер пула соединений на один воркер.
+        MAX_OVERFLOW (int): Максимальное количество дополнительных соединений сверх пула.
+        POOL_TIMEOUT (float): Время ожидания свободного соединения в секундах.
+        POOL_RECYCLE (int): Время жизни соединения в секундах (-1 - без ограничения).
+        POOL_PRE_PING (bool): Проверять соединение перед выдачей из пула (лишний запрос на каждую выдачу;
+            включено в профиле prod, где соединения обрываются при перезапуске базы и балансировщиков).
+        STATEMENT_CACHE_SIZE (int): Размер кэша подготовленных выражений asyncpg на соединение.
+        PREPARED_STATEMENT_CACHE_SIZE (int): Размер кэша подготовленных выражений SQLAlchemy на соединение.
+        URL (str): Полный URL базы данных вместо отдельных параметров (например, sqlite+aiosqlite:// для бенчмарков).
+        REPLICAS (tuple): Реплики для чтения: "host[:port]" (остальные параметры как у основной базы) или полные URL.
+        REPLICA_CHECK_INTERVAL (float): Период проверки доступности реплик в секундах.
+        REPLICA_CHECK_TIMEOUT (float): Время ожидания ответа реплики при проверке в секундах.
+        IMPORT_BATCH_SIZE (int): Размер пакета вставки при массовом импорте пользователей
+            (не больше 16383: 2 параметра на строку, лимит PostgreSQL - 32767 параметров запроса).
+    """
+    HOSTNAME: str = env_str("DATABASE_HOST", "localhost")
+    USERNAME: str = env_str("DATABASE_USER", "postgres")
+    PASSWORD: str = env_str("DATABASE_PASS", "postgres")
+    PORT: int = env_int("DATABASE_PORT", 5432)
+    DB: str = env_str("DATABASE_DB", "postgres")
+    POOL_SIZE: int = env_int("DATABASE_POOL_SIZE", 5, minimum=1)
+    MAX_OVERFLOW: int = env_int("DATABASE_MAX_OVERFLOW", 10, minimum=0)
+    POOL_TIMEOUT: float = env_float("DATABASE_POOL_TIMEOUT", 30, minimum=0)
+    POOL_RECYCLE: int = env_int("DATABASE_POOL_RECYCLE", 1800, minimum=-1)
+    POOL_PRE_PING: bool = env_bool("DATABASE_POOL_PRE_PING", False)
+    STATEMENT_CACHE_SIZE: int = env_int("DATABASE_STATEMENT_CACHE_SIZE", 100, minimum=0)
+    PREPARED_STATEMENT_CACHE_SIZE: int = env_int("DATABASE_PREPARED_STATEMENT_CACHE_SIZE", 100, minimum=0)
+    URL: str = env_str("DATABASE_URL", "")
+    REPLICAS: tuple[str, ...] = env_list("DATABASE_REPLICAS", ())
+    REPLICA_CHECK_INTERVAL: float = env_float("DATABASE_REPLICA_CHECK_INTERVAL", 5, minimum=0.1)
+    REPLICA_CHECK_TIMEOUT: float = env_float("DATABASE_REPLICA_CHECK_TIMEOUT", 2, minimum=0.1)
+    IMPORT_BATCH_SIZE: int = env_int("DATABASE_IMPORT_BATCH_SIZE", 1000, minimum=1, maximum=16383)
+
+
+@dataclass(frozen=True, slots=True)
+class Hashing:
+    """
+    Класс для хранения настроек пула хеширования паролей.
+
+    Attributes:
+        POOL_KIND (str): Тип пула: "thread" (потоки) или "process" (процессы).
+        POOL_SIZE (int): Количество воркеров в пуле.
+        MAX_CONCURRENCY (int): Максимальное число одновременных операций хеширования (0 - равно POOL_SIZE).
+        SCHEMES (tuple): Схемы хеширования; первая используется для новых хешей, остальные считаются устаревшими.
+        BCRYPT_ROUNDS (int): Стоимость bcrypt (log2 числа раундов).
+        ARGON2_TIME_COST (int): Число итераций argon2id.
+        ARGON2_MEMORY_COST (int): Память argon2id в КиБ.
+        ARGON2_PARALLELISM (int): Число потоков argon2id.
+        REHASH_ON_LOGIN (bool): Перехешировать устаревшие хеши в фоне после успешного входа.
+    """
+    POOL_KIND: str = env_str("HASHING_POOL_KIND", "thread", choices=("thread", "process"))
+    POOL_SIZE: int = env_int("HASHING_POOL_SIZE", os.cpu_count() or 1, minimum=1)
+    MAX_CONCURRENCY: int = env_int("HASHING_MAX_CONCURRENCY", 0, minimum=0)
+    SCHEMES: tuple[str, ...] = env_list("HASHING_SCHEMES", ("bcrypt",))
+    BCRYPT_ROUNDS: int = env_int("HASHING_BCRYPT_ROUNDS", 12, minimum=4)
+    ARGON2_TIME_COST: int = env_int("HASHING_ARGON2_TIME_COST", 3, minimum=1)
+    ARGON2_MEMORY_COST: int = env_int("HASHING_ARGON2_MEMORY_COST", 65536, minimum=8)
+    ARGON2_PARALLELISM: int = env_int("HASHING_ARGON2_PARALLELISM", 4, minimum=1)
+    REHASH_ON_LOGIN: bool = env_bool("HASHING_REHASH_ON_LOGIN", True)
+
+
+@dataclass(frozen=True, slots=True)
+class Cache:
     """
-    HOSTNAME = os.getenv("DATABASE_HOST", "localhost")
-    USERNAME = os.getenv("DATABASE_USER", "postgres")
-    PASSWORD = os.getenv("DATABASE_PASS", "postgres")
-    PORT = int(os.getenv("DATABASE_PORT", 5432))
-    DB = os.getenv("DATABASE_DB", "postgres")
+    Класс для хранения настроек кэшей в памяти процесса.
 
+    Attributes:
+        TOKEN_CACHE_SIZE (int): Максимальное количество проверенных токенов в кэше (0 - кэш отключен).
+        TOKEN_CACHE_TTL (int): Максимальное время хранения проверенного токена в секундах.
+        USER_CACHE_BACKEND (str): Хранилище кэша пользователей: "memory", "redis" или "none".
+            В "redis" записи пользователей хранятся вместе с хешами паролей (hashed_password нужен
+            для проверки пароля при входе): доступ к Redis должен быть закрыт так же, как к базе
+            данных (отдельный экземпляр или ACL, пароль, TLS, без доступа других сервисов).
+        USER_CACHE_SIZE (int): Максимальное количество записей кэша пользователей в памяти.
+        USER_CACHE_TTL (int): Время хранения найденного пользователя в секундах.
+        USER_NEGATIVE_CACHE_TTL (int): Время хранения записи об отсутствующем имени пользователя в секундах.
+        REDIS_URL (str): URL подключения к Redis для общего кэша.
+        REVOKED_FAMILY_CACHE_SIZE (int): Максимальное количество отозванных цепочек токенов обновления,
+            отклоняемых без запроса к базе данных.
+        RECENT_REFRESH_CACHE_SIZE (int): Максимальное количество недавних обменов токенов обновления
+            (см. SECURITY_REFRESH_REUSE_GRACE).
+    """
+    TOKEN_CACHE_SIZE: int = env_int("CACHE_TOKEN_CACHE_SIZE", 10000, minimum=0)
+    TOKEN_CACHE_TTL: int = env_int("CACHE_TOKEN_CACHE_TTL", 300, minimum=0)
+    USER_CACHE_BACKEND: str = env_str("CACHE_USER_CACHE_BACKEND", "memory", choices=("memory", "redis", "none"))
+    USER_CACHE_SIZE: int = env_int("CACHE_USER_CACHE_SIZE", 10000, minimum=0)
+    USER_CACHE_TTL: int = env_int("CACHE_USER_CACHE_TTL", 60, minimum=0)
+    USER_NEGATIVE_CACHE_TTL: int = env_int("CACHE_USER_NEGATIVE_CACHE_TTL", 5, minimum=0)
+    REDIS_URL: str = env_str("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    REVOKED_FAMILY_CACHE_SIZE: int = env_int("CACHE_REVOKED_FAMILY_CACHE_SIZE", 100000, minimum=0)
+    RECENT_REFRESH_CACHE_SIZE: int = env_int("CACHE_RECENT_REFRESH_CACHE_SIZE", 10000, minimum=0)
 
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    """
+    Класс для хранения настроек ограничения частоты попыток входа.
+
+    Ограничение - корзина токенов: BURST попыток подряд, затем PER_MINUTE попыток в минуту.
+
+    Attributes:
+        ENABLED (bool): Включено ли ограничение.
+        BACKEND (str): Хранилище состояния: "memory" (в процессе) или "redis" (общее для воркеров, CACHE_REDIS_URL).
+        SIZE (int): Максимальное количество корзин в памяти процесса (давно не использованные вытесняются).
+        IP_BURST (int): Попыток подряд с одного IP адреса.
+        IP_PER_MINUTE (float): Попыток в минуту с одного IP адреса.
+        USERNAME_BURST (int): Попыток подряд для одного имени пользователя.
+        USERNAME_PER_MINUTE (float): Попыток в минуту для одного имени пользователя.
+    """
+    ENABLED: bool = env_bool("RATE_LIMIT_ENABLED", True)
+    BACKEND: str = env_str("RATE_LIMIT_BACKEND", "memory", choices=("memory", "redis"))
+    SIZE: int = env_int("RATE_LIMIT_SIZE", 100000, minimum=1)
+    IP_BURST: int = env_int("RATE_LIMIT_IP_BURST", 20, minimum=1)
+    IP_PER_MINUTE: float = env_float("RATE_LIMIT_IP_PER_MINUTE", 10, greater_than=0)
+    USERNAME_BURST: int = env_int("RATE_LIMIT_USERNAME_BURST", 10, minimum=1)
+    USERNAME_PER_MINUTE: float = env_float("RATE_LIMIT_USERNAME_PER_MINUTE", 5, greater_than=0)
+
+
+@dataclass(frozen=True, slots=True)
+class Server:
+    """
+    Класс для хранения настроек запуска воркеров (python -m app.cli serve).
+
+    Attributes:
+        HOST (str): Адрес, на котором слушает сервер.
+        PORT (int): Порт сервера.
+        WORKERS (int): Количество процессов-воркеров.
+        BACKLOG (int): Длина очереди входящих соединений общего сокета.
+        GRACEFUL_TIMEOUT (float): Время на завершение текущих запросов при остановке в секундах.
+        FORWARDED_ALLOW_IPS (str): Адреса прокси, которым доверяются заголовки X-Forwarded-*.
+        WARMUP (bool): Прогревать воркер (соединения, пул хеширования, запросы) до приема запросов.
+        WARMUP_CONNECTIONS (int): Количество соединений с базой данных, открываемых при прогреве (0 - DATABASE_POOL_SIZE).
+    """
+    HOST: str = env_str("SERVER_HOST", "127.0.0.1")
+    PORT: int = env_int("SERVER_PORT", 8000, minimum=0)
+    WORKERS: int = env_int("SERVER_WORKERS", os.cpu_count() or 1, minimum=1)
+    BACKLOG: int = env_int("SERVER_BACKLOG", 2048, minimum=1)
+    GRACEFUL_TIMEOUT: float = env_float("SERVER_GRACEFUL_TIMEOUT", 30, minimum=0)
+    FORWARDED_ALLOW_IPS: str = env_str("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")
+    WARMUP: bool = env_bool("SERVER_WARMUP", True)
+    WARMUP_CONNECTIONS: int = env_int("SERVER_WARMUP_CONNECTIONS", 0, minimum=0)
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
     """
     Класс для хранения всех настроек приложения.
 
+    Настройки читаются из окружения один раз при импорте модуля, проверяются и больше не
+    меняются: все значения - обычные атрибуты неизменяемых объектов, и горячий путь
+    не разбирает переменные окружения.
+
+    Значение настройки берется из переменной окружения, затем из профиля APP_PROFILE
+    (см. PROFILES), затем из значения по умолчанию в коде.
+
     Attributes:
+        profile (str): Профиль настроек: "dev", "prod" или "bench".
         database (Database): Экземпляр класса Database для настроек базы данных.
         security (Security): Экземпляр класса Security для настроек безопасности.
+        hashing (Hashing): Экземпляр класса Hashing для настроек хеширования паролей.
+        cache (Cache): Экземпляр класса Cache для настроек кэшей.
+        rate_limit (RateLimit): Экземпляр класса RateLimit для настроек ограничения попыток входа.
+        server (Server): Экземпляр класса Server для настроек запуска воркеров.
+
+    Raises:
+        ValueError: Если в профиле prod для HS* алгоритма используется секретный ключ по умолчанию.
     """
-    def __init__(self) -> None:
-        self.database = Database()  # Инициализация настроек базы данных
-        self.security = Security()  # Инициализация настроек безопасности
+    profile: str = PROFILE
+    database: Database = field(default_factory=Database)  # Настройки базы данных
+    security: Security = field(default_factory=Security)  # Настройки безопасности
+    hashing: Hashing = field(default_factory=Hashing)  # Настройки хеширования паролей
+    cache: Cache = field(default_factory=Cache)  # Настройки кэшей
+    rate_limit: RateLimit = field(default_factory=RateLimit)  # Настройки ограничения попыток входа
+    server: Server = field(default_factory=Server)  # Настройки запуска воркеров
+
+    def __post_init__(self) -> None:
+        if self.profile == "prod" and self.security.ALGORITHM.startswith("HS") and self.security.SECRET_KEY == "SECRET":
+            raise ValueError("SECURITY_SECRET_KEY must be set in the prod profile")
 
     @property
     def database_url(self) -> URL:
@@ -70,6 +459,10 @@ class Settings:
         Returns:
             URL: URL для подключения к базе данных.
         """
+        # Явно заданный URL имеет приоритет над отдельными параметрами
+        if self.database.URL:
+            return make_url(self.database.URL)
+
         return URL.create(
             drivername="postgresql+asyncpg",  # Используемый драйвер
             username=self.database.USERNAME,
@@ -77,9 +470,28 @@ class Settings:
             host=self.database.HOSTNAME,
             port=self.database.PORT,
             database=self.database.DB,
+            query={"prepared_statement_cache_size": str(self.database.PREPARED_STATEMENT_CACHE_SIZE)},
         )
 
 
+    @property
+    def replica_urls(self) -> list[URL]:
+        """
+        Формирует URL реплик для чтения.
+
+        Returns:
+            list[URL]: URL реплик (пустой список, если реплики не заданы).
+        """
+        urls = []
+        for replica in self.database.REPLICAS:
+            if "://" in replica:
+                urls.append(make_url(replica))
+                continue
+            host, _, port = replica.partition(":")
+            urls.append(self.database_url.set(host=host, port=int(port) if port else self.database.PORT))
+        return urls
+
+
 # Создание экземпляра настроек
 settings = Settings()
 
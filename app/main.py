@@ -1,21 +1,55 @@
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
-from app.core import settings
-from app.auth.router import router as auth_router
+from app.core import settings, database
+from app.core.metrics import MetricsMiddleware
+from app.auth import hashing
+from app.auth import service as auth_service
+from app.auth.revocation import revocations
+from app.auth.router import router as auth_router, well_known_router
 from app.users.router import router as users_router
+from app.system.router import router as system_router
+from app.users import service as users_service
 
 
 
+# Прогрев воркера перед приемом запросов
+async def warmup() -> None:
+    """
+    Открывает соединения с базой данных, запускает пул хеширования и готовит запросы
+    и кэши, чтобы первые запросы воркера не платили за холодный старт.
+
+    Недоступная база данных не мешает запуску: запросы откроют соединения сами.
+    """
+    started = time.perf_counter()
+    await hashing.hasher.warmup()  # Потоки или процессы пула хеширования
+    auth_service.jwks_document()  # Сериализация открытых ключей
+
+    try:
+        # Соединения основной базы
+        await database.warmup(settings.server.WARMUP_CONNECTIONS or settings.database.POOL_SIZE)
+        async with database.create_session() as session:
+            await users_service.warmup_queries(session)  # Компиляция запросов пользователя
+    except Exception as exc:
+        logger.warning("Database warmup failed: {}", exc)
+
+    logger.info("Worker warmed up in {:.3f}s", time.perf_counter() - started)
+
+
 # Жизненный цикл приложения (старт и завершение)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Контекстный менеджер, который управляет жизненным циклом приложения.
 
+    Подключения к базе данных и пул хеширования создаются здесь, в процессе воркера,
+    а не при импорте: при запуске через python -m app.cli serve приложение импортируется
+    один раз до fork, и воркеры не наследуют соединения и потоки.
+
     Args:
         app (FastAPI): Приложение FastAPI.
 
@@ -23,7 +57,17 @@ async def lifespan(app: FastAPI):
         None: Выполняется при запуске и завершении приложения.
     """
     logger.info("Application startup!")  # Логирование при запуске приложения
+    database.init()  # Двигатель, реплики и фабрика сессий этого процесса
+    await hashing.hasher.dummy_hash()  # Хеш для входа несуществующих пользователей вычисляется заранее
+    if database.replicas is not None:
+        await database.replicas.start()  # Проверка реплик для чтения и фоновый контроль доступности
+    await revocations.start()  # Загрузка отозванных токенов и фоновая подгрузка новых
+    if settings.server.WARMUP:
+        await warmup()
     yield  # Приложение работает здесь
+    await revocations.stop()  # Остановка подгрузки отозванных токенов
+    await database.close()  # Остановка проверки реплик и закрытие всех соединений
+    hashing.hasher.shutdown()  # Остановка пула хеширования паролей
     logger.info("Application shutdown!")  # Логирование при завершении приложения
 
 
@@ -48,6 +92,12 @@ app.add_middleware(
 )
 
 
+# Сбор метрик HTTP запросов
+app.add_middleware(MetricsMiddleware)
+
+
 # Подключение роутеров для маршрутов авторизации и пользователей
 app.include_router(auth_router)  # Роутер для авторизации
+app.include_router(well_known_router)  # Роутер для открытых ключей (JWKS)
 app.include_router(users_router)  # Роутер для работы с пользователями
+app.include_router(system_router)  # Роутер для служебных метрик
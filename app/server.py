@@ -0,0 +1,281 @@
+"""
+Запуск нескольких воркеров uvicorn с предзагрузкой приложения.
+
+Главный процесс один раз импортирует приложение (модули, настройки, ключи подписи,
+маршруты и схему OpenAPI), открывает общий слушающий сокет и создает воркеры через fork.
+Воркеры получают готовое приложение без повторного импорта и принимают соединения из
+одного сокета. Соединения с базой данных и пул хеширования каждый воркер создает сам
+в lifespan (см. app.main), поэтому до fork они не открываются.
+
+Запуск:
+    python -m app.cli serve --workers 4 --port 8000
+"""
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from loguru import logger
+from uvicorn.importer import import_from_string
+
+from app.core import settings
+from app.auth import hashing
+
+# Код завершения воркера, не прошедшего запуск (lifespan завершился ошибкой)
+STARTUP_FAILURE = 3
+
+# Задержка перезапуска упавшего воркера: удваивается при каждом падении подряд от минимальной
+# до максимальной и сбрасывается, если воркер проработал RESTART_RESET_AFTER секунд
+RESTART_BACKOFF_MIN = 0.5
+RESTART_BACKOFF_MAX = 30.0
+RESTART_RESET_AFTER = 60.0
+
+
+# Создание общего слушающего сокета
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """
+    Открывает слушающий TCP сокет, наследуемый воркерами.
+
+    Args:
+        host (str): Адрес.
+        port (int): Порт.
+        backlog (int): Длина очереди входящих соединений.
+
+    Returns:
+        socket.socket: Слушающий сокет.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Arbiter:
+    """
+    Главный процесс: создает воркеры, перезапускает упавшие и останавливает их по сигналу.
+
+    SIGTERM и SIGINT передаются воркерам как SIGTERM: uvicorn перестает принимать соединения,
+    дожидается текущих запросов и выполняет завершение lifespan. Воркеры, не завершившиеся
+    за graceful_timeout, останавливаются SIGKILL. Если воркер не прошел запуск, останавливаются
+    все воркеры: перезапуск с той же ошибкой ничего не даст. Упавший воркер перезапускается
+    с экспоненциальной задержкой (RESTART_BACKOFF_MIN..RESTART_BACKOFF_MAX), чтобы воркер,
+    падающий сразу после запуска, не превращался в непрерывный цикл fork.
+
+    Args:
+        app (FastAPI): Предзагруженное приложение.
+        sock (socket.socket): Общий слушающий сокет.
+        workers (int): Количество воркеров.
+        graceful_timeout (float): Время на завершение текущих запросов в секундах.
+        forwarded_allow_ips (str): Адреса прокси, которым доверяются заголовки X-Forwarded-*.
+    """
+    def __init__(
+        self,
+        app: FastAPI,
+        sock: socket.socket,
+        workers: int,
+        graceful_timeout: float,
+        forwarded_allow_ips: str,
+    ) -> None:
+        self.app = app
+        self.sock = sock
+        self.workers = max(workers, 1)
+        self.graceful_timeout = graceful_timeout
+        self.forwarded_allow_ips = forwarded_allow_ips
+
+        self._children: dict[int, int] = {}  # PID воркера -> номер воркера
+        self._started: dict[int, float] = {}  # Номер воркера -> время последнего запуска
+        self._failures: dict[int, int] = {}  # Номер воркера -> количество падений подряд
+        self._restarts: dict[int, float] = {}  # Номер воркера -> время запланированного перезапуска
+        self._stopping = False
+        self._exit_code = 0
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _serve(self) -> int:
+        """
+        Выполняется в воркере: запускает uvicorn на общем сокете.
+
+        Returns:
+            int: Код завершения воркера.
+        """
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            proxy_headers=True,
+            forwarded_allow_ips=self.forwarded_allow_ips,
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+        server = uvicorn.Server(config)
+        server.run(sockets=[self.sock])
+        return 0 if server.started else STARTUP_FAILURE
+
+    def spawn(self, number: int) -> None:
+        """
+        Создает воркер через fork.
+
+        Args:
+            number (int): Номер воркера (для логов).
+        """
+        pid = os.fork()
+        if pid != 0:
+            self._children[pid] = number
+            self._started[number] = time.monotonic()
+            return
+
+        # Воркер: обработчики главного процесса не нужны, uvicorn установит свои
+        code = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = self._serve()
+        except BaseException:
+            logger.exception("Worker {} crashed", number)
+        finally:
+            os._exit(code)
+
+    def _reap(self) -> None:
+        # Собираем завершившиеся воркеры и перезапускаем их, если остановка не началась
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            number = self._children.pop(pid, None)
+            if number is None or self._stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if code == STARTUP_FAILURE:
+                logger.error("Worker {} (pid {}) failed to start, shutting down", number, pid)
+                self._stopping = True
+                self._exit_code = STARTUP_FAILURE
+                return
+
+            delay = self.restart_delay(number, time.monotonic())
+            logger.warning("Worker {} (pid {}) exited with code {}, restarting in {:.1f}s", number, pid, code, delay)
+            self._restarts[number] = time.monotonic() + delay
+
+    def restart_delay(self, number: int, now: float) -> float:
+        """
+        Учитывает падение воркера и возвращает задержку до его перезапуска.
+
+        Args:
+            number (int): Номер воркера.
+            now (float): Время падения (time.monotonic).
+
+        Returns:
+            float: Задержка в секундах.
+        """
+        if now - self._started.get(number, now) >= RESTART_RESET_AFTER:
+            self._failures[number] = 0  # Воркер работал нормально, падение не считается повторным
+        failures = self._failures.get(number, 0)
+        self._failures[number] = failures + 1
+        return min(RESTART_BACKOFF_MIN * 2 ** failures, RESTART_BACKOFF_MAX)
+
+    def _restart_due(self) -> None:
+        # Перезапускаем воркеры, задержка которых истекла
+        now = time.monotonic()
+        for number, restart_at in list(self._restarts.items()):
+            if restart_at <= now:
+                del self._restarts[number]
+                self.spawn(number)
+
+    def _stop_workers(self) -> None:
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        # Ждем завершения текущих запросов, затем останавливаем оставшиеся воркеры принудительно
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+
+        for pid, number in list(self._children.items()):
+            logger.warning("Worker {} (pid {}) did not stop in time, killing", number, pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._children.clear()
+
+    def run(self) -> int:
+        """
+        Создает воркеры и следит за ними до получения SIGTERM или SIGINT.
+
+        Returns:
+            int: Код завершения главного процесса.
+        """
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        # Объекты, созданные при импорте, не обходятся сборщиком мусора в воркерах,
+        # поэтому страницы памяти главного процесса остаются общими (copy-on-write)
+        gc.collect()
+        gc.freeze()
+
+        for number in range(self.workers):
+            self.spawn(number)
+        logger.info("Started {} workers on {}", self.workers, self.sock.getsockname())
+
+        while not self._stopping:
+            self._reap()
+            if not self._stopping:
+                self._restart_due()
+            time.sleep(0.5)
+
+        self._stop_workers()
+        logger.info("All workers stopped")
+        return self._exit_code
+
+
+# Запуск сервера с предзагрузкой приложения
+def run(
+    host: str = settings.server.HOST,
+    port: int = settings.server.PORT,
+    workers: int = settings.server.WORKERS,
+    app: str = "app.main:app",
+) -> int:
+    """
+    Импортирует приложение, открывает сокет и запускает воркеры.
+
+    Args:
+        host (str): Адрес.
+        port (int): Порт.
+        workers (int): Количество воркеров.
+        app (str): Путь к приложению ("модуль:атрибут").
+
+    Returns:
+        int: Код завершения.
+    """
+    # Предзагрузка: импорт, схема OpenAPI и контекст хеширования (загружаемый лениво)
+    # создаются один раз в главном процессе, и воркеры получают их через fork
+    application = import_from_string(app)
+    application.openapi()
+    hashing.get_context()
+
+    sock = bind_socket(host, port, settings.server.BACKLOG)
+    arbiter = Arbiter(
+        application,
+        sock,
+        workers=workers,
+        graceful_timeout=settings.server.GRACEFUL_TIMEOUT,
+        forwarded_allow_ips=settings.server.FORWARDED_ALLOW_IPS,
+    )
+    try:
+        return arbiter.run()
+    finally:
+        sock.close()
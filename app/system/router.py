@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.core import settings, database, metrics
+from app.auth import hashing, ratelimit
+from app.auth import service as auth_service
+from app.auth import dependencies as auth_depends
+from app.auth.revocation import revocations
+from app.users.cache import user_cache
+
+
+
+# Метрики раскрывают нагрузку и состояние сервиса, поэтому требуют SECURITY_METRICS_TOKEN
+router = APIRouter(tags=["system"], dependencies=[Depends(auth_depends.require_metrics_token)])
+
+# Метрики пулов и кэшей, собираемые при каждом запросе /metrics
+metrics.registry.register(metrics.StatsCollector("db_pool", "Database connection pool", lambda: database.engine.pool.stats()))
+metrics.registry.register(metrics.StatsCollector("password_hashing", "Password hashing pool", hashing.hasher.stats))
+metrics.registry.register(metrics.StatsCollector("token_cache", "Verified token cache", auth_service.token_cache.stats))
+metrics.registry.register(metrics.StatsCollector("user_cache", "User lookup cache", user_cache.stats))
+metrics.registry.register(metrics.StatsCollector("revoked_families", "Revoked refresh token families", auth_service.revoked_families.stats))
+metrics.registry.register(metrics.StatsCollector("recent_refreshes", "Recent refresh token rotations", auth_service.recent_refreshes.stats))
+metrics.registry.register(metrics.StatsCollector("token_revocations", "Revoked access tokens", revocations.stats))
+if settings.replica_urls:
+    metrics.registry.register(metrics.StatsCollector("db_replicas", "Database read replicas", lambda: database.replicas.stats()))
+if ratelimit.login_limiter is not None:
+    metrics.registry.register(metrics.StatsCollector("login_rate_limit", "Login rate limiter buckets", ratelimit.login_limiter.stats))
+
+
+# Маршрут для получения метрик пула соединений с базой данных
+@router.get('/system/pool')
+async def get_pool_stats():
+    """
+    Возвращает метрики пула соединений текущего воркера.
+
+    Returns:
+        dict: Размер пула, выданные соединения, переполнение, время ожидания и таймауты (и для каждой реплики).
+    """
+    return database.pool_stats()
+
+
+# Маршрут для получения метрик в формате Prometheus
+@router.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Возвращает метрики текущего воркера в текстовом формате Prometheus.
+
+    Returns:
+        PlainTextResponse: Текст метрик.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,258 @@
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from app.core import settings
+from app.core.cache import LRUCache, SingleFlight
+from app.users import schemas as users_schemas
+
+# Маркер промаха кэша (None в кэше означает "пользователь не найден")
+MISSING = object()
+
+
+class UserCacheBackend:
+    """
+    Интерфейс хранилища кэша пользователей.
+
+    Значение записи - users_schemas.UserInDB или None (отрицательная запись).
+    При промахе методы get возвращают MISSING.
+    """
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def set(self, key: str, value: users_schemas.UserInDB | None, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryUserCache(UserCacheBackend):
+    """
+    Кэш пользователей в памяти процесса с вытеснением LRU.
+
+    Args:
+        maxsize (int): Максимальное количество записей.
+        ttl (float): Время жизни записи по умолчанию в секундах.
+    """
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str):
+        return self._cache.get(key, MISSING)
+
+    async def set(self, key: str, value: users_schemas.UserInDB | None, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.pop(key)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class RedisUserCache(UserCacheBackend):
+    """
+    Общий для всех воркеров кэш пользователей в Redis.
+
+    Требует установленного пакета redis. Ошибки Redis не прерывают запрос:
+    они логируются, а запрос обслуживается базой данных.
+
+    Записи содержат хеш пароля (UserInDB.hashed_password), по которому вход проверяется
+    без запроса к базе данных. Любой, кто читает этот Redis, получает хеши паролей для
+    перебора, поэтому Redis должен быть доступен только приложению.
+
+    Args:
+        url (str): URL подключения к Redis.
+        prefix (str): Префикс ключей.
+    """
+    def __init__(self, url: str, prefix: str = "users:") -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("Redis user cache backend requires the 'redis' package") from exc
+
+        self._client = redis_asyncio.from_url(url)
+        self._prefix = prefix
+        self.errors = 0
+
+    async def get(self, key: str):
+        try:
+            raw = await self._client.get(self._prefix + key)
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("Redis user cache get failed: {}", exc)
+            return MISSING
+
+        if raw is None:
+            return MISSING
+        if raw == b"null":
+            return None
+        return users_schemas.UserInDB.model_validate_json(raw)
+
+    async def set(self, key: str, value: users_schemas.UserInDB | None, ttl: float) -> None:
+        raw = b"null" if value is None else value.model_dump_json()
+        try:
+            await self._client.set(self._prefix + key, raw, px=max(int(ttl * 1000), 1))
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("Redis user cache set failed: {}", exc)
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self._client.delete(*(self._prefix + key for key in keys))
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("Redis user cache delete failed: {}", exc)
+
+    def stats(self) -> dict:
+        return {"errors": self.errors}
+
+
+class UserCache:
+    """
+    Кэш поиска пользователей по ID и имени пользователя.
+
+    Хранит найденных пользователей под обоими ключами, запоминает отсутствующие
+    имена пользователей на короткое время и объединяет одновременные запросы
+    одного и того же ключа в один запрос к базе данных.
+
+    Attributes:
+        backend (UserCacheBackend | None): Хранилище кэша (None - кэш отключен).
+        ttl (float): Время жизни найденного пользователя в секундах.
+        negative_ttl (float): Время жизни записи об отсутствующем имени пользователя в секундах.
+    """
+    def __init__(self, backend: UserCacheBackend | None, ttl: float, negative_ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._flights = SingleFlight()
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[users_schemas.UserInDB | None]],
+        negative: bool = False,
+    ) -> users_schemas.UserInDB | None:
+        """
+        Возвращает пользователя из кэша или загружает его с помощью loader.
+
+        Args:
+            key (str): Ключ кэша (см. id_key и username_key).
+            loader (Callable): Функция загрузки пользователя из базы данных.
+            negative (bool): Кэшировать ли отсутствие пользователя.
+
+        Returns:
+            users_schemas.UserInDB | None: Найденный пользователь или None.
+        """
+        if self.backend is None:
+            return await loader()
+
+        cached = await self.backend.get(key)
+        if cached is not MISSING:
+            return cached
+
+        return await self._flights.do(key, lambda: self._load(key, loader, negative))
+
+    async def peek(self, key: str):
+        """
+        Возвращает запись кэша без обращения к базе данных.
+
+        Args:
+            key (str): Ключ кэша.
+
+        Returns:
+            users_schemas.UserInDB | None | MISSING: Пользователь, отрицательная запись или MISSING при промахе.
+        """
+        if self.backend is None:
+            return MISSING
+        return await self.backend.get(key)
+
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[users_schemas.UserInDB | None]],
+        negative: bool,
+    ) -> users_schemas.UserInDB | None:
+        user = await loader()
+
+        if user is not None:
+            # Сохраняем пользователя под обоими ключами
+            await self.backend.set(id_key(user.id), user, self.ttl)
+            await self.backend.set(username_key(user.username), user, self.ttl)
+        elif negative:
+            await self.backend.set(key, None, self.negative_ttl)
+
+        return user
+
+    async def invalidate(self, user_id: int | None = None, username: str | None = None) -> None:
+        """
+        Удаляет записи пользователя из кэша.
+
+        Args:
+            user_id (int | None): ID пользователя.
+            username (str | None): Имя пользователя.
+        """
+        if self.backend is None:
+            return
+
+        keys = []
+        if user_id is not None:
+            keys.append(id_key(user_id))
+        if username is not None:
+            keys.append(username_key(username))
+        if keys:
+            await self.backend.delete(*keys)
+
+    def stats(self) -> dict:
+        """
+        Возвращает метрики кэша.
+
+        Returns:
+            dict: Метрики хранилища и число выполняемых загрузок.
+        """
+        if self.backend is None:
+            return {"backend": "none"}
+        return {"backend": type(self.backend).__name__, "inflight": len(self._flights), **self.backend.stats()}
+
+
+def id_key(user_id: int) -> str:
+    return f"id:{user_id}"
+
+
+def username_key(username: str) -> str:
+    # Без учета регистра все варианты написания имени попадают в одну запись
+    if settings.security.USERNAME_CASE_INSENSITIVE:
+        username = username.lower()
+    return f"username:{username}"
+
+
+# Создание хранилища кэша на основе настроек
+def create_backend(name: str) -> UserCacheBackend | None:
+    """
+    Создает хранилище кэша пользователей по имени.
+
+    Args:
+        name (str): "memory", "redis" или "none".
+
+    Returns:
+        UserCacheBackend | None: Хранилище кэша или None, если кэш отключен.
+    """
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryUserCache(maxsize=settings.cache.USER_CACHE_SIZE, ttl=settings.cache.USER_CACHE_TTL)
+    if name == "redis":
+        return RedisUserCache(settings.cache.REDIS_URL)
+    raise ValueError(f"Unknown user cache backend: {name!r}")
+
+
+user_cache = UserCache(
+    backend=create_backend(settings.cache.USER_CACHE_BACKEND),
+    ttl=settings.cache.USER_CACHE_TTL,
+    negative_ttl=settings.cache.USER_NEGATIVE_CACHE_TTL,
+)
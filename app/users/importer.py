@@ -0,0 +1,299 @@
+import asyncio
+import codecs
+import csv
+import json
+import re
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import settings
+from app.auth import hashing
+from app.users import schemas as users_schemas
+from app.users import models as users_models
+from app.users.cache import user_cache
+
+# Максимальный размер пакета вставки: 2 параметра на строку, лимит PostgreSQL - 32767 параметров
+MAX_BATCH_SIZE = 32767 // 2
+
+# Размер пакета вставки по умолчанию
+BATCH_SIZE = settings.database.IMPORT_BATCH_SIZE
+
+# Размер куска, читаемого из загруженного файла
+READ_CHUNK_SIZE = 64 * 1024
+
+# Концы строк, как у TextIOWrapper(newline=""): \r\n, \r или \n
+_LINE_END = re.compile(r"\r\n|\r|\n")
+
+# Максимальное количество ошибок, сохраняемых в отчете
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportRow:
+    line: int
+    username: str
+    password: str | None
+    hashed_password: str | None
+
+
+# Чтение строк из двоичного файла
+def read_lines(stream: BinaryIO, encoding: str = "utf-8-sig") -> Iterator[str]:
+    """
+    Построчно декодирует двоичный файл, сохраняя концы строк (как TextIOWrapper с newline="").
+
+    Используется для загруженных файлов: SpooledTemporaryFile в Python 3.10 не реализует
+    readable() и не может быть обернут в TextIOWrapper.
+
+    Args:
+        stream (BinaryIO): Двоичный файл.
+        encoding (str): Кодировка (по умолчанию UTF-8 с необязательной BOM).
+
+    Yields:
+        str: Строки файла.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        data = pending + decoder.decode(chunk, final=not chunk)
+        start = 0
+        for match in _LINE_END.finditer(data):
+            if chunk and match.end() == len(data) and match.group() == "\r":
+                break  # \r в конце куска может оказаться началом \r\n
+            yield data[start:match.end()]
+            start = match.end()
+        pending = data[start:]
+        if not chunk:
+            break
+    if pending:
+        yield pending
+
+
+# Чтение записей из CSV или JSONL
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Построчно читает записи пользователей из CSV (с заголовком) или JSONL.
+
+    Args:
+        lines (Iterable[str]): Строки входного файла.
+        fmt (str): Формат файла: "csv" или "jsonl".
+
+    Yields:
+        tuple: Номер строки, запись (или None) и текст ошибки разбора (или None).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row, None
+
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_no, None, f"Invalid JSON: {exc}"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, row, None
+
+    else:
+        raise ValueError(f"Unknown import format: {fmt!r}")
+
+
+# Проверка записи пользователя
+def parse_row(line: int, row: dict) -> ImportRow | str:
+    """
+    Проверяет запись и преобразует ее в строку импорта.
+
+    Запись должна содержать username и либо password, либо hashed_password
+    (хеш в формате, поддерживаемом контекстом хеширования, переносится без повторного хеширования).
+
+    Args:
+        line (int): Номер строки во входном файле.
+        row (dict): Запись пользователя.
+
+    Returns:
+        ImportRow | str: Строка импорта или текст ошибки.
+    """
+    username = row.get("username")
+    password = row.get("password") or None
+    hashed_password = row.get("hashed_password") or None
+
+    if not isinstance(username, str) or not username.strip():
+        return "Missing username"
+    if hashed_password is not None:
+        if not isinstance(hashed_password, str) or hashing.get_context().identify(hashed_password) is None:
+            return "Unsupported password hash"
+    elif not isinstance(password, str):
+        return "Missing password"
+
+    return ImportRow(line=line, username=username, password=password, hashed_password=hashed_password)
+
+
+class UserImporter:
+    """
+    Массовый импорт пользователей.
+
+    Пароли пакета хешируются параллельно, пока предыдущий пакет вставляется в базу данных
+    одним запросом INSERT ... ON CONFLICT DO NOTHING. Входной файл читается в отдельном
+    потоке, чтобы чтение с диска не блокировало цикл событий.
+
+    Пароли хешируются в переданном пуле (команда import-users создает собственный пул процессов)
+    или, без пула, в пуле хеширования воркера (hashing.hasher) через его лимит одновременных
+    операций: импорт через API занимает не больше workers слотов, остальные остаются входам.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных (каждый пакет - отдельная транзакция).
+        executor (Executor | None): Пул для хеширования паролей (None - пул хеширования воркера).
+        workers (int): Количество воркеров пула (на столько частей делится пакет) или, без пула,
+            максимальное число паролей, хешируемых одновременно.
+        batch_size (int): Размер пакета (не больше MAX_BATCH_SIZE).
+        on_error (Callable | None): Вызывается для каждой ошибочной строки.
+    """
+    def __init__(
+        self,
+        session: AsyncSession,
+        executor: Executor | None,
+        workers: int,
+        batch_size: int = BATCH_SIZE,
+        on_error: Callable[[users_schemas.ImportRowError], None] | None = None,
+    ) -> None:
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        self.session = session
+        self.executor = executor
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.report = users_schemas.ImportReport()
+
+    def _error(self, line: int, username: str | None, error: str) -> None:
+        row_error = users_schemas.ImportRowError(line=line, username=username, error=error)
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(row_error)
+        if self.on_error is not None:
+            self.on_error(row_error)
+
+    def _batches(self, records: Iterable[tuple[int, dict | None, str | None]]) -> Iterator[list[ImportRow]]:
+        batch = []
+        seen = set()  # Имена пользователей текущего пакета
+
+        for line, row, error in records:
+            self.report.total += 1
+
+            if error is None:
+                parsed = parse_row(line, row)
+                if isinstance(parsed, str):
+                    error = parsed
+            if error is not None:
+                self.report.invalid += 1
+                self._error(line, row.get("username") if isinstance(row, dict) else None, error)
+                continue
+
+            if parsed.username in seen:
+                self.report.duplicates += 1
+                self._error(line, parsed.username, "Username already exists!")
+                continue
+
+            seen.add(parsed.username)
+            batch.append(parsed)
+
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch, seen = [], set()
+
+        if batch:
+            yield batch
+
+    async def _hash_batch(self, batch: list[ImportRow]) -> list[ImportRow]:
+        rows = [row for row in batch if row.hashed_password is None]
+        if not rows:
+            return batch
+
+        if self.executor is None:
+            # Пул хеширования воркера: каждый пароль - отдельная операция в общей очереди с входами
+            limit = asyncio.Semaphore(self.workers)
+
+            async def hash_row(row: ImportRow) -> None:
+                async with limit:
+                    row.hashed_password = await hashing.hasher.hash(row.password)
+
+            await asyncio.gather(*(hash_row(row) for row in rows))
+            return batch
+
+        # Делим пакет на части по количеству воркеров пула
+        loop = asyncio.get_running_loop()
+        chunk_size = -(-len(rows) // self.workers)
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, hashing.hash_passwords_sync, [row.password for row in chunk])
+            for chunk in chunks
+        ))
+
+        for chunk, hashes in zip(chunks, results):
+            for row, hashed_password in zip(chunk, hashes):
+                row.hashed_password = hashed_password
+        return batch
+
+    async def _insert_batch(self, batch: list[ImportRow]) -> None:
+        statement = (
+            insert(users_models.Users)
+            .values([{"username": row.username, "hashed_password": row.hashed_password} for row in batch])
+            .on_conflict_do_nothing()
+            .returning(users_models.Users.username)
+        )
+        try:
+            async with self.session.begin():
+                result = await self.session.execute(statement)
+                created = set(result.scalars().all())
+        except Exception as exc:
+            for row in batch:
+                self.report.failed += 1
+                self._error(row.line, row.username, f"Database error: {exc.__class__.__name__}")
+            return
+
+        for row in batch:
+            if row.username in created:
+                self.report.created += 1
+                await user_cache.invalidate(username=row.username)  # Сбрасываем отрицательные записи кэша
+            else:
+                self.report.duplicates += 1
+                self._error(row.line, row.username, "Username already exists!")
+
+    async def run(self, records: Iterable[tuple[int, dict | None, str | None]]) -> users_schemas.ImportReport:
+        """
+        Импортирует пользователей из записей.
+
+        Args:
+            records (Iterable): Записи, полученные из read_records.
+
+        Returns:
+            users_schemas.ImportReport: Отчет об импорте.
+        """
+        pending = None  # Пакет, который хешируется, пока вставляется предыдущий
+        batches = self._batches(records)
+
+        try:
+            # Следующий пакет читается в потоке, пока предыдущий хешируется
+            while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+                previous, pending = pending, asyncio.ensure_future(self._hash_batch(batch))
+                if previous is not None:
+                    await self._insert_batch(await previous)
+
+            if pending is not None:
+                await self._insert_batch(await pending)
+        finally:
+            # При ошибке не оставляем хеширование следующего пакета выполняться в фоне
+            if pending is not None and not pending.done():
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+
+        return self.report
@@ -1,10 +1,25 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, func
 
 from app.core import Base
 
 
 class Users(Base):
     __tablename__ = "users"
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, unique=True, index=True)
-    hashed_password = Column(String)
\ No newline at end of file
+    __table_args__ = (
+        # Покрывающий индекс: поиск по имени читает id и хеш пароля из индекса без обращения к таблице
+        Index("ix_users_username", "username", unique=True, postgresql_include=["id", "hashed_password"]),
+    )
+    id = Column(Integer, primary_key=True)
+    username = Column(String, nullable=False)
+    hashed_password = Column(String, nullable=False)
+
+
+# Имена, различающиеся только регистром, запрещены; поиск без учета регистра идет по этому индексу.
+# Вставка пользователей поэтому использует ON CONFLICT DO NOTHING без цели: имя может
+# конфликтовать с любым из двух уникальных индексов
+Index(
+    "ix_users_username_lower",
+    func.lower(Users.username),
+    unique=True,
+    postgresql_include=["id", "username", "hashed_password"],
+)
@@ -1,17 +1,21 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import get_db_session
+from app.core.responses import ModelResponse
 from app.users import schemas as users_schemas
+from app.users import importer as users_importer
 from app.auth import dependencies as auth_depends
+from app.auth import hashing
 
 
 
 router = APIRouter(prefix="/users", tags={"users"})
 
 # Маршрут для получения текущего авторизованного пользователя
-@router.get('/me')
+@router.get('/me', response_model=users_schemas.User)
 async def get_current_user(
     user: Annotated[users_schemas.User, Depends(auth_depends.get_current_user)]
 ):
@@ -22,6 +26,32 @@ async def get_current_user(
         user (users_schemas.User): Данные пользователя, которые извлекаются с помощью зависимости auth_depends.get_current_user.
 
     Returns:
-        users_schemas.User: Данные авторизованного пользователя.
+        ModelResponse: Данные авторизованного пользователя (users_schemas.User).
     """
-    return user
\ No newline at end of file
+    return ModelResponse(user)
+
+
+# Маршрут для массового импорта пользователей из CSV или JSONL
+@router.post('/import', response_model=users_schemas.ImportReport, dependencies=[Depends(auth_depends.require_import_token)])
+async def import_users(
+    file: UploadFile,
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    format: Literal["csv", "jsonl"] | None = None,
+):
+    """
+    Импортирует пользователей из файла CSV (с заголовком username,password) или JSONL.
+    Требует заголовок X-Import-Token, совпадающий с SECURITY_IMPORT_TOKEN.
+
+    Args:
+        file (UploadFile): Файл с пользователями.
+        session (AsyncSession): Сессия базы данных.
+        format (str | None): Формат файла (по умолчанию определяется по расширению).
+
+    Returns:
+        users_schemas.ImportReport: Количество созданных, повторяющихся и ошибочных строк и ошибки по строкам.
+    """
+    fmt = format or ("csv" if (file.filename or "").endswith(".csv") else "jsonl")
+    # Пароли хешируются в пуле хеширования воркера, созданном в lifespan; импорт занимает
+    # не больше половины его слотов, чтобы входы пользователей не ждали весь пакет
+    importer = users_importer.UserImporter(session, None, workers=max(hashing.hasher.max_concurrency // 2, 1))
+    return await importer.run(users_importer.read_records(users_importer.read_lines(file.file), fmt))
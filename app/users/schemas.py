@@ -8,4 +8,23 @@ class UserCreate(BaseModel):
 
 class User(BaseModel):
     id: int
-    username: str
\ No newline at end of file
+    username: str
+
+
+class UserInDB(User):
+    hashed_password: str
+
+
+class ImportRowError(BaseModel):
+    line: int
+    username: str | None = None
+    error: str
+
+
+class ImportReport(BaseModel):
+    total: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = Field(default_factory=list)
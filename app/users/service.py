@@ -1,76 +1,196 @@
 from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy import func, lambda_stmt, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
+from app.core import settings, database, metrics
 from app.users import schemas as users_schemas
 from app.users import models as users_models
+from app.users.cache import user_cache, id_key, username_key
 from app.auth import service as auth_service
 
 
 # Создание нового пользователя
-async def create_user(form_data: users_schemas.UserCreate, session: AsyncSession):
+async def create_user(form_data: users_schemas.UserCreate, session: AsyncSession) -> users_schemas.UserInDB:
     """
-    Создает нового пользователя в базе данных.
+    Создает нового пользователя в базе данных одним запросом INSERT ... ON CONFLICT DO NOTHING.
+    Конфликт по имени пользователя (в том числе при одновременной регистрации) приводит к ошибке 400.
+
+    Пользователь виден другим запросам только после фиксации транзакции, поэтому записи кэша
+    (отрицательную запись имени) сбрасывает вызывающий код после фиксации:
+    user_cache.invalidate(user_id=..., username=...). Сброс до фиксации не помогает:
+    параллельный поиск по имени снова закэширует отсутствие пользователя.
 
     Args:
         form_data (users_schemas.UserCreate): Данные для создания пользователя (включая имя пользователя и пароль).
         session (AsyncSession): Асинхронная сессия базы данных.
 
     Returns:
-        users_models.Users: Новый созданный пользователь.
+        users_schemas.UserInDB: Новый созданный пользователь.
 
     Raises:
         HTTPException: Если имя пользователя уже существует в базе данных.
     """
-    # Проверяем, существует ли пользователь с таким именем
-    if await get_user_by_username(form_data.username, session) is not None:
+    # Занятое имя из кэша отклоняем сразу, не тратя время на хеширование
+    if isinstance(await user_cache.peek(username_key(form_data.username)), users_schemas.UserInDB):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists!")
 
-    # Создаем нового пользователя с хешированным паролем
-    new_user = users_models.Users(
-        **form_data.model_dump(exclude={"password"}),  # Извлекаем данные формы, кроме пароля
-        hashed_password=auth_service.get_password_hash(form_data.password)  # Хешируем пароль
+    hashed_password = await auth_service.get_password_hash(form_data.password)  # Хешируем пароль
+
+    # Создаем нового пользователя, пропуская вставку при конфликте имени
+    statement = (
+        insert(users_models.Users)
+        .values(
+            **form_data.model_dump(exclude={"password"}),  # Извлекаем данные формы, кроме пароля
+            hashed_password=hashed_password,
+        )
+        .on_conflict_do_nothing()
+        .returning(users_models.Users.id)
     )
-    
-    session.add(new_user)  # Добавляем нового пользователя в сессию
+    with metrics.DB_QUERY_SECONDS.time("create_user"):
+        result = await session.execute(statement)  # Выполняем запрос
+    user_id = result.scalar_one_or_none()  # None, если имя пользователя уже занято
+
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists!")
+
+    return users_schemas.UserInDB(id=user_id, username=form_data.username, hashed_password=hashed_password)
+
+
+# Перехеширование пароля с текущими настройками
+async def rehash_password(user: users_schemas.UserInDB, password: str) -> None:
+    """
+    Пересчитывает хеш пароля с текущей схемой и стоимостью и сохраняет его.
+    Выполняется в фоне после успешного входа в собственной сессии базы данных.
+    Хеш обновляется, только если он не изменился с момента входа.
+
+    Args:
+        user (users_schemas.UserInDB): Пользователь с устаревшим хешем.
+        password (str): Проверенный пароль пользователя.
+    """
+    try:
+        hashed_password = await auth_service.get_password_hash(password)  # Хешируем пароль
 
-    await session.flush()  # Применяем изменения в базе данных
+        async with database.create_session() as session, session.begin():
+            statement = (
+                update(users_models.Users)
+                .where(users_models.Users.id == user.id)
+                .where(users_models.Users.hashed_password == user.hashed_password)
+                .values(hashed_password=hashed_password)
+            )
+            with metrics.DB_QUERY_SECONDS.time("rehash_password"):
+                await session.execute(statement)
 
-    return new_user
+        await user_cache.invalidate(user_id=user.id, username=user.username)
+
+    except Exception as exc:
+        logger.warning("Password rehash for user {} failed: {}", user.id, exc)
 
 
 # Получение пользователя по имени пользователя
-async def get_user_by_username(username: str, session: AsyncSession):
+async def get_user_by_username(username: str, session: AsyncSession) -> users_schemas.UserInDB | None:
     """
-    Получает пользователя из базы данных по имени пользователя.
+    Получает пользователя по имени пользователя через кэш пользователей.
+    Отсутствие пользователя кэшируется на CACHE_USER_NEGATIVE_CACHE_TTL секунд.
 
     Args:
         username (str): Имя пользователя для поиска.
         session (AsyncSession): Асинхронная сессия базы данных.
 
     Returns:
-        users_models.Users or None: Найденный пользователь или None, если пользователь не найден.
+        users_schemas.UserInDB or None: Найденный пользователь или None, если пользователь не найден.
     """
-    # Формируем SQL-запрос для поиска пользователя по имени
-    statement = select(users_models.Users).where(users_models.Users.username == username)
-    result = await session.execute(statement)  # Выполняем запрос
-    return result.scalars().first()  # Возвращаем первого найденного пользователя или None
+    return await user_cache.get_or_load(
+        username_key(username),
+        lambda: _fetch_user("get_user_by_username", _user_by_username_statement(username), session),
+        negative=True,
+    )
 
 
 # Получение пользователя по ID
-async def get_user_by_id(user_id: int, session: AsyncSession):
+async def get_user_by_id(user_id: int, session: AsyncSession) -> users_schemas.UserInDB | None:
     """
-    Получает пользователя из базы данных по ID.
+    Получает пользователя по ID через кэш пользователей.
 
     Args:
         user_id (int): Идентификатор пользователя для поиска.
         session (AsyncSession): Асинхронная сессия базы данных.
 
     Returns:
-        users_models.Users or None: Найденный пользователь или None, если пользователь не найден.
+        users_schemas.UserInDB or None: Найденный пользователь или None, если пользователь не найден.
+    """
+    return await user_cache.get_or_load(
+        id_key(user_id),
+        lambda: _fetch_user("get_user_by_id", _user_by_id_statement(user_id), session),
+    )
+
+
+# Прогрев запросов пользователя
+async def warmup_queries(session: AsyncSession) -> None:
+    """
+    Выполняет запросы пользователя по имени и по ID в обход кэша, чтобы лямбды запросов
+    были разобраны и скомпилированы до первого запроса воркера.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+    """
+    await session.execute(_user_by_username_statement(""))
+    await session.execute(_user_by_id_statement(0))
+
+
+# Запросы пользователя: только нужные колонки без загрузки ORM объектов.
+# lambda_stmt строит и компилирует запрос один раз и кэширует его по месту определения
+# лямбды; при следующих вызовах подставляется только параметр. Стабильный текст запроса
+# попадает в кэш подготовленных выражений asyncpg (DATABASE_PREPARED_STATEMENT_CACHE_SIZE).
+def _user_by_username_statement(username: str) -> StatementLambdaElement:
+    if settings.security.USERNAME_CASE_INSENSITIVE:
+        username = username.lower()
+    return lambda_stmt(lambda: select(*_USER_COLUMNS).where(_USERNAME == username))
+
+
+def _user_by_id_statement(user_id: int) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(*_USER_COLUMNS).where(users_models.Users.id == user_id))
+
+
+_USER_COLUMNS = (users_models.Users.id, users_models.Users.username, users_models.Users.hashed_password)
+
+# Колонка поиска по имени: выражение совпадает с индексом ix_users_username или ix_users_username_lower,
+# и оба индекса покрывают _USER_COLUMNS (поиск выполняется как Index Only Scan)
+_USERNAME = (
+    func.lower(users_models.Users.username)
+    if settings.security.USERNAME_CASE_INSENSITIVE
+    else users_models.Users.username
+)
+
+
+# Выполнение запроса пользователя в базе данных
+async def _fetch_user(query: str, statement, session: AsyncSession) -> users_schemas.UserInDB | None:
+    """
+    Выполняет запрос пользователя и преобразует результат в данные для кэша.
+
+    Args:
+        query (str): Имя запроса для метрик.
+        statement: SQL-запрос, выбирающий колонки id, username и hashed_password.
+        session (AsyncSession): Асинхронная сессия базы данных.
+
+    Returns:
+        users_schemas.UserInDB or None: Найденный пользователь или None, если пользователь не найден.
     """
-    # Формируем SQL-запрос для поиска пользователя по ID
-    statement = select(users_models.Users).where(users_models.Users.id == user_id)
-    result = await session.execute(statement)  # Выполняем запрос
-    return result.scalars().first()  # Возвращаем первого найденного пользователя или None
+    with metrics.DB_QUERY_SECONDS.time(query):
+        result = await session.execute(statement)  # Выполняем запрос
+    row = result.first()  # Получаем первую найденную строку или None
+
+    # Реплика может еще не получить только что созданного пользователя - проверяем основную базу
+    if row is None and database.replicas is not None:
+        with metrics.DB_QUERY_SECONDS.time(query):
+            result = await session.execute(statement.execution_options(use_primary=True))
+        row = result.first()
+
+    if row is None:
+        return None
 
+    # Строка из базы данных не требует повторной проверки pydantic
+    return users_schemas.UserInDB.model_construct(id=row.id, username=row.username, hashed_password=row.hashed_password)
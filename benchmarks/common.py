@@ -0,0 +1,149 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from app.core import Base, database
+from app.auth import models as auth_models  # noqa: F401 - регистрирует таблицы в Base.metadata
+from app.users import models as users_models  # noqa: F401
+from app.users import schemas as users_schemas
+from app.users import service as users_service
+from app.users.cache import user_cache
+
+# Сохраненные результаты для сравнения
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Пользователь, от имени которого выполняются бенчмарки
+BENCH_USERNAME = "bench-user"
+BENCH_PASSWORD = "bench-password"
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """
+    Считает перцентили задержки и пропускную способность.
+
+    Args:
+        latencies (list[float]): Задержки отдельных операций в секундах.
+        elapsed (float): Общее время прогона в секундах.
+
+    Returns:
+        dict: Количество операций, RPS и p50/p95/p99 в миллисекундах.
+    """
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    def percentile(p: float) -> float:
+        return latencies[min(int(count * p), count - 1)] * 1000
+
+    return {
+        "count": count,
+        "rps": count / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def measure_sync(func: Callable[[], object], count: int) -> dict:
+    """
+    Измеряет синхронную функцию, вызывая ее count раз подряд (после одного прогревочного вызова).
+    """
+    func()  # Прогрев: ленивые импорты, загрузка бэкендов, создание пулов
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def measure_async(func: Callable[[int], Awaitable[object]], count: int, concurrency: int) -> dict:
+    """
+    Измеряет асинхронную функцию, выполняя count вызовов с ограничением одновременности.
+    Функция получает порядковый номер вызова (-1 - прогревочный вызов, не измеряется).
+    """
+    await func(-1)  # Прогрев: ленивые импорты, загрузка бэкендов, создание пулов
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            call_started = time.perf_counter()
+            await func(i)
+            latencies.append(time.perf_counter() - call_started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def prepare_database() -> users_schemas.UserInDB:
+    """
+    Готовит базу данных: для SQLite создает таблицы, затем создает пользователя бенчмарков.
+
+    Returns:
+        users_schemas.UserInDB: Пользователь бенчмарков.
+    """
+    if database.engine.dialect.name == "sqlite":
+        async with database.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    async with database.create_session() as session, session.begin():
+        user = await users_service.get_user_by_username(BENCH_USERNAME, session)
+        created = user is None
+        if created:
+            form_data = users_schemas.UserCreate(username=BENCH_USERNAME, password=BENCH_PASSWORD)
+            user = await users_service.create_user(form_data, session)
+    if created:
+        await user_cache.invalidate(user_id=user.id, username=user.username)  # После фиксации транзакции
+    return user
+
+
+def load_baseline(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, results: dict) -> None:
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Сравнивает результаты с базовыми и возвращает список регрессий.
+
+    Регрессией считается рост p95 или падение RPS больше, чем на tolerance (доля).
+
+    Args:
+        results (dict): Текущие результаты.
+        baseline (dict): Базовые результаты.
+        tolerance (float): Допустимое отклонение.
+
+    Returns:
+        list[str]: Описания регрессий.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.3f}ms -> {current['p95_ms']:.3f}ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {current['rps']:.1f}")
+    return regressions
+
+
+def print_results(results: dict, baseline: dict | None) -> None:
+    print(f"{'benchmark':<32} {'count':>7} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'p95 vs base':>12}")
+    for name, result in results.items():
+        delta = ""
+        if baseline and name in baseline and baseline[name]["p95_ms"] > 0:
+            delta = f"{(result['p95_ms'] / baseline[name]['p95_ms'] - 1) * 100:+.1f}%"
+        print(
+            f"{name:<32} {result['count']:>7} {result['rps']:>10.1f} "
+            f"{result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {delta:>12}"
+        )
@@ -0,0 +1,179 @@
+"""
+Планы поиска пользователя по имени до и после миграций e7d4b2a9c1f3 и f2a6c8d0b4e1
+(EXPLAIN ANALYZE, BUFFERS).
+
+Создает временные таблицы с прежней схемой users (колонки без NOT NULL, индекс ix_users_id,
+уникальный индекс имени) и с новой (покрывающие индексы username и lower(username)),
+заполняет их одинаковыми пользователями, выполняет VACUUM ANALYZE и сравнивает:
+
+- план поиска по имени с учетом и без учета регистра (SECURITY_USERNAME_CASE_INSENSITIVE):
+  тип узла, Heap Fetches, прочитанные буферы, время выполнения;
+- размер индексов таблицы;
+- время вставки пакета пользователей (обслуживание индексов).
+
+Требует PostgreSQL 11+ (настройки DATABASE_*); основная таблица users не изменяется.
+
+Запуск:
+    python -m benchmarks.explain --rows 100000 --lookups 200 --insert-rows 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core import database
+
+# Хеш bcrypt занимает 60 символов; значение не проверяется, важна только ширина строки
+HASHED_PASSWORD = "$2b$12$" + "x" * 53
+
+
+# Схема после миграций e7d4b2a9c1f3 и f2a6c8d0b4e1
+def after_ddl(table: str) -> tuple[str, ...]:
+    return (
+        f"CREATE TEMP TABLE {table} (id serial PRIMARY KEY, username varchar NOT NULL, hashed_password varchar NOT NULL)",
+        f"CREATE UNIQUE INDEX {table}_username ON {table} (username) INCLUDE (id, hashed_password)",
+        f"CREATE UNIQUE INDEX {table}_username_lower ON {table} (lower(username)) INCLUDE (id, username, hashed_password)",
+    )
+
+
+# Варианты: название, таблица, DDL, выражение поиска по имени
+VARIANTS = (
+    (
+        "before",
+        "users_before",
+        (
+            "CREATE TEMP TABLE users_before (id serial PRIMARY KEY, username varchar, hashed_password varchar)",
+            "CREATE INDEX users_before_id ON users_before (id)",
+            "CREATE UNIQUE INDEX users_before_username ON users_before (username)",
+        ),
+        "username = :username",
+    ),
+    ("after", "users_after", after_ddl("users_after"), "username = :username"),
+    ("after, lower()", "users_after_ci", after_ddl("users_after_ci"), "lower(username) = lower(:username)"),
+)
+
+
+async def fill(conn: AsyncConnection, table: str, start: int, stop: int) -> float:
+    """
+    Вставляет пользователей user-<start>..user-<stop - 1> одним запросом.
+
+    Returns:
+        float: Время вставки в секундах.
+    """
+    started = time.perf_counter()
+    await conn.execute(
+        text(
+            f"INSERT INTO {table} (username, hashed_password) "
+            f"SELECT 'user-' || i, CAST(:hashed_password AS varchar) "
+            f"FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer) - 1) AS i"
+        ),
+        {"hashed_password": HASHED_PASSWORD, "start": start, "stop": stop},
+    )
+    return time.perf_counter() - started
+
+
+async def explain_lookups(conn: AsyncConnection, table: str, condition: str, usernames: list[str]) -> dict:
+    """
+    Выполняет EXPLAIN (ANALYZE, BUFFERS) поиска пользователя для каждого имени.
+
+    Returns:
+        dict: Тип узла плана и индекс, средние Heap Fetches и буферы, медиана времени выполнения в мс.
+    """
+    statement = text(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+        f"SELECT id, username, hashed_password FROM {table} WHERE {condition}"
+    )
+    nodes, heap_fetches, buffers, execution = [], [], [], []
+    for username in usernames:
+        result = (await conn.execute(statement, {"username": username})).scalar_one()
+        explained = (json.loads(result) if isinstance(result, str) else result)[0]
+        plan = explained["Plan"]
+        nodes.append(f"{plan['Node Type']} ({plan.get('Index Name', '-')})")
+        # Index Scan читает из таблицы каждую найденную строку, Index Only Scan - только невидимые по карте видимости
+        heap_fetches.append(plan.get("Heap Fetches", plan["Actual Rows"]))
+        buffers.append(plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0))
+        execution.append(explained["Execution Time"])
+
+    return {
+        "node": max(set(nodes), key=nodes.count),
+        "heap_fetches": statistics.mean(heap_fetches),
+        "buffers": statistics.mean(buffers),
+        "execution_ms": statistics.median(execution),
+    }
+
+
+async def index_size(conn: AsyncConnection, table: str) -> int:
+    result = await conn.execute(
+        text("SELECT coalesce(sum(pg_relation_size(indexrelid)), 0) FROM pg_index WHERE indrelid = CAST(:table AS regclass)"),
+        {"table": table},
+    )
+    return int(result.scalar_one())
+
+
+async def run(rows: int, lookups: int, insert_rows: int) -> list[dict]:
+    """
+    Создает варианты схемы и измеряет их в одном соединении (временные таблицы видны только ему).
+
+    Args:
+        rows (int): Количество пользователей в таблице.
+        lookups (int): Количество измеряемых поисков по имени.
+        insert_rows (int): Количество пользователей во вставке после заполнения.
+
+    Returns:
+        list[dict]: Результаты по вариантам схемы.
+    """
+    usernames = [f"user-{random.randrange(rows)}" for _ in range(lookups)]
+    results = []
+
+    # VACUUM не выполняется в транзакции; без него карта видимости пуста и Index Only Scan читает таблицу
+    async with database.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for name, table, ddl, condition in VARIANTS:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            for statement in ddl:
+                await conn.execute(text(statement))
+
+            await fill(conn, table, 0, rows)
+            await conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+            result = {"variant": name}
+            result.update(await explain_lookups(conn, table, condition, usernames))
+            result["index_kb"] = await index_size(conn, table) / 1024
+            result["insert_ms"] = await fill(conn, table, rows, rows + insert_rows) * 1000
+            results.append(result)
+
+            await conn.execute(text(f"DROP TABLE {table}"))
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    database.init()
+    try:
+        if database.engine.dialect.name != "postgresql":
+            raise SystemExit("benchmarks.explain requires PostgreSQL (DATABASE_*)")
+        results = await run(args.rows, args.lookups, args.insert_rows)
+    finally:
+        await database.close()
+
+    print(
+        f"{'variant':<16} {'lookup plan':<52} {'heap fetches':>12} {'buffers':>8} "
+        f"{'exec ms':>8} {'index KiB':>10} {'insert ms':>10}"
+    )
+    for result in results:
+        print(
+            f"{result['variant']:<16} {result['node']:<52} {result['heap_fetches']:>12.2f} {result['buffers']:>8.1f} "
+            f"{result['execution_ms']:>8.3f} {result['index_kb']:>10.0f} {result['insert_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="количество пользователей в таблице")
+    parser.add_argument("--lookups", type=int, default=200, help="количество измеряемых поисков по имени")
+    parser.add_argument("--insert-rows", type=int, default=10000, help="количество пользователей во вставке")
+    asyncio.run(main(parser.parse_args()))
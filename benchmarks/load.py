@@ -0,0 +1,92 @@
+"""
+Нагрузочные бенчмарки HTTP маршрутов через ASGI приложение (без сети).
+"""
+import uuid
+
+import httpx
+
+from app.main import app
+from app.core import database
+from app.auth import ratelimit
+from app.auth import service as auth_service
+from app.users import schemas as users_schemas
+from benchmarks import common
+
+
+async def run(user: users_schemas.UserInDB, count: int, hash_count: int, concurrency: int) -> dict:
+    """
+    Выполняет одновременные HTTP запросы к маршрутам авторизации.
+
+    Args:
+        user (users_schemas.UserInDB): Пользователь бенчмарков.
+        count (int): Количество запросов для маршрутов без хеширования паролей.
+        hash_count (int): Количество запросов для маршрутов с хешированием паролей.
+        concurrency (int): Количество одновременных запросов.
+
+    Returns:
+        dict: Результаты по именам бенчмарков.
+    """
+    results = {}
+    access_token = auth_service.create_access_token(user.id, user.username)
+
+    # Токен обновления одноразовый: каждый запрос (и прогревочный) получает свой
+    async with database.create_session() as session, session.begin():
+        refresh_tokens = [
+            await auth_service.issue_refresh_token(user.id, user.username, session) for _ in range(count + 1)
+        ]
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def request(method: str, url: str, expected: int = 200, **kwargs) -> None:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code != expected:
+                    raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text}")
+
+            async def users_me(i: int) -> None:
+                await request("GET", "/users/me", headers={"Cookie": f"access_token={access_token}"})
+
+            async def refresh(i: int) -> None:
+                await request("POST", "/auth/refresh", headers={"Cookie": f"refresh_token={refresh_tokens[i + 1]}"})
+
+            async def refresh_fresh(i: int) -> None:
+                # Токен доступа еще свежий - маршрут возвращает действующие токены без ротации
+                cookie = f"access_token={access_token}; refresh_token={refresh_tokens[0]}"
+                await request("POST", "/auth/refresh", headers={"Cookie": cookie})
+
+            async def authorization(i: int) -> None:
+                params = {"username": common.BENCH_USERNAME, "password": common.BENCH_PASSWORD}
+                await request("POST", "/auth/authorization", params=params)
+
+            async def registration(i: int) -> None:
+                params = {"username": f"{prefix}{i}", "password": common.BENCH_PASSWORD}
+                await request("POST", "/auth/registration", params=params)
+
+            results["load.users_me"] = await common.measure_async(users_me, count, concurrency)
+            results["load.refresh"] = await common.measure_async(refresh, count, concurrency)
+            results["load.refresh.fresh"] = await common.measure_async(refresh_fresh, count, concurrency)
+            async def authorization_rejected(i: int) -> None:
+                params = {"username": common.BENCH_USERNAME, "password": common.BENCH_PASSWORD}
+                await request("POST", "/auth/authorization", expected=429, params=params)
+
+            # Бенчмарк входа измеряет проверку пароля, а не ограничитель попыток
+            limiter = ratelimit.login_limiter
+            ratelimit.login_limiter = None
+            try:
+                results["load.authorization"] = await common.measure_async(authorization, hash_count, concurrency)
+            finally:
+                ratelimit.login_limiter = limiter
+
+            # Стоимость отказа ограничителя (пустая корзина)
+            ratelimit.login_limiter = ratelimit.LoginRateLimiter(
+                ratelimit.MemoryRateLimitBackend(maxsize=1), ip_burst=0, ip_per_minute=1, username_burst=0, username_per_minute=1,
+            )
+            try:
+                results["load.authorization.rejected"] = await common.measure_async(authorization_rejected, count, concurrency)
+            finally:
+                ratelimit.login_limiter = limiter
+            results["load.registration"] = await common.measure_async(registration, hash_count, concurrency)
+
+    return results
@@ -0,0 +1,110 @@
+"""
+Микробенчмарки отдельных операций авторизации.
+"""
+import json
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+
+from app.core import database
+from app.core.responses import ModelResponse
+from app.auth import service as auth_service
+from app.auth import tokens
+from app.users import models as users_models
+from app.users import schemas as users_schemas
+from app.users import service as users_service
+from app.users.cache import user_cache
+from benchmarks import common
+
+
+async def run(user: users_schemas.UserInDB, count: int, hash_count: int, concurrency: int) -> dict:
+    """
+    Выполняет микробенчмарки.
+
+    Args:
+        user (users_schemas.UserInDB): Пользователь бенчмарков.
+        count (int): Количество вызовов для быстрых операций.
+        hash_count (int): Количество вызовов для хеширования паролей.
+        concurrency (int): Количество одновременных вызовов асинхронных операций.
+
+    Returns:
+        dict: Результаты по именам бенчмарков.
+    """
+    results = {}
+    token = auth_service.create_access_token(user.id, user.username)
+
+    results["micro.create_access_token"] = common.measure_sync(
+        lambda: auth_service.create_access_token(user.id, user.username), count,
+    )
+
+    # Проверка подписи без кэша проверенных токенов
+    maxsize = auth_service.token_cache.maxsize
+    auth_service.token_cache.maxsize = 0
+    auth_service.token_cache.clear()
+    try:
+        results["micro.decode_jwt_token"] = common.measure_sync(lambda: auth_service.decode_jwt_token(token), count)
+    finally:
+        auth_service.token_cache.maxsize = maxsize
+    results["micro.decode_jwt_token.cached"] = common.measure_sync(lambda: auth_service.decode_jwt_token(token), count)
+
+    # Сравнение реализаций JWT на одних и тех же данных
+    payload = tokens.codec.decode(token)
+    for name in ("jose", "fast"):
+        codec = tokens.create_codec(name)
+        encoded = codec.encode(payload)
+        results[f"micro.codec.{name}.encode"] = common.measure_sync(lambda: codec.encode(payload), count)
+        results[f"micro.codec.{name}.decode"] = common.measure_sync(lambda: codec.decode(encoded), count)
+
+    # Ответ /users/me: проверка модели и сериализация через словарь (как делает FastAPI
+    # для возвращенной модели) против model_construct и сериализации сразу в байты
+    def project_validate() -> None:
+        model = users_schemas.User(**user.__dict__)
+        json.dumps(jsonable_encoder(users_schemas.User.model_validate(model))).encode()
+
+    def project_construct() -> None:
+        ModelResponse(users_schemas.User.model_construct(id=user.id, username=user.username))
+
+    results["micro.user_projection.validate"] = common.measure_sync(project_validate, count)
+    results["micro.user_projection.construct"] = common.measure_sync(project_construct, count)
+
+    async def verify(i: int) -> None:
+        await auth_service.verify_password(common.BENCH_PASSWORD, user.hashed_password)
+
+    results["micro.verify_password"] = await common.measure_async(verify, hash_count, 1)
+
+    async def verify_dummy(i: int) -> None:
+        await auth_service.verify_dummy_password(common.BENCH_PASSWORD)
+
+    results["micro.verify_dummy_password"] = await common.measure_async(verify_dummy, hash_count, 1)
+    results["micro.verify_password.concurrent"] = await common.measure_async(verify, hash_count, concurrency)
+
+    async def get_user(i: int) -> None:
+        async with database.create_session() as session:
+            await users_service.get_user_by_id(user.id, session)
+
+    # Запрос к базе данных без кэша пользователей
+    backend = user_cache.backend
+    user_cache.backend = None
+    try:
+        results["micro.get_user_by_id"] = await common.measure_async(get_user, count, 1)
+    finally:
+        user_cache.backend = backend
+    results["micro.get_user_by_id.cached"] = await common.measure_async(get_user, count, 1)
+
+    # Построение запроса при каждом вызове с загрузкой ORM объекта (прежний способ)
+    # против закэшированного lambda запроса только нужных колонок
+    async def query_orm_entity(i: int) -> None:
+        async with database.create_session() as session:
+            statement = select(users_models.Users).where(users_models.Users.username == user.username)
+            entity = (await session.execute(statement)).scalars().first()
+            users_schemas.UserInDB(id=entity.id, username=entity.username, hashed_password=entity.hashed_password)
+
+    async def query_lambda_columns(i: int) -> None:
+        async with database.create_session() as session:
+            statement = users_service._user_by_username_statement(user.username)
+            await users_service._fetch_user("bench", statement, session)
+
+    results["micro.user_query.orm_entity"] = await common.measure_async(query_orm_entity, count, 1)
+    results["micro.user_query.lambda_columns"] = await common.measure_async(query_lambda_columns, count, 1)
+
+    return results
@@ -0,0 +1,91 @@
+"""
+Сравнение регистрации пользователя: SELECT + INSERT против INSERT ... ON CONFLICT DO NOTHING.
+
+Хеш пароля вычисляется один раз заранее, чтобы измерялась только работа с базой данных.
+Требует запущенной PostgreSQL с примененными миграциями (настройки DATABASE_*).
+
+Запуск:
+    python -m benchmarks.registration --count 1000 --concurrency 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from app.core import database
+from app.auth import hashing
+from app.users import models as users_models
+
+
+# Прежний способ: проверка имени отдельным запросом, затем вставка через ORM
+async def register_two_queries(username: str, hashed_password: str) -> None:
+    async with database.create_session() as session, session.begin():
+        statement = select(users_models.Users).where(users_models.Users.username == username)
+        if (await session.execute(statement)).scalars().first() is not None:
+            return
+        session.add(users_models.Users(username=username, hashed_password=hashed_password))
+        await session.flush()
+
+
+# Новый способ: один запрос с обработкой конфликта
+async def register_single_query(username: str, hashed_password: str) -> None:
+    async with database.create_session() as session, session.begin():
+        statement = (
+            insert(users_models.Users)
+            .values(username=username, hashed_password=hashed_password)
+            .on_conflict_do_nothing()
+            .returning(users_models.Users.id)
+        )
+        (await session.execute(statement)).scalar_one_or_none()
+
+
+async def run(name, register, prefix: str, count: int, concurrency: int, hashed_password: str) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await register(f"{prefix}{i}", hashed_password)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<14} rps={count / elapsed:8.1f} "
+        f"p50={quantiles[49] * 1000:7.2f}ms p95={quantiles[94] * 1000:7.2f}ms p99={quantiles[98] * 1000:7.2f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="количество регистраций")
+    parser.add_argument("--concurrency", type=int, default=10, help="количество одновременных регистраций")
+    args = parser.parse_args()
+
+    hashed_password = hashing.hash_password_sync("password")
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+
+    database.init()
+    try:
+        for name, register in (("two queries", register_two_queries), ("single query", register_single_query)):
+            # Новые имена, затем повтор тех же имен (конфликты)
+            await run(name, register, f"{prefix}{name[0]}-", args.count, args.concurrency, hashed_password)
+            await run(name + " dup", register, f"{prefix}{name[0]}-", args.count, args.concurrency, hashed_password)
+    finally:
+        async with database.create_session() as session, session.begin():
+            await session.execute(delete(users_models.Users).where(users_models.Users.username.startswith(prefix)))
+        await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Набор бенчмарков авторизации: микробенчмарки операций и нагрузка на HTTP маршруты.
+
+Работает без сети против локальной PostgreSQL (настройки DATABASE_*) или SQLite:
+    DATABASE_URL=sqlite+aiosqlite:///bench.db python -m benchmarks.run
+
+Результаты сравниваются с benchmarks/baseline.json; при регрессии p95 или RPS
+больше допустимой команда завершается с кодом 1. Базовые результаты сохраняются
+флагом --save-baseline на той же машине и с той же базой данных.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from app.core import database
+from benchmarks import common, load, micro
+
+
+async def main(args: argparse.Namespace) -> int:
+    database.init()
+    try:
+        user = await common.prepare_database()
+
+        results = {}
+        if args.only in (None, "micro"):
+            results.update(await micro.run(user, args.count, args.hash_count, args.concurrency))
+        if args.only in (None, "load"):
+            results.update(await load.run(user, args.count, args.hash_count, args.concurrency))
+    finally:
+        await database.close()
+
+    baseline = common.load_baseline(args.baseline)
+    common.print_results(results, baseline)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+    if args.save_baseline:
+        common.save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create it")
+        return 0
+
+    regressions = common.compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=["micro", "load"], help="выполнить только одну группу бенчмарков")
+    parser.add_argument("--count", type=int, default=2000, help="количество вызовов быстрых операций")
+    parser.add_argument("--hash-count", type=int, default=50, help="количество вызовов с хешированием паролей")
+    parser.add_argument("--concurrency", type=int, default=20, help="количество одновременных запросов")
+    parser.add_argument("--baseline", type=Path, default=common.BASELINE_PATH, help="файл базовых результатов")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как базовые")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение (доля)")
+    parser.add_argument("--output", type=Path, help="файл для результатов в JSON")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,200 @@
+"""
+Время запуска: импорт приложения и холодный старт воркера.
+
+Каждый замер выполняется в новом процессе интерпретатора. Импорт app.main измеряется
+отдельно от разбивки по модулям (python -X importtime заметно замедляет импорт):
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --budget-ms 1500 --top 15
+    DATABASE_URL=sqlite+aiosqlite:///bench.db python -m benchmarks.startup --timeline
+
+Команда завершается с кодом 1, если медиана импорта app.main превышает --budget-ms
+или при импорте загружается модуль из LAZY_MODULES (они должны загружаться только
+при первом использовании).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Корень репозитория: процессы запускаются из него, чтобы импортировать пакет app
+ROOT = Path(__file__).resolve().parent.parent
+
+# Модули, которые не должны загружаться при импорте приложения
+LAZY_MODULES = ("passlib", "bcrypt", "argon2", "jose", "cryptography", "asyncpg", "redis")
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+_MEASURE_IMPORT = """
+import time
+started = time.perf_counter()
+import app.main
+print(time.perf_counter() - started)
+"""
+
+# Этапы холодного старта: импорт, lifespan (подключения, хеш, отзывы, прогрев), первый запрос
+_MEASURE_TIMELINE = """
+import asyncio, json, time
+import httpx
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            await client.get("/.well-known/jwks.json")
+        answered = time.perf_counter()
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "lifespan_ms": (ready - imported) * 1000,
+        "first_request_ms": (answered - ready) * 1000,
+    }))
+
+asyncio.run(main())
+"""
+
+
+def run_python(*args: str) -> tuple[subprocess.CompletedProcess, float]:
+    """
+    Запускает новый процесс интерпретатора в корне репозитория.
+
+    Returns:
+        tuple[subprocess.CompletedProcess, float]: Результат и время работы процесса в секундах.
+    """
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, env=os.environ.copy())
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"python {' '.join(args)} failed:\n{result.stderr}")
+    return result, elapsed
+
+
+def measure_import(runs: int) -> dict:
+    """
+    Измеряет импорт app.main в новых процессах.
+
+    Args:
+        runs (int): Количество запусков.
+
+    Returns:
+        dict: Медиана и минимум времени импорта и работы процесса в миллисекундах.
+    """
+    imports, processes = [], []
+    for _ in range(runs):
+        result, elapsed = run_python("-c", _MEASURE_IMPORT)
+        imports.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+        processes.append(elapsed * 1000)
+    return {
+        "import_ms": statistics.median(imports),
+        "import_min_ms": min(imports),
+        "process_ms": statistics.median(processes),
+    }
+
+
+def import_profile() -> list[tuple[str, int, int]]:
+    """
+    Собирает разбивку импорта app.main по модулям (python -X importtime).
+
+    Returns:
+        list[tuple[str, int, int]]: Модуль, собственное и суммарное время в микросекундах.
+    """
+    result, _ = run_python("-X", "importtime", "-c", "import app.main")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_timeline() -> dict:
+    """
+    Измеряет этапы холодного старта воркера в новом процессе.
+
+    Returns:
+        dict: Время импорта, lifespan, первого запроса и остального времени процесса
+            (запуск и завершение интерпретатора, импорт httpx) в миллисекундах.
+    """
+    result, elapsed = run_python("-c", _MEASURE_TIMELINE)
+    timeline = json.loads(result.stdout.strip().splitlines()[-1])
+    timeline["other_ms"] = elapsed * 1000 - sum(timeline.values())
+    return timeline
+
+
+def check(result: dict, modules: list[tuple[str, int, int]], budget_ms: float) -> list[str]:
+    """
+    Проверяет бюджет импорта app.main и отложенную загрузку модулей из LAZY_MODULES.
+
+    Args:
+        result (dict): Результат measure_import.
+        modules (list[tuple[str, int, int]]): Результат import_profile.
+        budget_ms (float): Допустимая медиана импорта в миллисекундах.
+
+    Returns:
+        list[str]: Описания нарушений; пустой список, если проверки пройдены.
+    """
+    failures = []
+    if result["import_ms"] > budget_ms:
+        failures.append(f"import app.main took {result['import_ms']:.1f} ms, budget {budget_ms:.0f} ms")
+
+    loaded = {name for name, _, _ in modules}
+    for module in LAZY_MODULES:
+        if module in loaded:
+            failures.append(f"{module} is imported eagerly by app.main")
+    return failures
+
+
+def print_profile(modules: list[tuple[str, int, int]], top: int) -> None:
+    # Собственное время по пакетам верхнего уровня и самые медленные модули
+    packages: dict[str, int] = {}
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    print(f"\n{'package':<32} {'self ms':>9}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<32} {self_us / 1000:>9.1f}")
+
+    print(f"\n{'module':<48} {'self ms':>9} {'cumul ms':>9}")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda module: -module[1])[:top]:
+        print(f"{name:<48} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}")
+
+
+def main(args: argparse.Namespace) -> int:
+    modules = import_profile()
+    print_profile(modules, args.top)
+
+    result = measure_import(args.runs)
+    print(
+        f"\nimport app.main: median {result['import_ms']:.1f} ms, min {result['import_min_ms']:.1f} ms, "
+        f"process {result['process_ms']:.1f} ms (budget {args.budget_ms:.0f} ms, {args.runs} runs)"
+    )
+
+    if args.timeline:
+        timeline = measure_timeline()
+        print("\ncold start timeline:")
+        for phase in ("import_ms", "lifespan_ms", "first_request_ms", "other_ms"):
+            print(f"  {phase[:-3]:<16} {timeline[phase]:>9.1f} ms")
+
+    failures = check(result, modules, args.budget_ms)
+    for failure in failures:
+        print(f"STARTUP {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="количество запусков для замера импорта")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="допустимая медиана импорта app.main")
+    parser.add_argument("--top", type=int, default=10, help="количество пакетов и модулей в разбивке")
+    parser.add_argument("--timeline", action="store_true", help="измерить этапы холодного старта воркера")
+    sys.exit(main(parser.parse_args()))
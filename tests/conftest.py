@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+# Настройки читаются один раз при импорте app.core.settings, поэтому окружение тестов
+# задается до импорта приложения. База данных - временная SQLite (или TEST_DATABASE_URL)
+_TEST_DIR = tempfile.mkdtemp(prefix="fastapi-auth-base-tests-")
+os.environ.update({
+    "APP_PROFILE": "dev",
+    "DATABASE_URL": os.environ.get("TEST_DATABASE_URL", f"sqlite+aiosqlite:///{_TEST_DIR}/test.db"),
+    "SECURITY_SECRET_KEY": "test-secret",
+    "SECURITY_ALGORITHM": "HS256",
+    "SECURITY_TOKEN_CODEC": "fast",
+    "SECURITY_STATELESS_AUTH": "false",
+    "SECURITY_IMPORT_TOKEN": "test-import-token",
+    "SECURITY_METRICS_TOKEN": "test-metrics-token",
+    "HASHING_SCHEMES": "bcrypt",
+    "HASHING_POOL_KIND": "thread",
+    "HASHING_BCRYPT_ROUNDS": "4",
+    "CACHE_USER_CACHE_BACKEND": "memory",
+    "RATE_LIMIT_ENABLED": "true",
+    "RATE_LIMIT_BACKEND": "memory",
+    "RATE_LIMIT_IP_BURST": "1000",
+    "RATE_LIMIT_USERNAME_BURST": "3",
+    "SERVER_WARMUP": "false",
+})
+
+import asyncio  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app.core import Base, database  # noqa: E402
+from app.auth import models as auth_models  # noqa: E402, F401 - регистрирует таблицы в Base.metadata
+from app.users import models as users_models  # noqa: E402, F401
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema() -> None:
+    """
+    Создает таблицы один раз; тесты не мешают друг другу, потому что используют новые имена пользователей.
+    """
+    async def create_all() -> None:
+        database.init()
+        try:
+            async with database.engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+        finally:
+            await database.close()
+
+    asyncio.run(create_all())
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """
+    HTTP клиент приложения с выполненным lifespan.
+    """
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http_client:
+            yield http_client
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.core import database
+from app.core.cache import LRUCache, SingleFlight
+from app.users import cache as users_cache
+from app.users import models as users_models
+from app.users import schemas as users_schemas
+from tests.utils import new_username, register
+
+pytestmark = pytest.mark.anyio
+
+
+def user_cache() -> users_cache.UserCache:
+    backend = users_cache.MemoryUserCache(maxsize=100, ttl=60)
+    return users_cache.UserCache(backend, ttl=60, negative_ttl=60)
+
+
+class Loader:
+    """
+    Загрузчик пользователя, считающий обращения к базе данных.
+    """
+    def __init__(self, user: users_schemas.UserInDB | None) -> None:
+        self.user = user
+        self.calls = 0
+
+    async def __call__(self) -> users_schemas.UserInDB | None:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.user
+
+
+def test_lru_cache_expires_and_evicts(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now)
+    cache = LRUCache(maxsize=2, ttl=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    assert cache.get("a") == 1  # "a" использован недавно, вытесняется "b"
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.evictions == 1
+
+    now += 10
+    assert cache.get("a") is None and cache.expirations == 1
+    assert cache.get("c") is None
+
+
+async def test_user_cache_stores_user_under_both_keys():
+    cache = user_cache()
+    user = users_schemas.UserInDB(id=1, username="alice", hashed_password="hash")
+    loader = Loader(user)
+
+    assert await cache.get_or_load(users_cache.username_key("alice"), loader) == user
+    assert await cache.get_or_load(users_cache.id_key(1), loader) == user
+    assert loader.calls == 1
+
+
+async def test_user_cache_negative_entries_until_invalidated():
+    cache = user_cache()
+    key = users_cache.username_key("alice")
+    loader = Loader(None)
+
+    assert await cache.get_or_load(key, loader, negative=True) is None
+    assert await cache.get_or_load(key, loader, negative=True) is None
+    assert loader.calls == 1
+    assert await cache.peek(key) is None  # Отрицательная запись, а не промах
+
+    await cache.invalidate(username="alice")
+    assert await cache.peek(key) is users_cache.MISSING
+    loader.user = users_schemas.UserInDB(id=1, username="alice", hashed_password="hash")
+    assert await cache.get_or_load(key, loader, negative=True) == loader.user
+
+
+async def test_user_cache_does_not_store_missing_users_without_negative():
+    cache = user_cache()
+    loader = Loader(None)
+
+    await cache.get_or_load(users_cache.id_key(1), loader)
+    await cache.get_or_load(users_cache.id_key(1), loader)
+
+    assert loader.calls == 2
+
+
+async def test_user_cache_coalesces_concurrent_loads():
+    cache = user_cache()
+    loader = Loader(users_schemas.UserInDB(id=1, username="alice", hashed_password="hash"))
+
+    results = await asyncio.gather(*(cache.get_or_load(users_cache.id_key(1), loader) for _ in range(10)))
+
+    assert loader.calls == 1
+    assert all(result == loader.user for result in results)
+
+
+async def test_single_flight_shares_result_and_exception():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(flights.do("key", work) for _ in range(5))) == [1] * 5
+    assert len(flights) == 0
+    assert await flights.do("key", work) == 2  # Завершенный вызов не переиспользуется
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    results = await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flights) == 0
+
+
+async def test_registration_invalidates_cache_after_commit(client, monkeypatch):
+    username = new_username()
+    invalidate = users_cache.user_cache.invalidate
+    visible = []
+
+    # Проверяем в отдельной сессии, что пользователь уже зафиксирован в момент сброса кэша
+    async def check_then_invalidate(user_id=None, username=None):
+        async with database.create_session() as session:
+            statement = select(users_models.Users.id).where(users_models.Users.username == username)
+            visible.append((await session.execute(statement)).scalar_one_or_none() is not None)
+        await invalidate(user_id=user_id, username=username)
+
+    # Отрицательная запись для имени, которое еще не зарегистрировано
+    response = await client.post("/auth/authorization", params={"username": username, "password": "password"})
+    assert response.status_code == 400
+    assert await users_cache.user_cache.peek(users_cache.username_key(username)) is None
+
+    monkeypatch.setattr(users_cache.user_cache, "invalidate", check_then_invalidate)
+    await register(client, username)
+
+    assert visible == [True]
+    response = await client.post("/auth/authorization", params={"username": username, "password": "password"})
+    assert response.status_code == 200
@@ -0,0 +1,116 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from app import cli
+from app.users import importer as users_importer
+from tests.utils import new_username
+
+pytestmark = pytest.mark.anyio
+
+IMPORT_HEADERS = {"X-Import-Token": "test-import-token"}
+
+
+async def import_file(client, filename: str, content: bytes) -> dict:
+    response = await client.post("/users/import", headers=IMPORT_HEADERS, files={"file": (filename, content)})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_import_csv(client):
+    first, second = new_username(), new_username()
+    content = f"\ufeffusername,password\r\n{first},password\r\n{second},password\r\n,password\r\n{first},password\r\n"
+
+    report = await import_file(client, "users.csv", content.encode())
+
+    assert (report["total"], report["created"], report["duplicates"], report["invalid"]) == (4, 2, 1, 1)
+    assert [(error["line"], error["error"]) for error in report["errors"]] == [
+        (4, "Missing username"),
+        (5, "Username already exists!"),
+    ]
+    response = await client.post("/auth/authorization", params={"username": second, "password": "password"})
+    assert response.status_code == 200
+
+
+async def test_import_jsonl(client):
+    existing, created = new_username(), new_username()
+    await import_file(client, "users.jsonl", json.dumps({"username": existing, "password": "password"}).encode())
+    content = "\n".join([
+        json.dumps({"username": created, "password": "pass word"}),
+        "",
+        "{not json",
+        json.dumps({"username": existing, "password": "password"}),
+    ])
+
+    report = await import_file(client, "users.jsonl", content.encode())
+
+    assert (report["total"], report["created"], report["duplicates"], report["invalid"]) == (3, 1, 1, 1)
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    response = await client.post("/auth/authorization", params={"username": created, "password": "pass word"})
+    assert response.status_code == 200
+
+
+async def test_import_requires_token(client):
+    response = await client.post("/users/import", files={"file": ("users.csv", b"username,password\r\n")})
+
+    assert response.status_code == 403
+
+
+def test_read_lines_keeps_line_ends_across_chunks(monkeypatch):
+    monkeypatch.setattr(users_importer, "READ_CHUNK_SIZE", 3)
+    content = "\ufeffa,b\r\nc,\"d\ne\"\rf\n g".encode()
+
+    lines = list(users_importer.read_lines(io.BytesIO(content)))
+
+    assert lines == ["a,b\r\n", "c,\"d\n", "e\"\r", "f\n", " g"]
+
+
+async def test_failed_insert_cancels_pending_hashing(monkeypatch):
+    importer = users_importer.UserImporter(None, None, workers=1, batch_size=1)
+    started = []
+
+    async def hash_batch(batch):
+        started.append(asyncio.current_task())
+        if len(started) > 1:
+            await asyncio.sleep(10)  # Хеширование следующего пакета не успевает завершиться
+        return batch
+
+    async def insert_batch(batch):
+        await asyncio.sleep(0)  # Хеширование следующего пакета успевает начаться
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(importer, "_hash_batch", hash_batch)
+    monkeypatch.setattr(importer, "_insert_batch", insert_batch)
+    records = [(line, {"username": new_username(), "password": "password"}, None) for line in (1, 2, 3)]
+
+    with pytest.raises(RuntimeError):
+        await importer.run(records)
+
+    assert len(started) == 2
+    assert started[1].cancelled()
+
+
+def test_batch_size_is_limited_by_bind_parameters():
+    with pytest.raises(ValueError):
+        users_importer.UserImporter(None, None, workers=1, batch_size=users_importer.MAX_BATCH_SIZE + 1)
+
+
+def test_cli_import_users(tmp_path, capsys):
+    created = new_username()
+    path = tmp_path / "users.csv"
+    path.write_text(f"username,password\n{created},password\n,password\n", encoding="utf-8")
+    errors = tmp_path / "errors.jsonl"
+
+    code = cli.main(["import-users", str(path), "--workers", "1", "--errors", str(errors)])
+
+    report = json.loads(capsys.readouterr().out)
+    assert code == 1  # Есть ошибочная строка
+    assert (report["total"], report["created"], report["invalid"]) == (2, 1, 1)
+    assert [json.loads(line)["line"] for line in errors.read_text().splitlines()] == [3]
+
+
+def test_cli_rejects_batch_size_over_limit(tmp_path):
+    with pytest.raises(SystemExit):
+        cli.main(["import-users", str(tmp_path / "users.csv"), "--batch-size", str(users_importer.MAX_BATCH_SIZE + 1)])
@@ -0,0 +1,58 @@
+import pytest
+
+from app.core import settings
+from app.core.settings import env_float
+from app.auth import ratelimit
+from tests.utils import new_username, register
+
+
+@pytest.mark.anyio
+async def test_memory_backend_refills_over_time(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now)
+    backend = ratelimit.MemoryRateLimitBackend(maxsize=10)
+
+    assert await backend.hit("key", capacity=2, rate=1.0) == 0
+    assert await backend.hit("key", capacity=2, rate=1.0) == 0
+    assert await backend.hit("key", capacity=2, rate=1.0) == pytest.approx(1.0)
+
+    now += 1.0
+    assert await backend.hit("key", capacity=2, rate=1.0) == 0
+
+
+def test_limiter_rejects_zero_refill_rate():
+    with pytest.raises(ValueError):
+        ratelimit.LoginRateLimiter(
+            ratelimit.MemoryRateLimitBackend(maxsize=10),
+            ip_burst=10,
+            ip_per_minute=0,
+            username_burst=10,
+            username_per_minute=5,
+        )
+
+
+def test_zero_refill_rate_setting_is_rejected(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_USERNAME_PER_MINUTE", "0")
+    with pytest.raises(ValueError, match="RATE_LIMIT_USERNAME_PER_MINUTE"):
+        env_float("RATE_LIMIT_USERNAME_PER_MINUTE", 5, greater_than=0)
+
+
+@pytest.mark.anyio
+async def test_login_attempts_are_limited_per_username(client):
+    username = new_username()
+    await register(client, username)
+    burst = settings.rate_limit.USERNAME_BURST
+
+    for _ in range(burst):
+        response = await client.post("/auth/authorization", params={"username": username, "password": "wrong"})
+        assert response.status_code == 400
+
+    response = await client.post("/auth/authorization", params={"username": username, "password": "password"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+    # Другие имена пользователей с того же адреса не ограничены
+    other = new_username()
+    await register(client, other)
+    response = await client.post("/auth/authorization", params={"username": other, "password": "password"})
+    assert response.status_code == 200
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.auth import service as auth_service
+from tests.utils import register, with_cookies
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_refresh_with_fresh_access_token_returns_current_tokens(client):
+    tokens = await register(client)
+
+    response = await client.post("/auth/refresh")
+
+    assert response.status_code == 200
+    assert response.json() == tokens
+    assert "set-cookie" not in response.headers
+
+
+async def test_refresh_rotates_refresh_token(client):
+    tokens = await register(client)
+
+    async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+        response = await other.post("/auth/refresh")
+    rotated = response.json()
+
+    assert response.status_code == 200
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert rotated["access_token"] != tokens["access_token"]
+    assert response.cookies["refresh_token"] == rotated["refresh_token"]
+
+    async with with_cookies(client, access_token=rotated["access_token"]) as other:
+        assert (await other.get("/users/me")).status_code == 200
+
+
+async def test_concurrent_refreshes_rotate_once(client):
+    tokens = await register(client)
+
+    async def refresh():
+        async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+            return await other.post("/auth/refresh")
+
+    responses = await asyncio.gather(*(refresh() for _ in range(5)))
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len({response.json()["refresh_token"] for response in responses}) == 1
+
+
+async def test_refresh_retry_within_grace_returns_same_tokens(client):
+    tokens = await register(client)
+
+    async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+        rotated = (await other.post("/auth/refresh")).json()
+    async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+        retried = await other.post("/auth/refresh")
+
+    assert retried.status_code == 200
+    assert retried.json() == rotated
+
+
+async def test_refresh_token_reuse_revokes_family(client):
+    tokens = await register(client)
+
+    async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+        rotated = (await other.post("/auth/refresh")).json()
+
+    # Повтор после окна SECURITY_REFRESH_REUSE_GRACE считается кражей
+    auth_service.recent_refreshes.clear()
+    async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+        assert (await other.post("/auth/refresh")).status_code == 401
+
+    # Вся цепочка отозвана, включая токен, выданный при ротации
+    async with with_cookies(client, refresh_token=rotated["refresh_token"]) as other:
+        assert (await other.post("/auth/refresh")).status_code == 401
+
+
+async def test_access_token_is_not_accepted_as_refresh_token(client):
+    tokens = await register(client)
+
+    async with with_cookies(client, refresh_token=tokens["access_token"]) as other:
+        assert (await other.post("/auth/refresh")).status_code == 401
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from tests.utils import new_username, register
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_duplicate_username_is_rejected(client):
+    username = new_username()
+    await register(client, username)
+
+    response = await client.post("/auth/registration", params={"username": username, "password": "password"})
+
+    assert response.status_code == 400
+
+
+async def test_username_differing_only_in_case_is_rejected(client):
+    username = new_username()
+    await register(client, username)
+
+    response = await client.post("/auth/registration", params={"username": username.upper(), "password": "password"})
+
+    assert response.status_code == 400
+
+
+async def test_concurrent_registrations_create_one_user(client):
+    username = new_username()
+
+    responses = await asyncio.gather(*(
+        client.post("/auth/registration", params={"username": username, "password": "password"})
+        for _ in range(5)
+    ))
+
+    assert sorted(response.status_code for response in responses) == [200, 400, 400, 400, 400]
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.auth import service as auth_service
+from tests.utils import new_username, register, with_cookies
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_logout_revokes_access_and_refresh_tokens(client):
+    tokens = await register(client)
+
+    assert (await client.post("/auth/logout")).status_code == 204
+
+    async with with_cookies(client, access_token=tokens["access_token"]) as other:
+        assert (await other.get("/users/me")).status_code == 401
+    async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+        assert (await other.post("/auth/refresh")).status_code == 401
+
+
+async def test_refresh_token_is_not_accepted_as_access_token(client):
+    tokens = await register(client)
+
+    async with with_cookies(client, access_token=tokens["refresh_token"]) as other:
+        assert (await other.get("/users/me")).status_code == 401
+        assert (await other.post("/auth/logout-all")).status_code == 401
+
+    assert (await client.post("/auth/logout")).status_code == 204
+    async with with_cookies(client, access_token=tokens["refresh_token"]) as other:
+        assert (await other.get("/users/me")).status_code == 401
+
+
+async def test_logout_all_revokes_every_session(client):
+    username = new_username()
+    first = await register(client, username)
+    second = (await client.post("/auth/authorization", params={"username": username, "password": "password"})).json()
+
+    async with with_cookies(client, access_token=first["access_token"]) as other:
+        assert (await other.post("/auth/logout-all")).status_code == 204
+
+    for tokens in (first, second):
+        async with with_cookies(client, access_token=tokens["access_token"]) as other:
+            assert (await other.get("/users/me")).status_code == 401
+        async with with_cookies(client, refresh_token=tokens["refresh_token"]) as other:
+            assert (await other.post("/auth/refresh")).status_code == 401
+
+    # Токены, выданные после отзыва, действуют
+    await asyncio.sleep(0.01)
+    response = await client.post("/auth/authorization", params={"username": username, "password": "password"})
+    async with with_cookies(client, access_token=response.json()["access_token"]) as other:
+        assert (await other.get("/users/me")).status_code == 200
+
+
+async def test_revoked_token_is_not_served_from_token_cache(client):
+    tokens = await register(client)
+    cache_key = hashlib.sha256(tokens["access_token"].encode()).digest()
+
+    async with with_cookies(client, access_token=tokens["access_token"]) as other:
+        assert (await other.get("/users/me")).status_code == 200
+        assert auth_service.token_cache.get(cache_key) is not None
+
+        assert (await other.post("/auth/logout")).status_code == 204
+
+        # Токен остается в кэше проверенных токенов, но отзыв проверяется при каждом запросе
+        assert auth_service.token_cache.get(cache_key) is not None
+        assert (await other.get("/users/me")).status_code == 401
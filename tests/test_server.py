@@ -0,0 +1,62 @@
+from app import server
+
+
+def arbiter() -> server.Arbiter:
+    return server.Arbiter(None, None, workers=1, graceful_timeout=0, forwarded_allow_ips="127.0.0.1")
+
+
+def test_restart_delay_grows_exponentially_up_to_limit():
+    workers = arbiter()
+
+    delays = [workers.restart_delay(0, now=0) for _ in range(10)]
+
+    assert delays[:4] == [server.RESTART_BACKOFF_MIN * 2 ** i for i in range(4)]
+    assert delays[-1] == server.RESTART_BACKOFF_MAX
+    assert all(a <= b for a, b in zip(delays, delays[1:]))
+
+
+def test_restart_delay_resets_after_worker_ran_long_enough():
+    workers = arbiter()
+    for _ in range(5):
+        workers.restart_delay(0, now=0)
+
+    workers._started[0] = 100
+    assert workers.restart_delay(0, now=100 + server.RESTART_RESET_AFTER) == server.RESTART_BACKOFF_MIN
+    # Другие воркеры считаются отдельно
+    assert workers.restart_delay(1, now=0) == server.RESTART_BACKOFF_MIN
+
+
+def test_crashed_worker_is_restarted_after_delay(monkeypatch):
+    workers = arbiter()
+    spawned = []
+    exited = [(1234, 1 << 8)]  # Статус waitpid: код завершения 1
+    now = 1000.0
+
+    def waitpid(pid, options):
+        return exited.pop() if exited else (0, 0)
+
+    monkeypatch.setattr(server.os, "waitpid", waitpid)
+    monkeypatch.setattr(server.time, "monotonic", lambda: now)
+    monkeypatch.setattr(workers, "spawn", spawned.append)
+    workers._children = {1234: 0}
+    workers._started[0] = now
+
+    workers._reap()
+    workers._restart_due()
+    assert spawned == []  # Не перезапускаем сразу
+
+    now += server.RESTART_BACKOFF_MIN
+    workers._restart_due()
+    assert spawned == [0]
+
+
+def test_startup_failure_stops_arbiter(monkeypatch):
+    workers = arbiter()
+    exited = [(1234, server.STARTUP_FAILURE << 8)]
+    monkeypatch.setattr(server.os, "waitpid", lambda pid, options: exited.pop() if exited else (0, 0))
+    workers._children = {1234: 0}
+
+    workers._reap()
+
+    assert workers._stopping and workers._exit_code == server.STARTUP_FAILURE
+    assert not workers._restarts
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from benchmarks import startup
+
+
+@pytest.mark.parametrize("token_codec", ["fast", "jose"])
+def test_app_import_fits_budget_and_keeps_modules_lazy(token_codec, monkeypatch):
+    # Процессы наследуют окружение тестов; бюджет по умолчанию из benchmarks.startup
+    monkeypatch.setitem(os.environ, "SECURITY_TOKEN_CODEC", token_codec)
+
+    modules = startup.import_profile()
+    result = startup.measure_import(runs=1)
+
+    assert any(name == "app.main" for name, _, _ in modules)
+    assert startup.check(result, modules, budget_ms=1500) == []
+
+
+def test_check_reports_eager_modules_and_exceeded_budget():
+    failures = startup.check({"import_ms": 200.0}, [("app.main", 10, 100), ("jose", 5, 5)], budget_ms=100)
+
+    assert failures == ["import app.main took 200.0 ms, budget 100 ms", "jose is imported eagerly by app.main"]
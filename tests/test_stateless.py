@@ -0,0 +1,73 @@
+import dataclasses
+import types
+
+import pytest
+from sqlalchemy import event
+
+from app.core import database, settings
+from app.auth import dependencies as auth_depends
+from app.auth import service as auth_service
+from tests.utils import new_username, register, with_cookies
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    """
+    Включает SECURITY_STATELESS_AUTH для зависимостей авторизации.
+    """
+    security = dataclasses.replace(settings.security, STATELESS_AUTH=True)
+    monkeypatch.setattr(auth_depends, "settings", types.SimpleNamespace(security=security))
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """
+    Записывает SQL запросы и создание сессий базы данных.
+    """
+    log = {"statements": [], "sessions": 0}
+    create_session = database.create_session
+
+    def counting_create_session():
+        log["sessions"] += 1
+        return create_session()
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        log["statements"].append(statement)
+
+    monkeypatch.setattr(database, "create_session", counting_create_session)
+    event.listen(database.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield log
+    event.remove(database.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def test_stateless_mode_builds_user_from_token_without_sql(client, stateless, queries):
+    username = new_username()
+    tokens = await register(client, username)
+    queries["statements"].clear()
+    queries["sessions"] = 0
+
+    async with with_cookies(client, access_token=tokens["access_token"]) as user_client:
+        response = await user_client.get("/users/me")
+
+    assert response.status_code == 200
+    assert response.json()["username"] == username
+    assert queries == {"statements": [], "sessions": 0}
+
+
+async def test_stateless_mode_checks_tokens_without_username_in_database(client, stateless, queries):
+    username = new_username()
+    tokens = await register(client, username)
+    user_id = int(auth_service.decode_jwt_token(tokens["access_token"])["sub"])
+    queries["statements"].clear()
+    queries["sessions"] = 0
+
+    # Токен, выданный до включения режима: только идентификатор пользователя
+    async with with_cookies(client, access_token=auth_service.create_access_token(user_id)) as user_client:
+        response = await user_client.get("/users/me")
+
+    assert response.status_code == 200
+    assert response.json() == {"id": user_id, "username": username}
+    assert queries["sessions"] == 1
+    assert any("FROM users" in statement for statement in queries["statements"])
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from app.auth import dependencies as auth_depends
+from app.core.database import InstrumentedPool
+
+METRICS_HEADERS = {"Authorization": "Bearer test-metrics-token"}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["/metrics", "/system/pool"])
+async def test_system_routes_require_metrics_token(client, path):
+    assert (await client.get(path)).status_code == 403
+    assert (await client.get(path, headers={"Authorization": "Bearer wrong"})).status_code == 403
+    assert (await client.get(path, headers={"Authorization": "Basic test-metrics-token"})).status_code == 403
+    assert (await client.get(path, headers=METRICS_HEADERS)).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_metrics_render_pool_stats(client):
+    response = await client.get("/metrics", headers=METRICS_HEADERS)
+
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert "db_pool_checkouts" in response.text
+
+
+def test_service_token_routes_are_disabled_without_setting():
+    with pytest.raises(HTTPException) as error:
+        auth_depends.check_service_token("", "")
+
+    assert error.value.status_code == 404
+
+
+@pytest.mark.parametrize(("profile", "expected"), [("dev", "False"), ("prod", "True")])
+def test_pool_pre_ping_is_enabled_only_in_prod_profile(profile, expected):
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_POOL_PRE_PING"}
+    env["APP_PROFILE"] = profile
+    result = subprocess.run(
+        [sys.executable, "-c", "from app.core import settings; print(settings.database.POOL_PRE_PING)"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.strip() == expected
+
+
+def test_pool_counts_only_successful_checkouts():
+    def refuse():
+        raise sqlite3.OperationalError("database is down")
+
+    pool = InstrumentedPool(refuse, pool_size=1)
+    with pytest.raises(sqlite3.OperationalError):
+        pool.connect()
+
+    stats = pool.stats()
+    assert (stats["checkouts"], stats["connect_errors"]) == (0, 1)
+
+
+@pytest.mark.anyio
+async def test_pool_counts_timeouts_separately_from_checkouts():
+    pool = InstrumentedPool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.01)
+    connection = await greenlet_spawn(pool.connect)
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+    await greenlet_spawn(connection.close)
+
+    stats = pool.stats()
+    assert (stats["checkouts"], stats["timeouts"]) == (1, 1)
+    assert stats["wait_seconds_max"] >= 0.01
@@ -0,0 +1,245 @@
+import base64
+import hashlib
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import cli
+from app.auth import service as auth_service
+from app.auth import tokens
+
+SECRET = "test-secret"
+
+
+def b64(data: dict | bytes) -> str:
+    raw = data if isinstance(data, bytes) else json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def payload(**claims) -> dict:
+    return {"sub": "1", "exp": int(time.time()) + 60, **claims}
+
+
+def private_pem(algorithm: str) -> str:
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    if algorithm.startswith("RS"):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        key = ec.generate_private_key({"ES256": ec.SECP256R1(), "ES384": ec.SECP384R1()}[algorithm])
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def public_pem(private_key: str) -> str:
+    from cryptography.hazmat.primitives import serialization
+
+    key = serialization.load_pem_private_key(private_key.encode(), password=None)
+    return key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+
+
+def test_fast_codec_round_trip():
+    codec = tokens.FastCodec("HS256", SECRET, SECRET)
+    data = payload(username="user")
+
+    assert codec.decode(codec.encode(data)) == data
+
+
+def test_fast_codec_rejects_other_algorithm():
+    token = tokens.FastCodec("HS384", SECRET, SECRET).encode(payload())
+
+    with pytest.raises(tokens.TokenError, match="algorithm"):
+        tokens.FastCodec("HS256", SECRET, SECRET).decode(token)
+
+
+def test_fast_codec_rejects_alg_none():
+    token = f"{b64({'alg': 'none', 'typ': 'JWT'})}.{b64(payload())}."
+
+    with pytest.raises(tokens.TokenError):
+        tokens.FastCodec("HS256", SECRET, SECRET).decode(token)
+
+
+def test_fast_codec_rejects_tampered_token():
+    codec = tokens.FastCodec("HS256", SECRET, SECRET)
+    header, body, signature = codec.encode(payload(sub="1")).split(".")
+
+    # Другие данные с исходной подписью
+    with pytest.raises(tokens.TokenError, match="Signature"):
+        codec.decode(f"{header}.{b64(payload(sub='2'))}.{signature}")
+    # Измененная подпись
+    forged = b64(bytes(byte ^ 1 for byte in base64.urlsafe_b64decode(signature + "=")))
+    with pytest.raises(tokens.TokenError, match="Signature"):
+        codec.decode(f"{header}.{body}.{forged}")
+    # Подпись другим ключом
+    with pytest.raises(tokens.TokenError, match="Signature"):
+        codec.decode(tokens.FastCodec("HS256", "other-secret", "other-secret").encode(payload()))
+
+
+def test_fast_codec_rejects_expired_and_not_yet_valid_tokens():
+    codec = tokens.FastCodec("HS256", SECRET, SECRET)
+
+    with pytest.raises(tokens.TokenError, match="expired"):
+        codec.decode(codec.encode(payload(exp=int(time.time()) - 1)))
+    with pytest.raises(tokens.TokenError, match="not yet valid"):
+        codec.decode(codec.encode(payload(nbf=int(time.time()) + 60)))
+
+
+def test_fast_codec_rejects_malformed_token():
+    codec = tokens.FastCodec("HS256", SECRET, SECRET)
+
+    for token in ("", "abc", "a.b.c", f"{codec.header_segment.decode()}.{b64(b'[1]')}."):
+        with pytest.raises(tokens.TokenError):
+            codec.decode(token)
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "HS512"])
+def test_hs_tokens_are_compatible_with_jose(algorithm):
+    fast = tokens.FastCodec(algorithm, SECRET, SECRET)
+    jose = tokens.JoseCodec(algorithm, SECRET, SECRET)
+    data = payload(username="user")
+
+    assert jose.decode(fast.encode(data)) == data
+    assert fast.decode(jose.encode(data)) == data
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256", "ES384"])
+def test_asymmetric_tokens_are_compatible_with_jose(algorithm):
+    private_key = private_pem(algorithm)
+    fast = tokens.FastCodec(algorithm, private_key)
+    jose = tokens.JoseCodec(algorithm, private_key, public_pem(private_key))
+    data = payload(username="user")
+
+    assert jose.decode(fast.encode(data)) == data
+    assert fast.decode(jose.encode(data)) == data
+
+    # Кодек только с открытым ключом проверяет, но не подписывает
+    verifier = tokens.FastCodec(algorithm, "", public_pem(private_key))
+    assert verifier.decode(fast.encode(data)) == data
+    with pytest.raises(tokens.TokenError):
+        verifier.encode(data)
+
+
+def header(token: str) -> dict:
+    return json.loads(base64.urlsafe_b64decode(token.split(".")[0] + "=="))
+
+
+@pytest.fixture
+def keys_dir(tmp_path):
+    """
+    Каталог ключей ES256 с закрытыми ключами old и new, созданными командой generate-key.
+    """
+    pytest.importorskip("cryptography")
+    for kid in ("old", "new"):
+        assert cli.main(["generate-key", "--algorithm", "ES256", "--dir", str(tmp_path), "--kid", kid]) == 0
+    return tmp_path
+
+
+def test_keyring_signs_with_active_key_and_verifies_by_kid(keys_dir):
+    old = tokens.load_keyring(str(keys_dir), "ES256", active_kid="old")
+    rotated = tokens.load_keyring(str(keys_dir), "ES256", active_kid="new")
+    data = payload()
+
+    token = old.encode(data)
+    assert header(token)["kid"] == "old"
+    assert header(rotated.encode(data))["kid"] == "new"
+    # После смены активного ключа ранее выданные токены проверяются ключом из заголовка
+    assert rotated.decode(token) == data
+    assert old.decode(rotated.encode(data)) == data
+
+
+def test_keyring_active_key_defaults_to_last_private_key(keys_dir):
+    assert tokens.load_keyring(str(keys_dir), "ES256").active_kid == "old"  # "new" < "old" по имени
+
+
+def test_keyring_rejects_unknown_kid(keys_dir):
+    keyring = tokens.load_keyring(str(keys_dir), "ES256")
+    other = tokens.FastCodec("ES256", private_pem("ES256"), kid="unknown")
+
+    with pytest.raises(tokens.TokenError, match="Unknown key id"):
+        keyring.decode(other.encode(payload()))
+    # Известный kid с чужой подписью
+    forged = tokens.FastCodec("ES256", private_pem("ES256"), kid="new")
+    with pytest.raises(tokens.TokenError, match="Signature"):
+        keyring.decode(forged.encode(payload()))
+
+
+def test_keyring_verifies_tokens_of_retired_key(keys_dir):
+    token = tokens.load_keyring(str(keys_dir), "ES256", active_kid="old").encode(payload())
+
+    assert cli.main(["retire-key", "old", "--dir", str(keys_dir)]) == 0
+    keyring = tokens.load_keyring(str(keys_dir), "ES256")
+
+    assert sorted(path.name for path in keys_dir.iterdir()) == ["new.pem", "old.pub.pem"]
+    assert keyring.active_kid == "new"
+    assert keyring.decode(token)["sub"] == "1"
+    # Выведенный из оборота ключ нельзя сделать активным: им нечем подписывать
+    with pytest.raises(ValueError):
+        tokens.load_keyring(str(keys_dir), "ES256", active_kid="old")
+
+
+def test_jwks_document_lists_public_keys(keys_dir, monkeypatch):
+    assert cli.main(["retire-key", "old", "--dir", str(keys_dir)]) == 0
+    monkeypatch.setattr(tokens, "codec", tokens.load_keyring(str(keys_dir), "ES256"))
+    auth_service.jwks_document.cache_clear()
+    try:
+        body, etag = auth_service.jwks_document()
+    finally:
+        auth_service.jwks_document.cache_clear()
+
+    keys = sorted(json.loads(body)["keys"], key=lambda key: key["kid"])
+    assert [key["kid"] for key in keys] == ["new", "old"]
+    for key in keys:
+        assert set(key) == {"kty", "crv", "x", "y", "use", "alg", "kid"}
+        assert (key["kty"], key["crv"], key["use"], key["alg"]) == ("EC", "P-256", "sig", "ES256")
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+@pytest.mark.anyio
+async def test_jwks_endpoint_serves_empty_key_set_for_hs_algorithms(client):
+    response = await client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.json() == {"keys": []}
+    assert "max-age" in response.headers["Cache-Control"]
+
+    response = await client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+
+def test_decode_jwt_token_returns_copy_of_cached_payload():
+    token = tokens.codec.encode(payload(username="user"))
+
+    data = auth_service.decode_jwt_token(token)
+    data["username"] = "admin"
+
+    assert auth_service.decode_jwt_token(token)["username"] == "user"
+
+
+def test_cached_token_expires_with_token(monkeypatch):
+    now = time.time()
+    token = tokens.codec.encode(payload(exp=int(now) + 30))
+    cache_key = hashlib.sha256(token.encode()).digest()
+
+    assert auth_service.decode_jwt_token(token)["sub"] == "1"
+    assert auth_service.token_cache.get(cache_key) is not None
+
+    # Часы кэша и проверки токена переводятся за момент истечения
+    shift = 31
+    monotonic = time.monotonic
+    monkeypatch.setattr(time, "time", lambda: now + shift)
+    monkeypatch.setattr(time, "monotonic", lambda: monotonic() + shift)
+
+    assert auth_service.token_cache.get(cache_key) is None
+    with pytest.raises(HTTPException) as error:
+        auth_service.decode_jwt_token(token)
+    assert error.value.status_code == 401
@@ -0,0 +1,26 @@
+import uuid
+
+import httpx
+
+
+def new_username() -> str:
+    return f"user-{uuid.uuid4().hex[:12]}"
+
+
+async def register(client: httpx.AsyncClient, username: str | None = None, password: str = "password") -> dict:
+    """
+    Регистрирует пользователя и возвращает его токены.
+    """
+    response = await client.post(
+        "/auth/registration",
+        params={"username": username or new_username(), "password": password},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def with_cookies(client: httpx.AsyncClient, **cookies: str) -> httpx.AsyncClient:
+    """
+    Отдельный клиент того же приложения только с заданными cookies.
+    """
+    return httpx.AsyncClient(transport=client._transport, base_url=client.base_url, cookies=cookies)